@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark — guest name distance routines.
+
+Scores a set of arrival names against a pool of historical guest names
+with the full-matrix `_levenshtein`, the banded `_bounded_levenshtein`
+and the bit-parallel `_levenshtein_batch`, and checks they agree.
+
+Usage:
+    python benchmarks/bench_levenshtein.py
+    python benchmarks/bench_levenshtein.py --pool 20000 --queries 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import settings
+from guest_intel.matcher import (
+    _bounded_levenshtein,
+    _levenshtein,
+    _levenshtein_batch,
+    _normalize_name,
+)
+
+FIRST_NAMES = [
+    "Priya", "Thomas", "Maria", "Laurent", "Sophie", "James", "Olivia", "Hiroshi",
+    "Isabella", "Mohammed", "Anastasia", "Charlotte", "Alexander", "Elena", "William",
+    "Yuki", "Catherine", "Rafael", "Ingrid", "Sebastian", "Amelia", "Nikolai", "Chloe",
+]
+LAST_NAMES = [
+    "Kapoor", "Eriksson", "Costello", "de Montblanc", "Whitfield", "Tanaka", "Rossi",
+    "Al-Rashid", "Volkova", "Beaumont", "Harrington", "Nakamura", "Fernandes",
+    "Lindqvist", "von Habsburg", "Okafor", "Delacroix", "Petrov", "Castellanos",
+    "Montgomery", "Sørensen", "Abramovich", "Van der Berg", "Fitzgerald",
+]
+
+
+def _mock_names() -> list[str]:
+    """Guest names found in the OPERA mock data."""
+    path = settings.MOCK_DATA_DIR / "opera-pms.json"
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as fh:
+        raw = json.load(fh)
+    return [
+        guest["guestName"]
+        for day in raw.get("dailyStats", [])
+        for guest in day.get("arrivals", []) + day.get("departures", [])
+        if guest.get("guestName")
+    ]
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    """Apply one random keyboard-style edit."""
+    i = rng.randrange(len(name))
+    op = rng.choice(("sub", "del", "ins", "swap"))
+    c = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    if op == "sub":
+        return name[:i] + c + name[i + 1:]
+    if op == "del":
+        return name[:i] + name[i + 1:]
+    if op == "ins":
+        return name[:i] + c + name[i:]
+    return name[:i] + name[i + 1:i + 2] + name[i:i + 1] + name[i + 2:]
+
+
+def build_names(pool_size: int, query_count: int, seed: int) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    base = _mock_names() + [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(pool_size)
+    ]
+    pool = [_normalize_name(_typo(n, rng) if rng.random() < 0.3 else n) for n in base][:pool_size]
+    queries = [_normalize_name(n) for n in rng.sample(base, query_count)]
+    return queries, pool
+
+
+def _time(label: str, fn) -> tuple[float, list]:
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28} {elapsed * 1000:>9,.1f}ms")
+    return elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark guest name distance routines")
+    parser.add_argument("--pool", type=int, default=2000, help="Historical names per query (default: 2000)")
+    parser.add_argument("--queries", type=int, default=20, help="Arrival names to score (default: 20)")
+    parser.add_argument("--max-distance", type=int, default=2, help="Match threshold (default: 2)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    queries, pool = build_names(args.pool, args.queries, args.seed)
+    k = args.max_distance
+    print(f"📏 {len(queries)} queries × {len(pool):,} names · max_distance={k}")
+
+    full_t, full = _time("full matrix", lambda: [
+        [min(_levenshtein(q, n), k + 1) for n in pool] for q in queries
+    ])
+    banded_t, banded = _time("banded + early exit", lambda: [
+        [_bounded_levenshtein(q, n, k) for n in pool] for q in queries
+    ])
+    batch_t, batch = _time("bit-parallel batch", lambda: [
+        _levenshtein_batch(q, pool, k) for q in queries
+    ])
+
+    assert full == banded == batch, "distance routines disagree"
+    matches = sum(d <= k for row in full for d in row)
+    print(f"  ✓ results identical · {matches:,} matches within {k}")
+    print(f"  ⚡ banded {full_t / banded_t:.1f}× · batch {full_t / batch_t:.1f}× faster than full matrix")
+
+
+if __name__ == "__main__":
+    main()
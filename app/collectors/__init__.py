@@ -7,6 +7,7 @@ from .incidents import IncidentsCollector
 from .concierge import ConciergeCollector
 from .villas import VillasCollector
 from .m365 import M365Collector
+from .cache import RawSourceCache, raw_cache
 
 ALL_COLLECTORS = [
     OperaCollector,
@@ -21,5 +22,5 @@ ALL_COLLECTORS = [
 __all__ = [
     "OperaCollector", "SpaCollector", "FBCollector",
     "IncidentsCollector", "ConciergeCollector", "VillasCollector",
-    "M365Collector", "ALL_COLLECTORS",
+    "M365Collector", "ALL_COLLECTORS", "RawSourceCache", "raw_cache",
 ]
@@ -3,7 +3,8 @@ Base collector — defines the interface all data collectors must implement.
 
 Each collector is responsible for one data source (PMS, spa, F&B, etc.).
 For now they read from local JSON mock files; swap in real API calls later
-by overriding `fetch_raw()`.
+by overriding `fetch_raw()`. Every fetched payload is also published to the
+shared raw source cache so later stages don't load the same source again.
 """
 
 from __future__ import annotations
@@ -14,6 +15,7 @@ from pathlib import Path
 from typing import Any
 
 from config import settings
+from .cache import raw_cache
 
 
 class BaseCollector(ABC):
@@ -36,6 +38,7 @@ class BaseCollector(ABC):
             target_date: ISO date string, e.g. "2026-02-12"
         """
         raw = self.fetch_raw()
+        raw_cache.put(self.SOURCE_FILE, raw)
         return self.parse(raw, target_date)
 
     # ── Overridable hooks ────────────────────
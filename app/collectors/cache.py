@@ -0,0 +1,90 @@
+"""
+Raw source cache — shares parsed source payloads across pipeline stages.
+
+Collectors feed every `fetch_raw()` result in here, keyed by source file,
+together with the time it was fetched. Later stages (guest matching,
+profile building) read from the cache instead of re-loading and re-parsing
+the same payload per guest, so each source is fetched once per run.
+
+Cached payloads are shared objects: consumers must treat them as read-only.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+
+class RawSourceCache:
+    """Thread-safe store of raw source payloads keyed by source."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._source_locks: dict[str, threading.Lock] = {}
+
+    def put(self, source: str, raw: Any, fetched_at: float | None = None) -> None:
+        """Store a freshly fetched payload for `source`."""
+        with self._lock:
+            self._entries[source] = (fetched_at or time.time(), raw)
+
+    def get(self, source: str, max_age: float | None = None) -> Any | None:
+        """
+        Return the cached payload for `source`, or None if absent.
+
+        Args:
+            source: Source key (the collector's SOURCE_FILE).
+            max_age: Ignore entries fetched more than this many seconds ago.
+        """
+        entry = self.entry(source)
+        if entry is None:
+            return None
+        fetched_at, raw = entry
+        if max_age is not None and time.time() - fetched_at > max_age:
+            return None
+        return raw
+
+    def entry(self, source: str) -> tuple[float, Any] | None:
+        """Return `(fetched_at, payload)` for `source`, or None if absent."""
+        with self._lock:
+            return self._entries.get(source)
+
+    def get_or_fetch(
+        self,
+        source: str,
+        fetch: Callable[[], Any],
+        max_age: float | None = None,
+    ) -> Any | None:
+        """
+        Return the cached payload, fetching and storing it on a miss.
+
+        Concurrent callers for the same source wait on a single fetch.
+        A `None` result from `fetch` is returned but not cached.
+        """
+        raw = self.get(source, max_age)
+        if raw is not None:
+            return raw
+
+        with self._lock:
+            source_lock = self._source_locks.setdefault(source, threading.Lock())
+        with source_lock:
+            raw = self.get(source, max_age)
+            if raw is None:
+                raw = fetch()
+                if raw is not None:
+                    self.put(source, raw)
+        return raw
+
+    def clear(self) -> None:
+        """Drop every cached payload (call at the start of a run)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, source: str) -> bool:
+        with self._lock:
+            return source in self._entries
+
+
+# Process-wide cache shared by collectors and guest intelligence.
+raw_cache = RawSourceCache()
@@ -30,6 +30,82 @@ class Settings:
 
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama3")
+    OLLAMA_TIMEOUT: float = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+    # Keep the model loaded between calls, and match the server's OLLAMA_NUM_PARALLEL
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_NUM_PARALLEL: int = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+    # LLM_PROVIDER=router: ordered fallback chain with hedged requests.
+    # A provider slower than its LLM_HEDGE_PERCENTILE latency (or
+    # LLM_HEDGE_AFTER seconds until enough samples) is raced by the next.
+    LLM_FALLBACK_CHAIN: str = os.getenv("LLM_FALLBACK_CHAIN", "local,mistral,anthropic")
+    LLM_HEDGE_AFTER: float = float(os.getenv("LLM_HEDGE_AFTER", "20"))
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+    LLM_DEADLINE: float = float(os.getenv("LLM_DEADLINE", "180"))
+    LLM_LATENCY_PATH: Path = Path(os.getenv(
+        "LLM_LATENCY_PATH",
+        str(Path(__file__).parent / ".cache" / "llm-latency.json"),
+    ))
+
+    # Keep-alive connection pool per provider base URL
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "8"))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+    LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+
+    # Mark stable system prompts / prompt prefixes cacheable (Anthropic cache_control)
+    LLM_PROMPT_CACHE: bool = os.getenv("LLM_PROMPT_CACHE", "true").lower() in ("1", "true", "yes")
+
+    # Per-call latency / token / cost records (SQLite)
+    LLM_TELEMETRY: bool = os.getenv("LLM_TELEMETRY", "true").lower() in ("1", "true", "yes")
+    LLM_TELEMETRY_PATH: Path = Path(os.getenv(
+        "LLM_TELEMETRY_PATH",
+        str(Path(__file__).parent / ".cache" / "llm-telemetry.db"),
+    ))
+
+    # Approximate token budget for the data section of the recap prompt
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+    # Recap generator: single (one completion) | sectioned (sections in parallel)
+    # | hybrid (LLM narrative, local tables) | mapreduce (long lists digested
+    # first) | template (local rendering, no LLM)
+    RECAP_GENERATOR: str = os.getenv("RECAP_GENERATOR", "single")
+    # Deliver the template recap instead if the LLM fails or takes longer than
+    # RECAP_DEADLINE seconds (0 = no deadline); a streamed recap must start
+    # within the deadline
+    RECAP_TEMPLATE_FALLBACK: bool = os.getenv("RECAP_TEMPLATE_FALLBACK", "true").lower() in ("1", "true", "yes")
+    RECAP_DEADLINE: float = float(os.getenv("RECAP_DEADLINE", "240"))
+    RECAP_SECTION_WORKERS: int = int(os.getenv("RECAP_SECTION_WORKERS", "8"))
+    # Mapreduce mode: lists too long for the data budget are summarized chunk by
+    # chunk (llm) or ranked so the most important rows are kept (rank)
+    RECAP_MAP_STRATEGY: str = os.getenv("RECAP_MAP_STRATEGY", "llm")
+    # Model context window in tokens (0 = look up the configured model)
+    LLM_CONTEXT_WINDOW: int = int(os.getenv("LLM_CONTEXT_WINDOW", "0"))
+    # Sectioned mode: reuse sections whose data is unchanged since the last run for the date
+    RECAP_INCREMENTAL: bool = os.getenv("RECAP_INCREMENTAL", "true").lower() in ("1", "true", "yes")
+    RECAP_STATE_DIR: Path = Path(os.getenv(
+        "RECAP_STATE_DIR",
+        str(Path(__file__).parent / ".cache" / "recaps"),
+    ))
+
+    # Stream tokens to channels that support it (console) as they arrive
+    LLM_STREAM: bool = os.getenv("LLM_STREAM", "true").lower() in ("1", "true", "yes")
+
+    # Shared per-provider request budget and retry policy (429 / 5xx). The
+    # burst is never below RECAP_SECTION_WORKERS, and the default also covers
+    # the summary call, so a sectioned recap is not queued behind the limiter
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+    LLM_BURST: int = int(os.getenv("LLM_BURST", "10"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+
+    # Persistent response cache for byte-identical requests
+    LLM_CACHE: bool = os.getenv("LLM_CACHE", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH: Path = Path(os.getenv(
+        "LLM_CACHE_PATH",
+        str(Path(__file__).parent / ".cache" / "llm-responses.db"),
+    ))
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
 
     # ── Hotel ────────────────────────────────
     HOTEL_NAME: str = os.getenv("HOTEL_NAME", "Eden Rock - St Barths")
@@ -41,6 +117,27 @@ class Settings:
         str(Path(__file__).parent.parent / "mock-data"),
     ))
 
+    # ── Collection ───────────────────────────
+    # Collectors run concurrently; 1 worker restores sequential collection.
+    # The timeout applies to each collector from when it starts, queued or not.
+    COLLECTOR_WORKERS: int = int(os.getenv("COLLECTOR_WORKERS", "4"))
+    COLLECTOR_TIMEOUT: float = float(os.getenv("COLLECTOR_TIMEOUT", "30"))
+    # --mode both: run recap and guest intel concurrently (1 = one after the other)
+    MODULE_WORKERS: int = int(os.getenv("MODULE_WORKERS", "2"))
+
+    # ── Guest Intelligence ───────────────────
+    # Arrival briefs generated concurrently; 1 worker = sequential.
+    BRIEF_WORKERS: int = int(os.getenv("BRIEF_WORKERS", "4"))
+    # Guests packed into one LLM request (JSON reply keyed by guest_id); 1 = one per guest
+    BRIEF_BATCH_SIZE: int = int(os.getenv("BRIEF_BATCH_SIZE", "1"))
+
+    # Profile backend: json (one file per guest) | sqlite (indexed database)
+    PROFILE_STORE: str = os.getenv("PROFILE_STORE", "json")
+    PROFILE_DB_PATH: Path = Path(os.getenv(
+        "PROFILE_DB_PATH",
+        str(Path(__file__).parent / "profiles" / "profiles.db"),
+    ))
+
     # ── Delivery ─────────────────────────────
     DEFAULT_OUTPUT: str = os.getenv("DEFAULT_OUTPUT", "console")
 
@@ -1,6 +1,19 @@
 """Console output — prints the recap to stdout."""
 
+import sys
+from typing import Iterable
+
 
 class ConsoleDelivery:
     def deliver(self, recap: str, **kwargs) -> None:
         print(recap)
+
+    def deliver_stream(self, chunks: Iterable[str], **kwargs) -> str:
+        """Print text chunks as they arrive; returns the full text."""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+        print()
+        return "".join(parts)
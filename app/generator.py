@@ -3,15 +3,39 @@ Hotel Intel — Recap Generator.
 
 Takes processed data, builds a prompt following the recap template style,
 sends it to the configured LLM, and returns the formatted daily recap.
+
+Generator modes (RECAP_GENERATOR / --generator):
+  - single:    one prompt, one completion for the whole recap
+  - sectioned: each section generated concurrently from its slice of the
+               data, then the executive summary and action items from the
+               section texts; wall time ≈ the slowest section. Re-runs for
+               the same date regenerate only sections whose data changed
+               (RECAP_INCREMENTAL, see recap_state).
+  - hybrid:    the LLM writes only the narrative (executive summary,
+               highlights, action items) as JSON; every table and list is
+               rendered locally, so the completion is a fraction of the size
+  - mapreduce: for large properties; lists too long for the model's
+               context are first summarized chunk by chunk in parallel or
+               ranked locally (see mapreduce), then one recap is written
+               from the digests
+  - template:  no LLM; the summary rendered locally by `renderer` in
+               milliseconds (also the fallback when the LLM fails or
+               misses RECAP_DEADLINE; when streaming, the deadline is for
+               the first token)
 """
 
 from __future__ import annotations
 
 import json
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterator
 
 from config import settings
+from prompt_format import estimate_tokens, serialize_summary
+from recap_state import RecapState, fingerprint
+from renderer import PRIORITY_ICONS, format_date, render_recap
+from threads import ContextThreadPoolExecutor, start_thread
 
 
 SYSTEM_PROMPT = """\
@@ -30,34 +54,26 @@ Style guidelines:
 """
 
 
-def build_prompt(data: dict[str, Any]) -> str:
-    """Build the user prompt from processed data."""
-    currency = data.get("currency", "€")
-    date_str = data.get("date", "")
-    
-    try:
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        formatted_date = dt.strftime("%A, %d %B %Y")
-    except ValueError:
-        formatted_date = date_str
-
-    prompt = f"""Generate a daily recap briefing for **{data.get('hotel_name', 'the hotel')}** for **{formatted_date}**.
+GENERATORS = ("single", "sectioned", "hybrid", "mapreduce", "template")
 
-Use the following structured data to produce a complete Markdown briefing following our template structure.
-Include all sections: Executive Summary, Key Metrics, Arrivals & Departures (with VIP details),
-F&B Performance, Spa & Wellness, Villas, Incidents, Concierge Highlights, and Action Items.
+DATA_FORMAT_NOTE = """\
+Compact format: `key: value` lines; lists of records are tables with a `|`-separated
+header row followed by one row per record (an empty cell means the field is absent).
+Fields with no data are omitted; "… N more not shown" marks lists trimmed for length
+(the most important records are the ones kept)."""
 
-Currency: {currency}
 
-## RAW DATA
+# Stable instructions sent ahead of the day's data, so the system prompt
+# plus this block form a prefix the provider can cache across calls.
+RECAP_INSTRUCTIONS = f"""Generate a daily recap briefing from the structured data at the end of this message.
 
-```json
-{json.dumps(data, indent=2, default=str)}
-```
+Produce a complete Markdown briefing following our template structure.
+Include all sections: Executive Summary, Key Metrics, Arrivals & Departures (with VIP details),
+F&B Performance, Spa & Wellness, Villas, Incidents, Concierge Highlights, and Action Items.
 
 ## INSTRUCTIONS
 
-1. Start with the header: ☀️ {data.get('hotel_name', '')} — {formatted_date}
+1. Start with the header line given with the data
 2. Write a 2-3 sentence executive summary highlighting the most important points
 3. Present Key Metrics in a clean table (Occupancy, ADR, RevPAR, Room Revenue, Total Revenue) with vs previous day
 4. Detail arrivals/departures with VIP spotlight
@@ -70,32 +86,529 @@ Currency: {currency}
 11. Footer with generation timestamp and data sources
 
 Be specific with names, room numbers, and details from the data. Don't invent data not present.
+
+## DATA FORMAT
+
+{DATA_FORMAT_NOTE}
+
 """
-    return prompt
 
 
-def generate_recap(data: dict[str, Any], provider_override: str | None = None) -> str:
+def build_prompt_parts(data: dict[str, Any], token_budget: int | None = None) -> tuple[str, str]:
+    """
+    Build the recap prompt as (stable prefix, variable part).
+
+    The prefix holds only instructions that are identical every day; the
+    hotel, date and data follow it.
+    """
+    hotel = data.get("hotel_name", "the hotel")
+    formatted_date = format_date(data.get("date", ""))
+
+    prompt = f"""## TODAY
+
+Recap for **{hotel}** for **{formatted_date}**.
+Header: ☀️ {data.get('hotel_name', '')} — {formatted_date}
+Currency: {data.get('currency', '€')}
+
+## DATA
+
+{serialize_summary(data, token_budget)[0]}"""
+    return RECAP_INSTRUCTIONS, prompt
+
+
+def build_prompt(data: dict[str, Any], token_budget: int | None = None) -> str:
+    """Build the user prompt from processed data (compact, within the token budget)."""
+    prefix, prompt = build_prompt_parts(data, token_budget)
+    return prefix + prompt
+
+
+def describe_prompt(data: dict[str, Any], token_budget: int | None = None) -> dict:
+    """Estimated prompt size before sending: total tokens and any trimmed fields."""
+    _, report = serialize_summary(data, token_budget)
+    prompt = build_prompt(data, token_budget)
+    return {
+        "tokens": estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt),
+        "data_tokens": report["tokens"],
+        "truncated": report["truncated"],
+    }
+
+
+def generate_recap(
+    data: dict[str, Any],
+    provider_override: str | None = None,
+    generator: str | None = None,
+    deadline: float | None = None,
+) -> str:
     """
     Generate the daily recap using the configured LLM provider.
 
     Args:
         data: Processed summary dict from processor.
         provider_override: Override LLM_PROVIDER from config.
+        generator: Generator mode (default: RECAP_GENERATOR; see GENERATORS).
+        deadline: Raise TimeoutError if the LLM has not answered within
+            this many seconds (None or 0: wait indefinitely).
 
     Returns:
         Formatted Markdown recap string.
     """
+    generator = (generator or settings.RECAP_GENERATOR).lower()
+    if generator not in GENERATORS:
+        raise ValueError(f"Unknown recap generator '{generator}'. Available: {', '.join(GENERATORS)}")
+    if generator == "template":
+        return render_recap(data) + _footer(data)
+    if generator == "sectioned":
+        return _with_deadline(lambda: generate_recap_sectioned(data, provider_override), deadline)
+    if generator == "hybrid":
+        return _with_deadline(lambda: generate_recap_hybrid(data, provider_override), deadline)
+    if generator == "mapreduce":
+        return _with_deadline(lambda: generate_recap_mapreduce(data, provider_override), deadline)
+    return _with_deadline(lambda: _generate_single(data, provider_override), deadline)
+
+
+def _generate_single(data: dict[str, Any], provider_override: str | None = None) -> str:
     from llm import get_provider
 
     provider_name = provider_override or settings.LLM_PROVIDER
     llm = get_provider(provider_name)
 
-    prompt = build_prompt(data)
-    recap = llm.generate(prompt=prompt, system_prompt=SYSTEM_PROMPT)
+    prefix, prompt = build_prompt_parts(data)
+    recap = llm.generate(prompt=prompt, system_prompt=SYSTEM_PROMPT, prefix=prefix)
+
+    return recap + _footer(data)
+
+
+def _with_deadline(fn, deadline: float | None) -> str:
+    """
+    Run `fn` and return its result, or raise TimeoutError after `deadline` seconds.
+
+    The call runs in a daemon thread, so a request still in flight at the
+    deadline does not hold up delivery of a fallback or process exit.
+    """
+    if not deadline:
+        return fn()
+
+    future: Future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+    start_thread(run, name="recap-llm")
+    try:
+        return future.result(timeout=deadline)
+    except Exception:
+        if future.done():
+            raise
+        raise TimeoutError(f"No recap from the LLM within {deadline:g}s") from None
+
+
+def generate_recap_stream(
+    data: dict[str, Any],
+    provider_override: str | None = None,
+    deadline: float | None = None,
+) -> Iterator[str]:
+    """
+    Stream the daily recap as the LLM produces it.
+
+    Yields the same text as `generate_recap()`, in chunks: the model's
+    tokens as they arrive, then the generation footer. With `deadline`,
+    raises TimeoutError if the first token takes longer than that many
+    seconds; once tokens flow the stream is not cut off, since part of the
+    recap has already been delivered.
+    """
+    from llm import get_provider
+
+    provider_name = provider_override or settings.LLM_PROVIDER
+    llm = get_provider(provider_name)
+
+    prefix, prompt = build_prompt_parts(data)
+    chunks = iter(llm.generate_stream(prompt=prompt, system_prompt=SYSTEM_PROMPT, prefix=prefix))
+    if deadline:
+        first = _with_deadline(lambda: next(chunks, None), deadline)
+        if first is not None:
+            yield first
+    yield from chunks
+    yield _footer(data)
+
+
+# ── Sectioned generation ─────────────────────
+
+# (key, heading, summary key prefixes/names, instructions) in template order.
+# Every slice also gets hotel_name, currency and date.
+RECAP_SECTIONS: list[tuple[str, str, tuple[str, ...], str]] = [
+    ("metrics", "## 📊 Key Metrics",
+     ("occupancy", "adr", "revpar", "room_revenue", "total_", "rooms_sold", "revenue_breakdown", "in_house_by_type"),
+     "A clean table (Occupancy, ADR, RevPAR, Room Revenue, Total Revenue) with vs previous day "
+     "(↑/↓), then any anomalies on one line."),
+    ("arrivals", "## 🛎️ Arrivals & Departures",
+     ("arrivals", "departures", "vip_arrivals"),
+     "Arrival and departure counts, then a VIP spotlight (name, VIP level, room, preferences) "
+     "and notable departures."),
+    ("fb", "## 🍽️ Food & Beverage",
+     ("fb_",),
+     "A table of outlet performance (covers, revenue, average check) with a total row, "
+     "then today's lookahead."),
+    ("spa", "## 💆 Spa & Wellness",
+     ("spa_",),
+     "A metrics table (bookings, revenue, utilization, retail) and a capacity note."),
+    ("villas", "## 🏠 Villas",
+     ("villa",),
+     "Occupancy status, check-ins/check-outs, villa revenue, and one line per villa."),
+    ("incidents", "## 🚨 Incidents & Follow-ups",
+     ("incidents_",),
+     "Open/new/resolved counts, then each incident with a status icon "
+     "(🔴 open, 🟡 in progress, 🟢 resolved), department and required action."),
+    ("concierge", "## 🎩 Concierge Highlights",
+     ("concierge_",),
+     "Request count by category, pending requests, and notable arrangements with guest names."),
+]
+
+SUMMARY_HEADING = "## 🔑 Executive Summary"
+ACTIONS_HEADING = "## ✅ Action Items"
+_COMMON_KEYS = ("hotel_name", "currency", "date")
+
+
+def section_slice(data: dict[str, Any], prefixes: tuple[str, ...]) -> dict[str, Any]:
+    """The summary fields one section is written from."""
+    return {
+        key: value for key, value in data.items()
+        if key in _COMMON_KEYS or any(key == p or key.startswith(p) for p in prefixes)
+    }
+
+
+def build_section_prompt(data: dict[str, Any], heading: str, instructions: str,
+                         token_budget: int | None = None) -> tuple[str, str]:
+    """
+    Prompt for one recap section, given only that section's slice of the data.
+
+    Returns (stable prefix, variable part), like `build_prompt_parts()`.
+    """
+    prefix = f"""Write only the "{heading}" section of a daily recap from the data at the end of this message.
+
+## INSTRUCTIONS
+
+Start with the heading line `{heading}` and write nothing after this section.
+{instructions}
+
+Be specific with names, room numbers, and details from the data. Don't invent data not present.
+
+## DATA FORMAT
+
+{DATA_FORMAT_NOTE}
+
+"""
+    prompt = f"""## TODAY
+
+Recap for **{data.get('hotel_name', 'the hotel')}** for **{format_date(data.get('date', ''))}**. \
+Currency: {data.get('currency', '€')}
+
+## DATA
+
+{serialize_summary(data, token_budget)[0]}"""
+    return prefix, prompt
+
+
+def unsectioned_fields(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Summary fields no recap section is written from (e.g. emails_*, onedrive_*).
+
+    They reach the executive summary and action items directly, so the
+    sectioned recap sees the same data as the single prompt.
+    """
+    return {
+        key: value for key, value in data.items()
+        if key not in _COMMON_KEYS and key != "data_sources"
+        and not any(key == p or key.startswith(p) for _, _, prefixes, _ in RECAP_SECTIONS for p in prefixes)
+    }
+
+
+def build_synthesis_prompt(data: dict[str, Any], sections: list[str], part: str) -> tuple[str, str]:
+    """
+    Prompt (prefix, variable part) for the executive summary or the action
+    items, from the section texts plus the fields no section covers.
+    """
+    if part == "summary":
+        heading = SUMMARY_HEADING
+        instructions = ("Write a 2-3 sentence executive summary highlighting the most important points "
+                        "across all sections.")
+    else:
+        heading = ACTIONS_HEADING
+        instructions = ("List prioritized action items (🔴 urgent, 🟡 important, 🔵 standard), each with "
+                        "an owner/department and a one-line detail, drawn from the sections.")
+    prefix = f"""Write only the "{heading}" section of a daily recap, from the other sections at the end of this message.
+
+## INSTRUCTIONS
+
+Start with the heading line `{heading}`.
+{instructions}
+Use only facts stated in the sections and the other data.
+
+{DATA_FORMAT_NOTE}
+
+"""
+    body = "\n\n".join(sections)
+    prompt = f"""## SECTIONS — {data.get('hotel_name', 'the hotel')}, {format_date(data.get('date', ''))}
 
-    # Append generation footer
+{body}
+"""
+    other = unsectioned_fields(data)
+    if other:
+        prompt += f"""
+## OTHER DATA
+
+{serialize_summary(other)[0]}
+"""
+    return prefix, prompt
+
+
+def describe_changes(data: dict[str, Any]) -> dict[str, list[str] | None]:
+    """
+    Per section, the summary fields that changed since the last recap for this date.
+
+    None means the section has not been generated for this date yet; an
+    empty list means its data is unchanged and its stored text is reused.
+    """
+    state = RecapState.load(data.get("date", ""))
+    return {
+        key: state.changed_fields(key, section_slice(data, prefixes))
+        for key, _, prefixes, _ in RECAP_SECTIONS
+    }
+
+
+def generate_recap_sectioned(
+    data: dict[str, Any],
+    provider_override: str | None = None,
+    max_workers: int | None = None,
+    incremental: bool | None = None,
+) -> str:
+    """
+    Generate the recap section by section.
+
+    The data sections (RECAP_SECTIONS) are generated concurrently, each
+    from only its slice of the summary; the executive summary and action
+    items are then generated together from the finished sections. All
+    calls share the provider's rate limiter and retry policy. A section
+    that still fails is replaced by a short note instead of failing the
+    whole recap (unless every section fails).
+
+    When incremental, each section's request and text are stored per date
+    and a section whose request is unchanged since the last run reuses its
+    stored text instead of calling the LLM.
+
+    Args:
+        data: Processed summary dict from processor.
+        provider_override: Override LLM_PROVIDER from config.
+        max_workers: Concurrent section calls (default: RECAP_SECTION_WORKERS).
+        incremental: Reuse unchanged sections (default: RECAP_INCREMENTAL).
+    """
+    from llm import call_llm, get_provider
+
+    provider_name = provider_override or settings.LLM_PROVIDER
+    llm = get_provider(provider_name)
+
+    if incremental is None:
+        incremental = settings.RECAP_INCREMENTAL
+    state = RecapState.load(data.get("date", "")) if incremental else None
+    errors: list[str] = []
+
+    def run(key: str, heading: str, parts: tuple[str, str], fields: dict[str, Any] | None = None) -> str:
+        prefix, prompt = parts
+        stamp = fingerprint(llm.name, llm.model, SYSTEM_PROMPT, prefix + prompt)
+        if state is not None:
+            stored = state.text(key, stamp)
+            if stored is not None:
+                return stored
+        try:
+            text = call_llm(
+                llm, lambda: llm.generate(prompt=prompt, system_prompt=SYSTEM_PROMPT, prefix=prefix),
+            ).strip()
+        except Exception as e:
+            errors.append(f"{heading.lstrip('# ')}: {e}")
+            return f"{heading}\n\n*[Section generation failed: {e}]*"
+        if not text.startswith(heading):
+            text = f"{heading}\n\n{text}"
+        if state is not None:
+            state.put(key, stamp, text, fields)
+        return text
+
+    jobs = []
+    for key, heading, prefixes, instructions in RECAP_SECTIONS:
+        fields = section_slice(data, prefixes)
+        jobs.append((key, heading, build_section_prompt(fields, heading, instructions), fields))
+    workers = max(1, min(max_workers or settings.RECAP_SECTION_WORKERS, len(jobs)))
+    with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="recap-section") as pool:
+        sections = list(pool.map(lambda job: run(*job), jobs))
+        if len(errors) == len(jobs):
+            raise RuntimeError("All recap sections failed: " + "; ".join(errors))
+        summary, actions = pool.map(
+            lambda job: run(*job),
+            [
+                ("summary", SUMMARY_HEADING, build_synthesis_prompt(data, sections, "summary")),
+                ("actions", ACTIONS_HEADING, build_synthesis_prompt(data, sections, "actions")),
+            ],
+        )
+
+    if state is not None:
+        try:
+            state.save()
+        except OSError:
+            pass
+
+    header = f"# ☀️ {data.get('hotel_name', '')} — {format_date(data.get('date', ''))}"
+    return "\n\n".join([header, summary, *sections, actions]) + _footer(data)
+
+
+# ── Hybrid generation ────────────────────────
+
+HYBRID_SYSTEM_PROMPT = """\
+You are Hotel Intel, an AI assistant for luxury hotel general managers.
+You write the narrative parts of a daily recap briefing; the tables are
+rendered separately from the same data.
+
+Style guidelines:
+- Professional yet warm tone, befitting a luxury property
+- Numbers should be formatted clearly (€1,234 not €1234)
+- Highlight anomalies and actionable items
+- Reply with JSON only
+"""
+
+HYBRID_INSTRUCTIONS = f"""Write the narrative for a daily recap briefing from the structured data at the end of this message.
+The metrics, arrivals, F&B, spa, villa, incident and concierge tables are rendered from the
+same data, so do not repeat them as tables; refer to what matters.
+
+## OUTPUT FORMAT
+
+Reply with ONLY a JSON object (no prose, no code fences):
+{{
+  "executive_summary": "2-3 sentences on the most important points",
+  "highlights": ["up to 5 one-line observations worth the GM's attention"],
+  "action_items": [
+    {{"priority": "urgent | important | standard", "title": "...", "owner": "department or person", "detail": "one line"}}
+  ]
+}}
+Order action_items by priority. Be specific with names and room numbers; don't invent data not present.
+
+## DATA FORMAT
+
+{DATA_FORMAT_NOTE}
+
+"""
+
+
+def build_hybrid_prompt(data: dict[str, Any], token_budget: int | None = None) -> tuple[str, str]:
+    """Prompt (stable prefix, variable part) asking for the narrative fields only."""
+    prompt = f"""## TODAY
+
+Recap for **{data.get('hotel_name', 'the hotel')}** for **{format_date(data.get('date', ''))}**.
+Currency: {data.get('currency', '€')}
+
+## DATA
+
+{serialize_summary(data, token_budget)[0]}"""
+    return HYBRID_INSTRUCTIONS, prompt
+
+
+def parse_hybrid_reply(text: str) -> dict[str, Any]:
+    """
+    Extract the narrative fields from a hybrid reply.
+
+    Tolerates code fences and surrounding prose; drops malformed action
+    items. Raises ValueError when no usable narrative is found.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        data = json.loads(text[start:end + 1]) if start != -1 and end > start else None
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or not isinstance(data.get("executive_summary"), str):
+        raise ValueError("LLM reply has no JSON executive_summary")
+
+    highlights = [h for h in data.get("highlights") or [] if isinstance(h, str) and h.strip()]
+    items = []
+    for item in data.get("action_items") or []:
+        if not isinstance(item, dict) or not str(item.get("title", "")).strip():
+            continue
+        priority = str(item.get("priority", "")).lower().strip()
+        items.append({
+            "priority": priority if priority in PRIORITY_ICONS else "standard",
+            "title": str(item["title"]).strip(),
+            "owner": str(item.get("owner") or "GM").strip(),
+            "detail": str(item.get("detail") or "").strip(),
+        })
+    order = list(PRIORITY_ICONS)
+    return {
+        "executive_summary": data["executive_summary"].strip(),
+        "highlights": highlights,
+        "action_items": sorted(items, key=lambda item: order.index(item["priority"])),
+    }
+
+
+def generate_recap_hybrid(data: dict[str, Any], provider_override: str | None = None) -> str:
+    """
+    Generate the recap with an LLM-written narrative around locally rendered tables.
+
+    Raises ValueError if the reply carries no usable narrative. An empty
+    action_items list falls back to the rule-based items.
+    """
+    from llm import get_provider
+
+    provider_name = provider_override or settings.LLM_PROVIDER
+    llm = get_provider(provider_name)
+
+    prefix, prompt = build_hybrid_prompt(data)
+    reply = llm.generate(prompt=prompt, system_prompt=HYBRID_SYSTEM_PROMPT, prefix=prefix)
+    narrative = parse_hybrid_reply(reply)
+    if not narrative["action_items"]:
+        narrative["action_items"] = None
+    return render_recap(data, narrative) + _footer(data)
+
+
+def describe_reduction(data: dict[str, Any], provider_override: str | None = None) -> dict:
+    """Map-reduce plan before sending: model context window, data budget and the lists to reduce."""
+    from llm import get_provider
+    from mapreduce import context_window, data_budget, oversized_lists
+
+    llm = get_provider(provider_override or settings.LLM_PROVIDER)
+    budget = data_budget(llm)
+    return {
+        "strategy": settings.RECAP_MAP_STRATEGY,
+        "context_window": context_window(llm),
+        "budget": budget,
+        "lists": oversized_lists(data, budget),
+    }
+
+
+def generate_recap_mapreduce(
+    data: dict[str, Any],
+    provider_override: str | None = None,
+    strategy: str | None = None,
+) -> str:
+    """
+    Generate the recap from a summary whose oversized lists were reduced first.
+
+    Lists that do not fit the data budget (sized to the model's context
+    window) are replaced by LLM digests or ranked so the most important
+    rows survive trimming (strategy: RECAP_MAP_STRATEGY); the final recap
+    is one completion over the reduced summary.
+    """
+    from llm import get_provider
+    from mapreduce import data_budget, reduce_data
+
+    provider_name = provider_override or settings.LLM_PROVIDER
+    llm = get_provider(provider_name)
+
+    reduced, _ = reduce_data(data, llm, strategy)
+    prefix, prompt = build_prompt_parts(reduced, data_budget(llm))
+    recap = llm.generate(prompt=prompt, system_prompt=SYSTEM_PROMPT, prefix=prefix)
+    return recap + _footer(data)
+
+
+def _footer(data: dict[str, Any]) -> str:
+    """Generation footer appended to every recap."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     sources = ", ".join(data.get("data_sources", []))
-    footer = f"\n\n---\n*Generated by Hotel Intel · {timestamp} · Data sources: {sources}*"
-
-    return recap + footer
+    return f"\n\n---\n*Generated by Hotel Intel · {timestamp} · Data sources: {sources}*"
@@ -2,12 +2,19 @@
 
 from .matcher import GuestMatcher
 from .profile_builder import ProfileBuilder
-from .profile_store import ProfileStore
+from .profile_store import ProfileStore, SQLiteProfileStore, get_profile_store
 from .alerts import ArrivalBriefGenerator
+from .resolver import GuestRecord, IdentityResolver
+from .identity_graph import IdentityGraph
 
 __all__ = [
     "GuestMatcher",
     "ProfileBuilder",
     "ProfileStore",
+    "SQLiteProfileStore",
+    "get_profile_store",
     "ArrivalBriefGenerator",
+    "GuestRecord",
+    "IdentityResolver",
+    "IdentityGraph",
 ]
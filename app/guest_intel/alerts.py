@@ -12,6 +12,7 @@ from datetime import datetime
 from typing import Any
 
 from config import settings
+from threads import ContextThreadPoolExecutor
 
 
 GUEST_BRIEF_SYSTEM_PROMPT = """\
@@ -32,8 +33,27 @@ Style guidelines:
 """
 
 
-def build_guest_brief_prompt(profile: dict) -> str:
-    """Build an LLM prompt to generate a guest arrival brief."""
+BRIEF_INSTRUCTIONS = """\
+Write a brief (3-5 sentences) that a front desk manager, concierge chief, or F&B manager
+would find immediately useful. Start with an emoji indicator:
+- 🆕 for first-time guests
+- ⭐ for returning guests
+- 👑 for VIP guests
+
+Include:
+1. Guest status (new/returning, VIP level, nationality)
+2. Key preferences and dietary needs (if any)
+3. Current bookings for this stay (spa, dining, concierge)
+4. Past issues to be aware of (if returning)
+5. Any special occasions or notable arrangements
+
+Be specific — use names, room numbers, treatment names, restaurant names from the data.
+Do NOT invent information not present in the profile.
+"""
+
+
+def _guest_context(profile: dict) -> str:
+    """Key facts about the guest's current stay, as prompt bullet points."""
     visits = profile.get("visits", [])
     total_visits = profile.get("total_visits", len(visits))
     is_returning = total_visits > 1
@@ -41,43 +61,111 @@ def build_guest_brief_prompt(profile: dict) -> str:
     # Determine current visit
     current_visit = visits[-1] if visits else {}
 
-    prompt = f"""Generate a concise arrival brief for hotel staff about this guest.
+    return f"""- Guest: {profile.get('names', ['Unknown'])[0]}
+- {"Returning guest" if is_returning else "First-time guest"} ({total_visits} total visit{"s" if total_visits != 1 else ""})
+- Room: {current_visit.get('room', 'TBD')} ({current_visit.get('room_type', '')})
+- Stay: {current_visit.get('nights', '?')} nights
+- Nationality: {profile.get('nationality', 'Unknown')}
+- VIP Level: {profile.get('vip_level', 'None')}
+- Currency: {settings.CURRENCY}"""
+
+
+# Stable instruction blocks sent ahead of the guest data, so the system
+# prompt plus instructions form a prefix the provider can cache across
+# every brief of the run.
+BRIEF_PREFIX = f"""Generate a concise arrival brief for hotel staff about the guest at the end of this message.
+
+## INSTRUCTIONS
+
+{BRIEF_INSTRUCTIONS}
+"""
+
+BATCH_BRIEF_PREFIX = f"""Generate a concise arrival brief for hotel staff about each guest at the end of this message.
+
+## INSTRUCTIONS
+
+For each guest separately:
+{BRIEF_INSTRUCTIONS}
+## OUTPUT FORMAT
+
+Reply with ONLY a JSON object (no prose, no code fences) mapping each guest_id to
+its brief as a string, with exactly the guest_ids listed with the guests.
+Use only the matching guest's data in each brief.
+
+"""
+
+
+def build_guest_brief_prompt(profile: dict) -> tuple[str, str]:
+    """
+    Build an LLM prompt to generate a guest arrival brief.
+
+    Returns (stable prefix, guest-specific part); the prefix is the same
+    for every guest.
+    """
+    prompt = f"""## CONTEXT
+
+{_guest_context(profile)}
 
 ## GUEST PROFILE
 
 ```json
 {json.dumps(profile, indent=2, default=str)}
 ```
+"""
+    return BRIEF_PREFIX, prompt
 
-## CONTEXT
 
-- Guest: {profile.get('names', ['Unknown'])[0]}
-- {"Returning guest" if is_returning else "First-time guest"} ({total_visits} total visit{"s" if total_visits != 1 else ""})
-- Room: {current_visit.get('room', 'TBD')} ({current_visit.get('room_type', '')})
-- Stay: {current_visit.get('nights', '?')} nights
-- Nationality: {profile.get('nationality', 'Unknown')}
-- VIP Level: {profile.get('vip_level', 'None')}
-- Currency: {settings.CURRENCY}
+def build_batch_brief_prompt(profiles: list[dict]) -> tuple[str, str]:
+    """
+    Build one LLM prompt asking for briefs for several guests at once.
 
-## INSTRUCTIONS
+    The instructions are sent once, as the stable prefix; the reply must
+    be a JSON object mapping each guest_id to its brief (see
+    `parse_batch_reply`).
+    """
+    guests = []
+    for profile in profiles:
+        guests.append(f"""### GUEST {profile.get('guest_id')}
 
-Write a brief (3-5 sentences) that a front desk manager, concierge chief, or F&B manager
-would find immediately useful. Start with an emoji indicator:
-- 🆕 for first-time guests
-- ⭐ for returning guests
-- 👑 for VIP guests
+{_guest_context(profile)}
 
-Include:
-1. Guest status (new/returning, VIP level, nationality)
-2. Key preferences and dietary needs (if any)
-3. Current bookings for this stay (spa, dining, concierge)
-4. Past issues to be aware of (if returning)
-5. Any special occasions or notable arrangements
+```json
+{json.dumps(profile, ensure_ascii=False, separators=(",", ":"), default=str)}
+```""")
+    guest_blocks = "\n\n".join(guests)
+    ids = ", ".join(f'"{p.get("guest_id")}"' for p in profiles)
 
-Be specific — use names, room numbers, treatment names, restaurant names from the data.
-Do NOT invent information not present in the profile.
+    prompt = f"""## GUESTS ({len(profiles)})
+
+guest_ids: {ids}
+
+{guest_blocks}
 """
-    return prompt
+    return BATCH_BRIEF_PREFIX, prompt
+
+
+def parse_batch_reply(text: str, guest_ids: list[str]) -> dict[str, str]:
+    """
+    Extract `{guest_id: brief}` from a batch reply.
+
+    Tolerates code fences and surrounding prose; ignores unknown keys and
+    empty or non-string briefs, so those guests count as missing.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    wanted = set(guest_ids)
+    return {
+        gid: brief.strip()
+        for gid, brief in data.items()
+        if gid in wanted and isinstance(brief, str) and brief.strip()
+    }
 
 
 class ArrivalBriefGenerator:
@@ -87,49 +175,103 @@ class ArrivalBriefGenerator:
         self,
         profiles: list[dict],
         provider_override: str | None = None,
+        max_workers: int | None = None,
+        batch_size: int | None = None,
     ) -> list[dict]:
         """
         Generate arrival briefs for a list of guest profiles.
 
+        Briefs are generated concurrently. All workers share the provider's
+        rate limiter, and 429 / 5xx failures are retried with jittered
+        backoff (the router limits and falls back on its own; see
+        `call_llm`); a brief that still fails gets a placeholder instead
+        of failing the batch.
+
+        With batch_size > 1, up to that many guests share one request
+        (see `build_batch_brief_prompt`); guests missing from a batch
+        reply are retried individually.
+
         Args:
             profiles: List of guest profile dicts.
             provider_override: Override LLM provider.
+            max_workers: Concurrent LLM calls (default: BRIEF_WORKERS; 1 = sequential).
+            batch_size: Guests per request (default: BRIEF_BATCH_SIZE; 1 = one per guest).
 
         Returns:
-            List of dicts with guest_id, name, and brief text.
+            List of dicts with guest_id, name, and brief text, in input order.
         """
         from llm import get_provider
 
         provider_name = provider_override or settings.LLM_PROVIDER
         llm = get_provider(provider_name)
 
+        size = max(1, batch_size or settings.BRIEF_BATCH_SIZE)
+        if size == 1:
+            jobs = [[profile] for profile in profiles]
+            run = lambda batch: [self._generate_one(llm, batch[0])]
+        else:
+            jobs = [profiles[i:i + size] for i in range(0, len(profiles), size)]
+            run = lambda batch: self._generate_batch(llm, batch)
+
+        workers = max(1, min(max_workers or settings.BRIEF_WORKERS, len(jobs) or 1))
+        if workers == 1:
+            results = [run(batch) for batch in jobs]
+        else:
+            with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="brief") as pool:
+                # map() yields results in input order
+                results = list(pool.map(run, jobs))
+        return [brief for batch in results for brief in batch]
+
+    def _generate_batch(self, llm, profiles: list[dict]) -> list[dict]:
+        """Generate briefs for several guests in one request; retry missing guests singly."""
+        from llm import call_llm
+
+        if len(profiles) == 1:
+            return [self._generate_one(llm, profiles[0])]
+
+        guest_ids = [p.get("guest_id") for p in profiles]
+        try:
+            prefix, prompt = build_batch_brief_prompt(profiles)
+            reply = call_llm(
+                llm, lambda: llm.generate(prompt=prompt, system_prompt=GUEST_BRIEF_SYSTEM_PROMPT, prefix=prefix),
+            )
+            parsed = parse_batch_reply(reply, guest_ids)
+        except Exception:
+            parsed = {}
+
         briefs = []
         for profile in profiles:
-            guest_name = profile.get("names", ["Unknown"])[0]
-            try:
-                prompt = build_guest_brief_prompt(profile)
-                brief_text = llm.generate(
-                    prompt=prompt,
-                    system_prompt=GUEST_BRIEF_SYSTEM_PROMPT,
-                )
-                briefs.append({
-                    "guest_id": profile.get("guest_id"),
-                    "name": guest_name,
-                    "room": profile["visits"][-1].get("room") if profile.get("visits") else None,
-                    "brief": brief_text.strip(),
-                    "flags": self._extract_flags(profile),
-                })
-            except Exception as e:
-                briefs.append({
-                    "guest_id": profile.get("guest_id"),
-                    "name": guest_name,
-                    "room": profile["visits"][-1].get("room") if profile.get("visits") else None,
-                    "brief": f"[Brief generation failed: {e}]",
-                    "flags": self._extract_flags(profile),
-                })
-
+            text = parsed.get(profile.get("guest_id"))
+            if text is None:
+                briefs.append(self._generate_one(llm, profile))
+            else:
+                briefs.append(self._brief(profile, text))
         return briefs
 
+    def _generate_one(self, llm, profile: dict) -> dict:
+        """Generate one brief, falling back to a placeholder on failure."""
+        from llm import call_llm
+
+        try:
+            prefix, prompt = build_guest_brief_prompt(profile)
+            brief_text = call_llm(
+                llm, lambda: llm.generate(prompt=prompt, system_prompt=GUEST_BRIEF_SYSTEM_PROMPT, prefix=prefix),
+            ).strip()
+        except Exception as e:
+            brief_text = f"[Brief generation failed: {e}]"
+
+        return self._brief(profile, brief_text)
+
+    def _brief(self, profile: dict, brief_text: str) -> dict:
+        """Brief record for a profile."""
+        return {
+            "guest_id": profile.get("guest_id"),
+            "name": profile.get("names", ["Unknown"])[0],
+            "room": profile["visits"][-1].get("room") if profile.get("visits") else None,
+            "brief": brief_text,
+            "flags": self._extract_flags(profile),
+        }
+
     def generate_briefs_dry_run(self, profiles: list[dict]) -> list[dict]:
         """
         Generate structured briefs without LLM (for dry-run mode).
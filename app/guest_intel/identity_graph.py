@@ -0,0 +1,243 @@
+"""
+Guest Intelligence — Identity Graph.
+
+Persistent graph of guest identities. Nodes are source records (an OPERA
+reservation, a spa booking, a concierge request), edges are the match
+evidence that linked them, and each connected component is one guest.
+
+Components are maintained with union-find, so a run only links its new
+records into the existing clusters and an arrival's guest_id is found in
+O(α(n)) rather than by re-scanning every system; the matcher serves a
+known arrival's OPERA, spa and concierge records straight from its cluster.
+
+When two clusters merge, the smaller one's guest_id becomes an alias of
+the surviving one and is queued in `pending_merges` until ProfileBuilder
+has folded its profile into the survivor's.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from .resolver import GuestRecord, IdentityResolver, blocking_keys, compare
+
+
+GRAPH_VERSION = 2     # 2: OPERA arrival and departure records keyed separately
+
+
+def record_key(source: str, record_id: str) -> str:
+    """Graph node key for a source record (e.g. "opera:ER260213-001")."""
+    return f"{source}:{record_id}"
+
+
+class IdentityGraph:
+    """Union-find identity clusters over source records, persisted as JSON."""
+
+    def __init__(self, path: Path | None = None, resolver: IdentityResolver | None = None):
+        if path is None:
+            path = Path(__file__).parent.parent / "profiles" / "identity-graph.json"
+        self.path = path
+        self.resolver = resolver or IdentityResolver()
+
+        self.nodes: dict[str, dict] = {}
+        self.parent: dict[str, str] = {}
+        self.size: dict[str, int] = {}
+        self.guest_ids: dict[str, str] = {}     # root -> guest_id
+        self.aliases: dict[str, str] = {}       # merged guest_id -> surviving guest_id
+        self.pending_merges: list[str] = []     # merged guest_ids whose profiles are not folded yet
+        self.edges: list[list] = []             # [key_a, key_b, score, evidence]
+        self._blocks: dict[str, list[str]] | None = None
+        self._members: dict[str, list[str]] | None = None
+
+    # ── Persistence ──────────────────────────
+
+    @classmethod
+    def load(cls, path: Path | None = None, resolver: IdentityResolver | None = None) -> "IdentityGraph":
+        """Load the graph from disk, or return an empty one if none exists."""
+        graph = cls(path, resolver)
+        if not graph.path.exists():
+            return graph
+        with open(graph.path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("version") != GRAPH_VERSION:
+            return graph
+        graph.nodes = data.get("nodes", {})
+        graph.parent = data.get("parent", {})
+        graph.guest_ids = data.get("guest_ids", {})
+        graph.aliases = data.get("aliases", {})
+        graph.pending_merges = data.get("pending_merges", [])
+        graph.edges = data.get("edges", [])
+        for key in graph.parent:
+            root = graph.find(key)
+            graph.size[root] = graph.size.get(root, 0) + 1
+        return graph
+
+    def save(self) -> None:
+        """Write the graph to disk (atomically, via a temp file)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({
+                "version": GRAPH_VERSION,
+                "nodes": self.nodes,
+                "parent": self.parent,
+                "guest_ids": self.guest_ids,
+                "aliases": self.aliases,
+                "pending_merges": self.pending_merges,
+                "edges": self.edges,
+            }, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    # ── Union-find ───────────────────────────
+
+    def find(self, key: str) -> str:
+        """Root of `key`'s cluster (with path halving)."""
+        parent = self.parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def _union(self, a: str, b: str) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size.pop(rb)
+
+        # The larger cluster keeps its guest_id; the other becomes an alias.
+        # A record being linked for the first time has no guest_id yet.
+        kept, merged = self.guest_ids.get(ra), self.guest_ids.pop(rb, None)
+        if kept is None:
+            if merged is not None:
+                self.guest_ids[ra] = merged
+        elif merged is not None and merged != kept:
+            self.aliases[merged] = kept
+            self.pending_merges.append(merged)
+
+    # ── Linking ──────────────────────────────
+
+    def add_records(self, records: list[GuestRecord], guest_id_for=None) -> int:
+        """
+        Link records not yet in the graph into the existing clusters.
+
+        Each new record is compared only with graph nodes sharing one of
+        its blocking keys. Records already present are skipped, so re-runs
+        cost O(new records).
+
+        Args:
+            records: Source records (e.g. from `records_from_sources`).
+            guest_id_for: Callable(name) -> guest_id for new clusters.
+
+        Returns:
+            Number of records added.
+        """
+        if guest_id_for is None:
+            from .profile_builder import _generate_guest_id
+            guest_id_for = lambda name: _generate_guest_id(name, "")
+
+        blocks = self._block_index()
+        self._members = None
+        added = 0
+        for record in records:
+            key = record_key(record.source, record.record_id)
+            if key in self.nodes:
+                continue
+
+            self.nodes[key] = {
+                "source": record.source,
+                "record_id": record.record_id,
+                "name": record.name,
+                "email": record.email,
+                "phone": record.phone,
+                "room": record.room,
+                "date": record.date,
+            }
+            self.parent[key] = key
+            self.size[key] = 1
+
+            keys = blocking_keys(record)
+            candidates = set()
+            for block in keys:
+                # Oversized blocks: only the most recent members
+                candidates.update(blocks.get(block, [])[-self.resolver.max_block_size:])
+            for other in sorted(candidates):
+                result = compare(record, self._record(other))
+                if result.score >= self.resolver.threshold:
+                    self.edges.append([key, other, result.score, result.evidence])
+                    self._union(key, other)
+
+            if self.find(key) == key and key not in self.guest_ids:
+                # Linked to nothing: a new guest
+                self.guest_ids[key] = guest_id_for(record.name)
+
+            for block in keys:
+                blocks.setdefault(block, []).append(key)
+            added += 1
+        return added
+
+    def _block_index(self) -> dict[str, list[str]]:
+        """Blocking keys of existing nodes (rebuilt once per load, not persisted)."""
+        if self._blocks is None:
+            self._blocks = {}
+            for key in self.nodes:
+                for block in blocking_keys(self._record(key)):
+                    self._blocks.setdefault(block, []).append(key)
+        return self._blocks
+
+    def _record(self, key: str) -> GuestRecord:
+        node = self.nodes[key]
+        return GuestRecord(
+            record_id=node["record_id"],
+            source=node["source"],
+            name=node["name"],
+            email=node.get("email"),
+            phone=node.get("phone"),
+            room=node.get("room"),
+            date=node.get("date"),
+        )
+
+    # ── Lookup ───────────────────────────────
+
+    def guest_id(self, key: str) -> str | None:
+        """guest_id of the cluster containing `key`, or None if unknown."""
+        if key not in self.parent:
+            return None
+        return self.guest_ids[self.find(key)]
+
+    def resolve_guest_id(self, guest_id: str) -> str:
+        """Follow merge aliases to the surviving guest_id."""
+        seen = set()
+        while guest_id in self.aliases and guest_id not in seen:
+            seen.add(guest_id)
+            guest_id = self.aliases[guest_id]
+        return guest_id
+
+    def cluster(self, key: str) -> list[dict]:
+        """All nodes in the same cluster as `key`."""
+        if key not in self.parent:
+            return []
+        if self._members is None:
+            # Built once after linking, then every lookup is O(cluster size)
+            self._members = {}
+            for k in self.parent:
+                self._members.setdefault(self.find(k), []).append(k)
+        return [self.nodes[k] for k in self._members[self.find(key)]]
+
+    def take_pending_merges(self) -> list[tuple[str, str]]:
+        """
+        (merged guest_id, surviving guest_id) pairs not yet folded, clearing the queue.
+
+        Save the graph once the profiles are folded, so an interrupted run
+        offers them again.
+        """
+        pending = [(merged, self.resolve_guest_id(merged)) for merged in dict.fromkeys(self.pending_merges)]
+        self.pending_merges = []
+        return pending
+
+    def __len__(self) -> int:
+        return len(self.nodes)
@@ -8,13 +8,28 @@ Matches guest identities across all hotel systems using:
 - Email/phone deduplication
 
 Each match returns a dict of all records found for that guest across systems.
+Raw source payloads come from the shared raw source cache, so each source
+is loaded once per run no matter how many guests arrive.
+
+With an identity graph, an arrival already linked into a cluster is served
+from it: its OPERA history, spa bookings and concierge requests are the
+cluster's records, looked up by ID instead of matched again, plus the
+placeholder-name spa and concierge records ("In-house guest") booked to
+the arrival's room, which the graph cannot link. Incidents, F&B notes and
+emails are not graph records and are still searched.
 """
 
 from __future__ import annotations
 
 import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from collectors.cache import RawSourceCache, raw_cache
+
+if TYPE_CHECKING:
+    from .identity_graph import IdentityGraph
 
 
 # ── Fuzzy matching helpers ───────────────────
@@ -40,6 +55,90 @@ def _levenshtein(s1: str, s2: str) -> int:
     return prev_row[-1]
 
 
+def _bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance, capped at `max_distance + 1`.
+
+    Only the diagonal band of width `max_distance` is computed, strings
+    whose lengths differ by more than `max_distance` are rejected up front,
+    and the scan stops as soon as a whole row exceeds the threshold.
+    """
+    if s1 == s2:
+        return 0
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    over = max_distance + 1
+    if len(s1) - len(s2) > max_distance:
+        return over
+    if not s2:
+        return len(s1)
+
+    n2 = len(s2)
+    prev_row = [j if j <= max_distance else over for j in range(n2 + 1)]
+    for i, c1 in enumerate(s1, start=1):
+        curr_row = [over] * (n2 + 1)
+        curr_row[0] = i if i <= max_distance else over
+        row_min = curr_row[0]
+        for j in range(max(1, i - max_distance), min(n2, i + max_distance) + 1):
+            cost = 0 if c1 == s2[j - 1] else 1
+            value = min(prev_row[j - 1] + cost, prev_row[j] + 1, curr_row[j - 1] + 1, over)
+            curr_row[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        prev_row = curr_row
+    return prev_row[n2]
+
+
+def _levenshtein_batch(query: str, candidates: list[str], max_distance: int) -> list[int]:
+    """
+    Distances from `query` to each candidate, each capped at `max_distance + 1`.
+
+    Uses Myers' bit-parallel algorithm: the query's character masks are
+    built once, then every candidate is scored one character at a time
+    with a handful of integer operations covering the whole DP column.
+    """
+    over = max_distance + 1
+    m = len(query)
+    if m == 0:
+        return [min(len(c), over) for c in candidates]
+
+    peq: dict[str, int] = {}
+    for i, c in enumerate(query):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+
+    distances = []
+    for text in candidates:
+        n = len(text)
+        if abs(n - m) > max_distance:
+            distances.append(over)
+            continue
+        pv, mv, score = full, 0, m
+        for j, c in enumerate(text, start=1):
+            eq = peq.get(c, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & full)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            # Each remaining character lowers the final distance by at most 1
+            if score - (n - j) > max_distance:
+                score = over
+                break
+            ph = ((ph << 1) | 1) & full
+            mh = (mh << 1) & full
+            pv = mh | (~(xv | ph) & full)
+            mv = ph & xv
+        distances.append(min(score, over))
+    return distances
+
+
 def _normalize_name(name: str) -> str:
     """Normalize a guest name for comparison."""
     name = name.strip().lower()
@@ -63,15 +162,221 @@ def _names_match(name1: str, name2: str, max_distance: int = 2) -> bool:
     if parts1 and parts2 and parts1[-1] == parts2[-1]:
         return True
     # Fuzzy match on full normalized name
-    if _levenshtein(n1, n2) <= max_distance:
+    if _bounded_levenshtein(n1, n2, max_distance) <= max_distance:
         return True
     return False
 
 
+def _last_name(name: str) -> str:
+    """Return the normalized last name token, or "" if there is none."""
+    parts = _normalize_name(name).split()
+    return parts[-1] if parts else ""
+
+
+_SOUNDEX_CODES = {
+    c: digit
+    for digit, group in (("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"),
+                         ("4", "l"), ("5", "mn"), ("6", "r"))
+    for c in group
+}
+
+
+def _soundex(word: str) -> str:
+    """American Soundex code for a word (e.g. "Kapoor" -> "K160")."""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    codes = _SOUNDEX_CODES
+
+    key = letters[0].upper()
+    prev = codes.get(letters[0], "")
+    for c in letters[1:]:
+        code = codes.get(c, "")
+        if code and code != prev:
+            key += code
+            if len(key) == 4:
+                break
+        if c not in "hw":
+            prev = code
+    return key.ljust(4, "0")
+
+
+def _segments(word: str, count: int) -> list[tuple[int, str]]:
+    """Split `word` into `count` contiguous pieces, returned as (offset, piece)."""
+    base, extra = divmod(len(word), count)
+    pieces = []
+    offset = 0
+    for i in range(count):
+        length = base + (1 if i >= count - extra else 0)
+        pieces.append((offset, word[offset:offset + length]))
+        offset += length
+    return pieces
+
+
+# ── Candidate index ──────────────────────────
+
+class NameIndex:
+    """
+    Inverted index from guest names to record positions.
+
+    Names are keyed by normalized full name, last name, Soundex of the last
+    name, and `max_distance + 1` positional segments of the full name. Two
+    names within `max_distance` edits always share at least one segment at
+    a nearby offset, so `lookup()` returns exactly the records `_names_match`
+    would accept while only scoring a handful of candidates.
+    """
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.by_name: dict[str, list[int]] = {}
+        self.by_last: dict[str, set[str]] = {}
+        self.by_phonetic: dict[str, set[str]] = {}
+        self.by_segment: dict[tuple[str, int], set[str]] = {}
+        self.short_names: set[str] = set()
+        self._max_segment = 0
+        self._lookups: dict[str, list[int]] = {}
+
+    def add(self, name: str, position: int) -> None:
+        """Register the record at `position` under `name`."""
+        normalized = _normalize_name(name)
+        if normalized not in self.by_name:
+            self.by_name[normalized] = []
+            parts = normalized.split()
+            if parts:
+                self.by_last.setdefault(parts[-1], set()).add(normalized)
+                self.by_phonetic.setdefault(_soundex(parts[-1]), set()).add(normalized)
+            if len(normalized) <= self.max_distance:
+                # Within edit distance of any equally short query
+                self.short_names.add(normalized)
+            else:
+                for offset, piece in _segments(normalized, self.max_distance + 1):
+                    self.by_segment.setdefault((piece, offset), set()).add(normalized)
+                    self._max_segment = max(self._max_segment, len(piece))
+        self.by_name[normalized].append(position)
+        self._lookups.clear()
+
+    def lookup(self, name: str) -> list[int]:
+        """Positions of all records whose name `_names_match` `name`."""
+        normalized = _normalize_name(name)
+        if normalized in self._lookups:
+            return self._lookups[normalized]
+
+        matched = set()
+        if normalized in self.by_name:
+            matched.add(normalized)
+        parts = normalized.split()
+        if parts:
+            matched |= self.by_last.get(parts[-1], set())
+
+        candidates = list(self._fuzzy_candidates(normalized) - matched)
+        distances = _levenshtein_batch(normalized, candidates, self.max_distance)
+        matched.update(c for c, d in zip(candidates, distances) if d <= self.max_distance)
+
+        positions = sorted(p for n in matched for p in self.by_name[n])
+        self._lookups[normalized] = positions
+        return positions
+
+    def lookup_phonetic(self, name: str) -> list[int]:
+        """Positions of records whose last name sounds like `name`'s (candidates only)."""
+        last = _last_name(name)
+        if not last:
+            return []
+        names = self.by_phonetic.get(_soundex(last), set())
+        return sorted(p for n in names for p in self.by_name[n])
+
+    def _fuzzy_candidates(self, normalized: str) -> set[str]:
+        """Indexed names sharing a segment with `normalized` near the same offset."""
+        k = self.max_distance
+        candidates = set(self.short_names)
+        for start in range(len(normalized)):
+            for length in range(1, min(self._max_segment, len(normalized) - start) + 1):
+                piece = normalized[start:start + length]
+                for offset in range(max(0, start - k), start + k + 1):
+                    candidates |= self.by_segment.get((piece, offset), set())
+        return {c for c in candidates if abs(len(c) - len(normalized)) <= k}
+
+
+class TextIndex:
+    """
+    Substring search over the lower-cased text fields of many records.
+
+    Record texts are joined into one buffer so a lookup is a handful of
+    `str.find` calls rather than a Python loop over every record.
+    """
+
+    _SEP = "\x00"
+
+    def __init__(self, texts: list[str]):
+        self._starts = []
+        offset = 0
+        for text in texts:
+            self._starts.append(offset)
+            offset += len(text) + 1
+        self._buffer = self._SEP.join(texts)
+
+    def find(self, needle: str) -> list[int]:
+        """Positions of records whose text contains `needle`."""
+        if not needle or self._SEP in needle:
+            return []
+        positions = []
+        start = 0
+        while True:
+            idx = self._buffer.find(needle, start)
+            if idx == -1:
+                break
+            position = bisect_right(self._starts, idx) - 1
+            positions.append(position)
+            if position + 1 >= len(self._starts):
+                break
+            start = self._starts[position + 1]
+        return positions
+
+
+class RecordIndex:
+    """Records from one source, indexed by guest name, room and free text."""
+
+    def __init__(self, records: list[dict]):
+        self.records = records
+        self.names = NameIndex()
+        self.rooms: dict[Any, list[int]] = {}
+        self.ids: dict[str, int] = {}
+        self.unnamed: set[int] = set()     # positions with no usable guest name
+        self.text: TextIndex | None = None
+
+    def add_name(self, name: str, position: int) -> None:
+        self.names.add(name, position)
+
+    def add_room(self, room: Any, position: int) -> None:
+        if room:
+            self.rooms.setdefault(room, []).append(position)
+
+    def add_id(self, record_id: str, position: int) -> None:
+        if record_id:
+            self.ids[record_id] = position
+
+    def by_ids(self, record_ids: list[str]) -> list[int]:
+        return [self.ids[r] for r in record_ids if r in self.ids]
+
+    def index_text(self, texts: list[str]) -> None:
+        self.text = TextIndex(texts)
+
+    def select(self, *position_lists: list[int]) -> list[dict]:
+        """Records at the union of `position_lists`, in source order."""
+        positions = sorted(set().union(*position_lists))
+        return [self.records[p] for p in positions]
+
+    def by_room(self, room: Any) -> list[int]:
+        return self.rooms.get(room, []) if room else []
+
+    def unnamed_by_room(self, room: Any) -> list[int]:
+        return [p for p in self.by_room(room) if p in self.unnamed]
+
+
 @dataclass
 class MatchResult:
     """All records found for a single guest across hotel systems."""
     guest_name: str
+    guest_id: str | None = None     # identity graph cluster, when known
     room: int | None = None
     nationality: str | None = None
     vip: str | None = None
@@ -89,11 +394,23 @@ class GuestMatcher:
     Matches guest identities across all hotel data sources.
 
     Takes raw collector data and today's arrival list from OPERA,
-    then searches all systems for matching records per guest.
+    then searches all systems for matching records per guest. Each source
+    is indexed once per matcher, so a search is a few index lookups plus
+    fuzzy scoring on a small candidate set. Arrivals already in `graph`
+    (link `guest_records()` into it first) take the graph-resolved
+    records of their cluster instead, plus unnamed records by room.
     """
 
-    def __init__(self, collector_data: dict[str, dict[str, Any]]):
+    def __init__(
+        self,
+        collector_data: dict[str, dict[str, Any]],
+        cache: RawSourceCache | None = None,
+        graph: IdentityGraph | None = None,
+    ):
         self.collector_data = collector_data
+        self.cache = cache if cache is not None else raw_cache
+        self.graph = graph
+        self._indexes: dict[str, RecordIndex | None] = {}
 
     def match_arrivals(self, target_date: str) -> list[MatchResult]:
         """
@@ -112,7 +429,7 @@ class GuestMatcher:
             return []
 
         results = []
-        for arrival in arrivals:
+        for position, arrival in enumerate(arrivals):
             guest_name = arrival.get("guestName", "")
             room = arrival.get("roomNo")
             result = MatchResult(
@@ -123,164 +440,231 @@ class GuestMatcher:
                 opera_data=arrival,
             )
 
-            # Search each system
-            result.spa_records = self._search_spa(guest_name, room, target_date)
+            cluster = self._cluster(arrival, target_date, position)
+            if cluster is not None:
+                # Known guest: the graph already resolved these systems;
+                # placeholder-name bookings still match on room only
+                result.guest_id = self.graph.guest_id(cluster["key"])
+                result.spa_records = self._cluster_records("spa", cluster["spa"], room)
+                result.concierge_records = self._cluster_records("concierge", cluster["concierge"], room)
+                result.opera_history = [
+                    r for r in self._cluster_records("opera_history", cluster["opera"])
+                    if r["date"] != target_date
+                ]
+            else:
+                result.spa_records = self._search_spa(guest_name, room, target_date)
+                result.concierge_records = self._search_concierge(guest_name, room)
+                result.opera_history = self._search_opera_history(guest_name, target_date)
+
+            # Not graph records: search the rest
             result.fb_records = self._search_fb(guest_name, room, target_date)
             result.incident_records = self._search_incidents(guest_name, room)
-            result.concierge_records = self._search_concierge(guest_name, room)
             result.email_mentions = self._search_emails(guest_name)
-            result.opera_history = self._search_opera_history(guest_name, target_date)
 
             results.append(result)
 
         return results
 
+    def guest_records(self) -> list:
+        """Guest-bearing records from every source, for identity resolution."""
+        from .resolver import records_from_sources
+
+        return records_from_sources(self._get_raw_data)
+
+    def _cluster(self, arrival: dict, target_date: str, position: int) -> dict | None:
+        """The arrival's graph key and its cluster's record IDs by source, if the graph knows it."""
+        if self.graph is None:
+            return None
+        from .identity_graph import record_key
+        from .resolver import opera_record_id
+
+        key = record_key("opera", opera_record_id("arrivals", arrival, target_date, position))
+        nodes = self.graph.cluster(key)
+        if not nodes:
+            return None
+        cluster = {"key": key, "opera": [], "spa": [], "concierge": []}
+        for node in nodes:
+            cluster[node["source"]].append(node["record_id"])
+        return cluster
+
+    def _cluster_records(self, source: str, record_ids: list[str], room: int | None = None) -> list[dict]:
+        """Records of a cluster, plus `source`'s unnamed records in `room`."""
+        index = self._index(source)
+        if index is None:
+            return []
+        return index.select(index.by_ids(record_ids), index.unnamed_by_room(room))
+
     # ── System-specific search methods ───────
 
     def _search_spa(self, guest_name: str, room: int | None, target_date: str) -> list[dict]:
         """Search spa bookings by name or room."""
-        spa_raw = self._get_raw_data("spa-tac.json")
-        if not spa_raw:
+        index = self._index("spa")
+        if index is None:
             return []
+        return index.select(index.names.lookup(guest_name), index.by_room(room))
 
-        matches = []
+    def _search_fb(self, guest_name: str, room: int | None, target_date: str) -> list[dict]:
+        """Search F&B reservations by name. 7rooms data is outlet-level, not per-guest in our mock."""
+        # The 7rooms mock data is aggregated by outlet, not per-guest.
+        # In production, 7rooms API returns per-reservation data with guest names.
+        # For now, we extract any notes mentioning the guest.
+        index = self._index("fb")
+        if index is None:
+            return []
+        return index.select(index.text.find(_last_name(guest_name)))
+
+    def _search_incidents(self, guest_name: str, room: int | None) -> list[dict]:
+        """Search incident history by name or room."""
+        # Name appears in reportedBy (e.g., "Guest (Kapoor)") or description
+        index = self._index("incidents")
+        if index is None:
+            return []
+        return index.select(index.text.find(_last_name(guest_name)), index.by_room(room))
+
+    def _search_concierge(self, guest_name: str, room: int | None) -> list[dict]:
+        """Search concierge requests by name or room."""
+        index = self._index("concierge")
+        if index is None:
+            return []
+        return index.select(index.names.lookup(guest_name), index.by_room(room))
+
+    def _search_emails(self, guest_name: str) -> list[dict]:
+        """Search M365 emails for guest name mentions."""
+        index = self._index("emails")
+        if index is None:
+            return []
+        return index.select(index.text.find(_last_name(guest_name)))
+
+    def _search_opera_history(self, guest_name: str, current_date: str) -> list[dict]:
+        """Search OPERA for previous stays by the same guest."""
+        index = self._index("opera_history")
+        if index is None:
+            return []
+        return [r for r in index.select(index.names.lookup(guest_name)) if r["date"] != current_date]
+
+    # ── Index construction ───────────────────
+
+    def _index(self, source: str) -> RecordIndex | None:
+        """Return the record index for `source`, building it on first use."""
+        if source not in self._indexes:
+            builder = getattr(self, f"_build_{source}_index")
+            self._indexes[source] = builder()
+        return self._indexes[source]
+
+    def _build_spa_index(self) -> RecordIndex | None:
+        spa_raw = self._get_raw_data("spa-tac.json")
+        if not spa_raw:
+            return None
+        index = RecordIndex([])
         for day in spa_raw.get("dailyData", []):
             for booking in day.get("bookings", []):
+                position = len(index.records)
+                index.records.append({**booking, "date": day["date"]})
+                index.add_id(booking.get("id", ""), position)
                 spa_guest = booking.get("guest", "")
-                spa_room = booking.get("room")
-
                 if spa_guest and spa_guest not in ("Walk-in", "In-house guest"):
-                    if _names_match(guest_name, spa_guest):
-                        matches.append({**booking, "date": day["date"]})
-                        continue
-                # Room match on same date or during stay
-                if room and spa_room == room:
-                    matches.append({**booking, "date": day["date"]})
+                    index.add_name(spa_guest, position)
+                else:
+                    index.unnamed.add(position)
+                index.add_room(booking.get("room"), position)
+        return index
 
-        return matches
-
-    def _search_fb(self, guest_name: str, room: int | None, target_date: str) -> list[dict]:
-        """Search F&B reservations by name. 7rooms data is outlet-level, not per-guest in our mock."""
+    def _build_fb_index(self) -> RecordIndex | None:
         fb_raw = self._get_raw_data("fb-7rooms.json")
         if not fb_raw:
-            return []
-
-        # The 7rooms mock data is aggregated by outlet, not per-guest.
-        # In production, 7rooms API returns per-reservation data with guest names.
-        # For now, we extract any notes mentioning the guest.
-        matches = []
-        last_name = _normalize_name(guest_name).split()[-1] if guest_name else ""
-
+            return None
+        index = RecordIndex([])
         for day in fb_raw.get("dailyData", []):
             for outlet_key in ("ON_THE_ROCKS", "SAND_BAR"):
                 outlet_data = day.get(outlet_key, {})
                 for period in ("breakfast", "lunch", "dinner"):
                     period_data = outlet_data.get(period, {})
-                    notes = period_data.get("notes", "")
-                    if last_name and last_name in notes.lower():
-                        matches.append({
-                            "date": day["date"],
-                            "outlet": outlet_key,
-                            "period": period,
-                            "notes": notes,
-                        })
-        return matches
-
-    def _search_incidents(self, guest_name: str, room: int | None) -> list[dict]:
-        """Search incident history by name or room."""
+                    index.records.append({
+                        "date": day["date"],
+                        "outlet": outlet_key,
+                        "period": period,
+                        "notes": period_data.get("notes", ""),
+                    })
+        index.index_text([r["notes"].lower() for r in index.records])
+        return index
+
+    def _build_incidents_index(self) -> RecordIndex | None:
         incidents_raw = self._get_raw_data("incidents-unifocus.json")
         if not incidents_raw:
-            return []
-
-        matches = []
-        for incident in incidents_raw.get("incidents", []):
-            # Match by name in reportedBy or description
-            reported = incident.get("reportedBy", "")
-            description = incident.get("description", "")
-            inc_room = incident.get("room")
-
-            # Check name in reported_by field (e.g., "Guest (Kapoor)")
-            last_name = _normalize_name(guest_name).split()[-1] if guest_name else ""
-            if last_name and (last_name in reported.lower() or last_name in description.lower()):
-                matches.append(incident)
-                continue
-            # Room match
-            if room and inc_room == room:
-                matches.append(incident)
-
-        return matches
-
-    def _search_concierge(self, guest_name: str, room: int | None) -> list[dict]:
-        """Search concierge requests by name or room."""
+            return None
+        index = RecordIndex(list(incidents_raw.get("incidents", [])))
+        texts = []
+        for position, incident in enumerate(index.records):
+            reported = incident.get("reportedBy", "").lower()
+            description = incident.get("description", "").lower()
+            texts.append(f"{reported}{TextIndex._SEP}{description}")
+            index.add_room(incident.get("room"), position)
+        index.index_text(texts)
+        return index
+
+    def _build_concierge_index(self) -> RecordIndex | None:
         conc_raw = self._get_raw_data("concierge.json")
         if not conc_raw:
-            return []
-
-        matches = []
-        for req in conc_raw.get("conciergeRequests", []):
+            return None
+        index = RecordIndex(list(conc_raw.get("conciergeRequests", [])))
+        for position, req in enumerate(index.records):
+            index.add_id(req.get("id", ""), position)
             conc_guest = req.get("guest", "")
-            conc_room = req.get("room")
-
             if conc_guest and conc_guest not in ("In-house guest",):
-                if _names_match(guest_name, conc_guest):
-                    matches.append(req)
-                    continue
-            if room and conc_room == room:
-                matches.append(req)
-
-        return matches
+                index.add_name(conc_guest, position)
+            else:
+                index.unnamed.add(position)
+            index.add_room(req.get("room"), position)
+        return index
 
-    def _search_emails(self, guest_name: str) -> list[dict]:
-        """Search M365 emails for guest name mentions."""
+    def _build_emails_index(self) -> RecordIndex | None:
         emails_raw = self._get_raw_data("m365-emails.json")
         if not emails_raw:
-            return []
-
-        matches = []
-        last_name = _normalize_name(guest_name).split()[-1] if guest_name else ""
-        if not last_name:
-            return []
-
+            return None
+        index = RecordIndex([])
+        texts = []
         for email in emails_raw:
             body = email.get("body", "").lower()
             subject = email.get("subject", "").lower()
-            if last_name in body or last_name in subject:
-                matches.append({
-                    "date": email.get("date", ""),
-                    "subject": email.get("subject", ""),
-                    "from": email.get("from", {}).get("name", ""),
-                    "snippet": body[:200],
-                })
-
-        return matches
-
-    def _search_opera_history(self, guest_name: str, current_date: str) -> list[dict]:
-        """Search OPERA for previous stays by the same guest."""
+            index.records.append({
+                "date": email.get("date", ""),
+                "subject": email.get("subject", ""),
+                "from": email.get("from", {}).get("name", ""),
+                "snippet": body[:200],
+            })
+            texts.append(f"{body}{TextIndex._SEP}{subject}")
+        index.index_text(texts)
+        return index
+
+    def _build_opera_history_index(self) -> RecordIndex | None:
         opera_raw = self._get_raw_data("opera-pms.json")
         if not opera_raw:
-            return []
+            return None
+        from .resolver import opera_record_id
 
-        history = []
+        index = RecordIndex([])
         for day in opera_raw.get("dailyStats", []):
-            if day["date"] == current_date:
-                continue
-            # Check arrivals on other dates
-            for arrival in day.get("arrivals", []):
-                if _names_match(guest_name, arrival.get("guestName", "")):
-                    history.append({**arrival, "date": day["date"]})
-            # Check departures for spend data
-            for departure in day.get("departures", []):
-                if _names_match(guest_name, departure.get("guestName", "")):
-                    history.append({**departure, "date": day["date"], "type": "departure"})
-
-        return history
+            # Arrivals on other dates, then departures for spend data
+            for i, arrival in enumerate(day.get("arrivals", [])):
+                index.add_name(arrival.get("guestName", ""), len(index.records))
+                index.add_id(opera_record_id("arrivals", arrival, day["date"], i), len(index.records))
+                index.records.append({**arrival, "date": day["date"]})
+            for i, departure in enumerate(day.get("departures", [])):
+                index.add_name(departure.get("guestName", ""), len(index.records))
+                index.add_id(opera_record_id("departures", departure, day["date"], i), len(index.records))
+                index.records.append({**departure, "date": day["date"], "type": "departure"})
+        return index
 
     # ── Data loading ─────────────────────────
 
     def _get_raw_data(self, filename: str) -> Any:
-        """Load raw mock data file."""
+        """Return a raw source payload, loading it once into the shared cache."""
+        return self.cache.get_or_fetch(filename, lambda: self._load_raw_file(filename))
+
+    @staticmethod
+    def _load_raw_file(filename: str) -> Any:
+        """Load raw mock data file (cache miss fallback)."""
         import json
-        from pathlib import Path
         from config import settings
 
         path = settings.MOCK_DATA_DIR / filename
@@ -3,17 +3,49 @@ Guest Intelligence — Profile Builder.
 
 Takes match results from the matcher and builds/updates unified guest profiles.
 Aggregates data from all sources into a single coherent profile structure.
+
+Profiles are updated incrementally: each guest has a high-water mark per
+source (the last settled spa booking, incident, concierge request, folio
+date...), and later runs only merge records past it, so a daily run costs
+O(new records) and spend components accumulate without being recomputed.
+The marks are bookkeeping, not guest data: the store keeps them beside the
+profile (`load_marks`), so they never reach brief prompts.
+
+When the identity graph merges two guests, the absorbed guest's stored
+profile is folded into the surviving one and removed from the store, so
+its visit and spend history carries over to the merged guest.
 """
 
 from __future__ import annotations
 
 import hashlib
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .matcher import MatchResult, _normalize_name
 from .profile_store import ProfileStore
 
+if TYPE_CHECKING:
+    from .identity_graph import IdentityGraph
+
+
+# Records in these states can still change and are re-merged until settled
+_SETTLED_STATUSES = {
+    "spa": {"completed", "no-show", "cancelled"},
+    "incidents": {"resolved"},
+    "concierge": {"completed", "cancelled"},
+}
+
+# Sort key identifying each source's records, oldest first
+_RECORD_KEYS = {
+    "opera_history": lambda r: (r.get("date", ""), r.get("confirmationNo", ""), r.get("type", "")),
+    "spa": lambda r: (r.get("date", ""), r.get("id", "")),
+    "fb": lambda r: (r.get("date", ""), r.get("outlet", ""), r.get("period", "")),
+    "incidents": lambda r: (r.get("date", ""), r.get("id", "")),
+    "concierge": lambda r: (r.get("date", ""), r.get("id", "")),
+    "emails": lambda r: (r.get("date", ""), r.get("subject", "")),
+}
+
 
 def _generate_guest_id(name: str, date: str) -> str:
     """Generate a deterministic guest ID from name."""
@@ -26,8 +58,16 @@ def _generate_guest_id(name: str, date: str) -> str:
 class ProfileBuilder:
     """Builds and updates guest profiles from cross-system match results."""
 
-    def __init__(self, store: ProfileStore):
+    def __init__(
+        self,
+        store: ProfileStore,
+        graph: IdentityGraph | None = None,
+        incremental: bool = True,
+    ):
         self.store = store
+        self.graph = graph
+        self.incremental = incremental
+        self.marks: dict[str, dict] = {}    # guest_id -> per-source high-water marks
 
     def build_profiles(self, matches: list[MatchResult], target_date: str) -> list[dict]:
         """
@@ -38,43 +78,60 @@ class ProfileBuilder:
             target_date: ISO date string.
 
         Returns:
-            List of updated profile dicts.
+            List of updated profile dicts (spend finalized and saved).
         """
         profiles = []
+        built: dict[str, dict] = {}
+        absorbed = self._fold_merged_profiles(built)
         for match in matches:
-            profile = self._build_single(match, target_date)
-            self.store.save(profile)
+            profile = self._build_single(match, target_date, built)
+            built[profile["guest_id"]] = profile
             profiles.append(profile)
+
+        # Finalize before persisting so each profile is written once per run
+        for profile in built.values():
+            self.finalize_spend(profile)
+        self.store.save_many(list(built.values()), marks={gid: self.marks[gid] for gid in built})
+        for guest_id in absorbed:
+            self.store.delete(guest_id)
         return profiles
 
-    def _build_single(self, match: MatchResult, target_date: str) -> dict:
+    def _build_single(self, match: MatchResult, target_date: str, built: dict[str, dict] | None = None) -> dict:
         """Build or update a single guest profile from match results."""
-        guest_id = _generate_guest_id(match.guest_name, target_date)
-
-        # Always start fresh from current data to avoid double-counting.
-        # In production with real historical data, we'd do incremental updates.
-        profile = self._empty_profile(guest_id, match.guest_name)
+        guest_id = self._guest_id_for(match, target_date)
+
+        # Continue from a profile already built this run, else from the stored
+        # profile when it has high-water marks; profiles stored without them
+        # can't be topped up safely, so they (and --rebuild-profiles runs)
+        # start fresh from current data.
+        profile = (built or {}).get(guest_id)
+        if profile is None:
+            profile, marks = self._load(guest_id) if self.incremental else (None, None)
+            if not profile or marks is None:
+                profile, marks = self._empty_profile(guest_id, match.guest_name), {}
+            self.marks[guest_id] = marks
+        marks = self.marks[guest_id]
 
         # Update from OPERA arrival data
         self._merge_opera(profile, match)
 
         # Update from OPERA history
-        self._merge_opera_history(profile, match.opera_history)
+        self._merge_opera_history(profile, self._take_new(marks, "opera_history", match.opera_history))
 
         # Update from spa records
-        self._merge_spa(profile, match.spa_records)
+        self._merge_spa(profile, self._take_new(marks, "spa", match.spa_records))
 
         # Update from F&B records
-        self._merge_fb(profile, match.fb_records)
+        self._merge_fb(profile, self._take_new(marks, "fb", match.fb_records))
 
         # Update from incidents
-        self._merge_incidents(profile, match.incident_records)
+        self._merge_incidents(profile, self._take_new(marks, "incidents", match.incident_records))
 
         # Update from concierge
-        self._merge_concierge(profile, match.concierge_records)
+        self._merge_concierge(profile, self._take_new(marks, "concierge", match.concierge_records))
 
         # Update from email mentions
-        self._merge_emails(profile, match.email_mentions)
+        self._merge_emails(profile, self._take_new(marks, "emails", match.email_mentions))
 
         # Compute derived fields
         profile["total_visits"] = len(profile["visits"])
@@ -84,6 +141,151 @@ class ProfileBuilder:
 
         return profile
 
+    def _guest_id_for(self, match: MatchResult, target_date: str) -> str:
+        """Cluster guest_id from the identity graph, else a name-derived ID."""
+        if match.guest_id:
+            return match.guest_id
+        if self.graph is not None and match.opera_data and match.opera_data.get("confirmationNo"):
+            from .identity_graph import record_key
+            from .resolver import opera_record_id
+
+            key = record_key("opera", opera_record_id("arrivals", match.opera_data, target_date, 0))
+            guest_id = self.graph.guest_id(key)
+            if guest_id:
+                return guest_id
+        return _generate_guest_id(match.guest_name, target_date)
+
+    # ── Merged guests ────────────────────────
+
+    def _fold_merged_profiles(self, built: dict[str, dict]) -> list[str]:
+        """
+        Fold the profiles of guests the identity graph merged into the survivors.
+
+        Folded profiles go into `built` (saved with this run's profiles); the
+        absorbed guest_ids are returned for deletion once that save is done.
+        Profiles without high-water marks would be rebuilt from scratch
+        anyway, so they are not carried over.
+        """
+        if self.graph is None:
+            return []
+        absorbed = []
+        for merged_id, kept_id in self.graph.take_pending_merges():
+            source, source_marks = self._load(merged_id)
+            absorbed.append(merged_id)
+            if source is None or source_marks is None:
+                continue
+            target = built.get(kept_id)
+            if target is None:
+                target, target_marks = self._load(kept_id)
+                if target is None or target_marks is None:
+                    # Nothing to fold into: the absorbed profile becomes the survivor's
+                    source["guest_id"] = kept_id
+                    built[kept_id], self.marks[kept_id] = source, source_marks
+                    continue
+                built[kept_id], self.marks[kept_id] = target, target_marks
+            self.merge_profiles(target, source)
+            self.marks[kept_id] = self._merge_marks(self.marks[kept_id], source_marks)
+        return absorbed
+
+    @staticmethod
+    def merge_profiles(target: dict, source: dict) -> None:
+        """Fold `source` (a merged guest's profile) into `target`; a stay in both counts once."""
+        for key in ("names", "emails", "phones", "special_occasions", "notes"):
+            target[key] += [v for v in source.get(key, []) if v not in target[key]]
+        for key in ("nationality", "vip_level"):
+            target[key] = target.get(key) or source.get(key)
+
+        prefs, source_prefs = target["preferences"], source.get("preferences", {})
+        for key, value in source_prefs.items():
+            if isinstance(value, list):
+                prefs[key] = prefs.get(key, []) + [v for v in value if v not in prefs.get(key, [])]
+            elif not prefs.get(key):
+                prefs[key] = value
+
+        known = {v.get("confirmation") for v in target["visits"]}
+        shared_room_spend = 0
+        for visit in source.get("visits", []):
+            if visit.get("confirmation") in known:
+                shared_room_spend += (visit.get("rate") or 0) * (visit.get("nights") or 0)
+            else:
+                target["visits"].append(visit)
+        for key, value in source.get("spend_history", {}).items():
+            if key != "total":
+                target["spend_history"][key] = target["spend_history"].get(key, 0) + value
+        target["spend_history"]["rooms"] -= shared_room_spend
+
+        for key in ("incidents", "concierge_history"):
+            ids = {entry.get("id") for entry in target[key]}
+            target[key] += [entry for entry in source.get(key, []) if entry.get("id") not in ids]
+
+        target["total_visits"] = len(target["visits"])
+        if target["visits"]:
+            target["first_visit"] = min(v["checkin"] for v in target["visits"])
+        target["last_updated"] = max(filter(None, [target.get("last_updated"), source.get("last_updated")]), default=None)
+
+    @staticmethod
+    def _merge_marks(target: dict, source: dict) -> dict:
+        """Per source, the later of the two marks, so nothing either merged is merged again."""
+        merged = {}
+        for source_name in target.keys() | source.keys():
+            states = [s for s in (target.get(source_name), source.get(source_name)) if s]
+            marks = [tuple(s["mark"]) for s in states if s.get("mark")]
+            mark = max(marks) if marks else None
+            ahead = {tuple(k) for s in states for k in s.get("ahead", [])}
+            merged[source_name] = {
+                "mark": list(mark) if mark else None,
+                "ahead": sorted(list(k) for k in ahead if mark is None or k > mark),
+            }
+        return merged
+
+    def _load(self, guest_id: str) -> tuple[dict | None, dict | None]:
+        """Stored profile and its high-water marks (marks kept inline by older versions move out)."""
+        profile = self.store.load(guest_id)
+        if profile is None:
+            return None, None
+        inline = profile.pop("high_water", None)
+        marks = self.store.load_marks(guest_id)
+        return profile, marks if marks is not None else inline
+
+    @staticmethod
+    def _take_new(marks: dict, source: str, records: list[dict]) -> list[dict]:
+        """
+        Return the records not yet merged into the guest's profile, advancing
+        the guest's `marks` for `source`.
+
+        The mark only moves past settled records (e.g. completed spa bookings,
+        resolved incidents); an unsettled record holds it back and is offered
+        again next run. Settled records beyond that point are remembered in
+        `ahead` so they are never merged twice.
+        """
+        key = _RECORD_KEYS[source]
+        settled_statuses = _SETTLED_STATUSES.get(source)
+
+        state = marks.get(source) or {}
+        mark = tuple(state["mark"]) if state.get("mark") else None
+        ahead = {tuple(k) for k in state.get("ahead", [])}
+
+        new = [
+            r for r in records
+            if (mark is None or key(r) > mark) and key(r) not in ahead
+        ]
+
+        blocked = False
+        for record in sorted(new, key=key):
+            settled = settled_statuses is None or record.get("status") in settled_statuses
+            if not settled:
+                blocked = True
+            elif blocked:
+                ahead.add(key(record))
+            else:
+                mark = key(record)
+
+        marks[source] = {
+            "mark": list(mark) if mark else None,
+            "ahead": sorted(list(k) for k in ahead if mark is None or k > mark),
+        }
+        return new
+
     def _empty_profile(self, guest_id: str, name: str) -> dict:
         """Create an empty profile structure."""
         return {
@@ -161,7 +363,8 @@ class ProfileBuilder:
 
         # Add visit if not already present (by confirmation number)
         existing_confs = {v.get("confirmation") for v in profile["visits"]}
-        if visit["confirmation"] and visit["confirmation"] not in existing_confs:
+        is_new_visit = not visit["confirmation"] or visit["confirmation"] not in existing_confs
+        if visit["confirmation"] and is_new_visit:
             profile["visits"].append(visit)
 
         # Room type preference
@@ -187,8 +390,8 @@ class ProfileBuilder:
             if notes not in profile["notes"]:
                 profile["notes"].append(notes)
 
-        # Update room spend
-        if visit.get("rate") and visit.get("nights"):
+        # Update room spend (once per stay)
+        if is_new_visit and visit.get("rate") and visit.get("nights"):
             profile["spend_history"]["rooms"] += visit["rate"] * visit["nights"]
 
     def _merge_opera_history(self, profile: dict, history: list[dict]) -> None:
@@ -253,11 +456,14 @@ class ProfileBuilder:
 
     def _merge_incidents(self, profile: dict, records: list[dict]) -> None:
         """Merge incident records into profile."""
-        existing_ids = {i.get("id") for i in profile["incidents"]}
+        existing = {i.get("id"): i for i in profile["incidents"]}
 
         for record in records:
             inc_id = record.get("id", "")
-            if inc_id in existing_ids:
+            if inc_id in existing:
+                # Re-offered while open: pick up its latest status
+                existing[inc_id]["resolution"] = record.get("resolution")
+                existing[inc_id]["resolved"] = record.get("status") == "resolved"
                 continue
 
             incident = {
@@ -270,16 +476,18 @@ class ProfileBuilder:
                 "priority": record.get("priority", ""),
             }
             profile["incidents"].append(incident)
-            existing_ids.add(inc_id)
+            existing[inc_id] = incident
 
     def _merge_concierge(self, profile: dict, records: list[dict]) -> None:
         """Merge concierge request data into profile."""
-        existing_ids = {c.get("id") for c in profile["concierge_history"]}
+        existing = {c.get("id"): c for c in profile["concierge_history"]}
         concierge_spend = 0
 
         for record in records:
             req_id = record.get("id", "")
-            if req_id in existing_ids:
+            if req_id in existing:
+                # Re-offered while unsettled: pick up its latest status
+                existing[req_id]["status"] = record.get("status", "")
                 continue
 
             entry = {
@@ -290,7 +498,7 @@ class ProfileBuilder:
                 "status": record.get("status", ""),
             }
             profile["concierge_history"].append(entry)
-            existing_ids.add(req_id)
+            existing[req_id] = entry
 
             cost = record.get("cost", 0)
             if cost:
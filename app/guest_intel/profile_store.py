@@ -1,17 +1,31 @@
 """
 Guest Intelligence — Profile Store.
 
-Simple JSON-based profile database. Each guest profile is stored as a
-separate JSON file in the profiles/ directory, keyed by guest_id.
+Two interchangeable profile databases with the same API:
 
+- ProfileStore: one JSON file per guest in the profiles/ directory.
+- SQLiteProfileStore: a single SQLite database (WAL) with indexed
+  guest_id / name / VIP / last_updated columns and FTS5 name and notes
+  search, for properties with many profiles.
+
+Select the backend with PROFILE_STORE=json|sqlite (see get_profile_store()).
 Provides load, save, list, search, and delete operations.
+
+Both also keep each guest's incremental high-water marks (see
+ProfileBuilder) beside the profile rather than in it, so the profile
+payload that reaches prompts and readers holds guest data only.
 """
 
 from __future__ import annotations
 
 import json
+import os
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+from config import settings
 
 
 class ProfileStore:
@@ -21,22 +35,60 @@ class ProfileStore:
         if profiles_dir is None:
             profiles_dir = Path(__file__).parent.parent / "profiles"
         self.profiles_dir = profiles_dir
+        self.marks_dir = profiles_dir / ".high-water"
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
 
-    def _path_for(self, guest_id: str) -> Path:
-        """Get the file path for a guest profile."""
+    def _path_for(self, guest_id: str, directory: Path | None = None) -> Path:
+        """Get the file path for a guest profile (or its marks, in `directory`)."""
         safe_id = guest_id.replace("/", "_").replace("\\", "_")
-        return self.profiles_dir / f"{safe_id}.json"
+        return (directory or self.profiles_dir) / f"{safe_id}.json"
 
     def save(self, profile: dict) -> None:
         """Save a guest profile to disk."""
-        guest_id = profile.get("guest_id")
-        if not guest_id:
-            raise ValueError("Profile must have a guest_id")
+        self.save_many([profile])
 
-        path = self._path_for(guest_id)
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump(profile, fh, indent=2, ensure_ascii=False, default=str)
+    def save_many(self, profiles: list[dict], marks: dict[str, dict] | None = None) -> None:
+        """
+        Save several profiles, each written atomically.
+
+        Every profile is serialized (compactly) before anything is written,
+        so a bad profile aborts the batch without touching disk; each file
+        is then replaced via a temp file, so readers never see a partial
+        profile. Files whose content would not change are left alone.
+        `marks` maps guest_id to high-water marks saved alongside.
+        """
+        payloads = []
+        for profile in profiles:
+            guest_id = profile.get("guest_id")
+            if not guest_id:
+                raise ValueError("Profile must have a guest_id")
+            payloads.append((
+                self._path_for(guest_id),
+                json.dumps(profile, ensure_ascii=False, default=str, separators=(",", ":")),
+            ))
+        for guest_id, guest_marks in (marks or {}).items():
+            payloads.append((
+                self._path_for(guest_id, self.marks_dir),
+                json.dumps(guest_marks, ensure_ascii=False, default=str, separators=(",", ":")),
+            ))
+
+        if marks:
+            self.marks_dir.mkdir(parents=True, exist_ok=True)
+        for path, payload in payloads:
+            if self._unchanged(path, payload):
+                continue
+            tmp = path.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp, path)
+
+    @staticmethod
+    def _unchanged(path: Path, payload: str) -> bool:
+        """True if `path` already holds exactly `payload`."""
+        try:
+            return path.read_text(encoding="utf-8") == payload
+        except OSError:
+            return False
 
     def load(self, guest_id: str) -> dict | None:
         """Load a guest profile by ID. Returns None if not found."""
@@ -46,6 +98,14 @@ class ProfileStore:
         with open(path, "r", encoding="utf-8") as fh:
             return json.load(fh)
 
+    def load_marks(self, guest_id: str) -> dict | None:
+        """Load a guest's high-water marks. Returns None if none are stored."""
+        path = self._path_for(guest_id, self.marks_dir)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
     def list_all(self) -> list[dict]:
         """List all stored profiles (summary only: id, names, last_updated)."""
         profiles = []
@@ -63,6 +123,15 @@ class ProfileStore:
                 continue
         return profiles
 
+    def iter_profiles(self) -> Iterator[dict]:
+        """Yield every stored profile in guest_id order."""
+        for path in sorted(self.profiles_dir.glob("GID-*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    yield json.load(fh)
+            except json.JSONDecodeError:
+                continue
+
     def search_by_name(self, name: str) -> list[dict]:
         """Search profiles by guest name (case-insensitive partial match)."""
         name_lower = name.lower()
@@ -80,6 +149,7 @@ class ProfileStore:
 
     def delete(self, guest_id: str) -> bool:
         """Delete a guest profile. Returns True if deleted, False if not found."""
+        self._path_for(guest_id, self.marks_dir).unlink(missing_ok=True)
         path = self._path_for(guest_id)
         if path.exists():
             path.unlink()
@@ -92,4 +162,230 @@ class ProfileStore:
         for path in self.profiles_dir.glob("GID-*.json"):
             path.unlink()
             count += 1
+        for path in self.marks_dir.glob("GID-*.json"):
+            path.unlink()
         return count
+
+
+class SQLiteProfileStore:
+    """SQLite-backed guest profile storage with indexed and full-text search."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            guest_id TEXT PRIMARY KEY,
+            primary_name TEXT,
+            vip_level TEXT,
+            total_visits INTEGER DEFAULT 0,
+            last_updated TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_profiles_vip ON profiles(vip_level);
+        CREATE INDEX IF NOT EXISTS idx_profiles_last_updated ON profiles(last_updated);
+
+        CREATE TABLE IF NOT EXISTS profile_names (
+            guest_id TEXT NOT NULL REFERENCES profiles(guest_id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            name_normalized TEXT NOT NULL,
+            UNIQUE(guest_id, name_normalized)
+        );
+        CREATE INDEX IF NOT EXISTS idx_profile_names_normalized ON profile_names(name_normalized);
+
+        CREATE TABLE IF NOT EXISTS profile_marks (
+            guest_id TEXT PRIMARY KEY REFERENCES profiles(guest_id) ON DELETE CASCADE,
+            data TEXT NOT NULL
+        );
+    """
+
+    # Trigram FTS supports substring (LIKE) search with an index; fall back
+    # to the default tokenizer on SQLite builds older than 3.34.
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts
+        USING fts5(guest_id UNINDEXED, names, notes, tokenize='{tokenizer}')
+    """
+
+    def __init__(self, db_path: Path | None = None):
+        if db_path is None:
+            db_path = settings.PROFILE_DB_PATH
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+            try:
+                self._conn.execute(self.FTS_SCHEMA.format(tokenizer="trigram"))
+            except sqlite3.OperationalError:
+                self._conn.execute(self.FTS_SCHEMA.format(tokenizer="unicode61 remove_diacritics 2"))
+
+    # ── Writes ───────────────────────────────
+
+    def save(self, profile: dict) -> None:
+        """Save a guest profile (insert or replace)."""
+        self.save_many([profile])
+
+    def save_many(self, profiles: list[dict], marks: dict[str, dict] | None = None) -> None:
+        """Save several profiles (and their high-water `marks`) in a single transaction."""
+        from .matcher import _normalize_name
+
+        rows, names, fts = [], [], []
+        for profile in profiles:
+            guest_id = profile.get("guest_id")
+            if not guest_id:
+                raise ValueError("Profile must have a guest_id")
+            profile_names = profile.get("names", [])
+            rows.append((
+                guest_id,
+                profile_names[0] if profile_names else None,
+                profile.get("vip_level"),
+                profile.get("total_visits", 0),
+                profile.get("last_updated"),
+                json.dumps(profile, ensure_ascii=False, default=str, separators=(",", ":")),
+            ))
+            names.extend((guest_id, n, _normalize_name(n)) for n in profile_names)
+            fts.append((guest_id, "\n".join(profile_names), "\n".join(map(str, profile.get("notes", [])))))
+
+        ids = [(r[0],) for r in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO profiles (guest_id, primary_name, vip_level, total_visits, last_updated, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(guest_id) DO UPDATE SET primary_name=excluded.primary_name, "
+                "vip_level=excluded.vip_level, total_visits=excluded.total_visits, "
+                "last_updated=excluded.last_updated, data=excluded.data",
+                rows,
+            )
+            self._conn.executemany("DELETE FROM profile_names WHERE guest_id = ?", ids)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO profile_names (guest_id, name, name_normalized) VALUES (?, ?, ?)",
+                names,
+            )
+            self._conn.executemany("DELETE FROM profiles_fts WHERE guest_id = ?", ids)
+            self._conn.executemany(
+                "INSERT INTO profiles_fts (guest_id, names, notes) VALUES (?, ?, ?)",
+                fts,
+            )
+            self._conn.executemany(
+                "INSERT INTO profile_marks (guest_id, data) VALUES (?, ?) "
+                "ON CONFLICT(guest_id) DO UPDATE SET data=excluded.data",
+                [
+                    (guest_id, json.dumps(guest_marks, ensure_ascii=False, default=str, separators=(",", ":")))
+                    for guest_id, guest_marks in (marks or {}).items()
+                ],
+            )
+
+    def delete(self, guest_id: str) -> bool:
+        """Delete a guest profile. Returns True if deleted, False if not found."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM profiles WHERE guest_id = ?", (guest_id,))
+            self._conn.execute("DELETE FROM profiles_fts WHERE guest_id = ?", (guest_id,))
+        return cur.rowcount > 0
+
+    def clear_all(self) -> int:
+        """Delete all profiles. Returns count of deleted profiles."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM profiles")
+            self._conn.execute("DELETE FROM profile_names")
+            self._conn.execute("DELETE FROM profile_marks")
+            self._conn.execute("DELETE FROM profiles_fts")
+        return cur.rowcount
+
+    # ── Reads ────────────────────────────────
+
+    def load(self, guest_id: str) -> dict | None:
+        """Load a guest profile by ID. Returns None if not found."""
+        row = self._conn.execute(
+            "SELECT data FROM profiles WHERE guest_id = ?", (guest_id,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def load_marks(self, guest_id: str) -> dict | None:
+        """Load a guest's high-water marks. Returns None if none are stored."""
+        row = self._conn.execute(
+            "SELECT data FROM profile_marks WHERE guest_id = ?", (guest_id,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def list_all(self) -> list[dict]:
+        """List all stored profiles (summary only: id, names, last_updated)."""
+        rows = self._conn.execute(
+            "SELECT guest_id, total_visits, last_updated, json_extract(data, '$.names') AS names "
+            "FROM profiles ORDER BY guest_id"
+        ).fetchall()
+        return [
+            {
+                "guest_id": row["guest_id"],
+                "names": json.loads(row["names"] or "[]"),
+                "total_visits": row["total_visits"],
+                "last_updated": row["last_updated"],
+            }
+            for row in rows
+        ]
+
+    def iter_profiles(self) -> Iterator[dict]:
+        """Yield every stored profile in guest_id order."""
+        for row in self._conn.execute("SELECT data FROM profiles ORDER BY guest_id"):
+            yield json.loads(row["data"])
+
+    def search_by_name(self, name: str) -> list[dict]:
+        """Search profiles by guest name (case-insensitive partial match)."""
+        pattern = "%" + name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = self._conn.execute(
+            "SELECT p.data FROM profiles_fts f JOIN profiles p ON p.guest_id = f.guest_id "
+            "WHERE f.names LIKE ? ESCAPE '\\' ORDER BY p.guest_id",
+            (pattern,),
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def find_by_name(self, name: str) -> list[dict]:
+        """Profiles with a name equal to `name` after normalization (indexed)."""
+        from .matcher import _normalize_name
+
+        rows = self._conn.execute(
+            "SELECT DISTINCT p.data FROM profile_names n JOIN profiles p ON p.guest_id = n.guest_id "
+            "WHERE n.name_normalized = ?",
+            (_normalize_name(name),),
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def search_notes(self, query: str, limit: int = 50) -> list[dict]:
+        """Full-text search over profile names and notes."""
+        phrase = '"' + query.replace('"', '""') + '"'
+        rows = self._conn.execute(
+            "SELECT p.data FROM profiles_fts f JOIN profiles p ON p.guest_id = f.guest_id "
+            "WHERE profiles_fts MATCH ? ORDER BY rank LIMIT ?",
+            (phrase, limit),
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def list_by_vip(self, vip_level: str) -> list[dict]:
+        """All profiles at a VIP level (indexed)."""
+        rows = self._conn.execute(
+            "SELECT data FROM profiles WHERE vip_level = ? ORDER BY guest_id", (vip_level,)
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+STORES = {
+    "json": ProfileStore,
+    "sqlite": SQLiteProfileStore,
+}
+
+
+def get_profile_store(name: str | None = None):
+    """Instantiate the configured profile store backend (PROFILE_STORE)."""
+    name = (name or settings.PROFILE_STORE).lower()
+    cls = STORES.get(name)
+    if not cls:
+        available = ", ".join(STORES.keys())
+        raise ValueError(f"Unknown profile store '{name}'. Available: {available}")
+    return cls()
@@ -0,0 +1,372 @@
+"""
+Guest Intelligence — Identity Resolver.
+
+Resolves guest records from every hotel system into identity clusters in
+three stages, so tens of thousands of historical records resolve in
+near-linear time instead of comparing every pair:
+
+1. Blocking — each record gets cheap keys (Soundex of the last name,
+   reorder-insensitive token key, email and email domain, phone suffix,
+   room + date). Only records sharing a key are ever compared.
+2. Candidate generation — all pairs inside small blocks; oversized blocks
+   (e.g. a freemail domain) fall back to a sorted-neighbourhood window.
+3. Scored comparison — evidence follows the matching rules in
+   docs/guest-intelligence.md: one high-confidence signal links, medium
+   signals need corroboration, and conflicting evidence vetoes.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterator
+
+from .matcher import _bounded_levenshtein, _normalize_name, _soundex
+
+
+# ── Evidence weights ─────────────────────────
+
+VERY_HIGH = 0.95   # email, phone
+HIGH = 0.9         # exact name, room + date
+MEDIUM = 0.6       # fuzzy / initial / transliterated name
+LOW = 0.5          # last name only
+
+DEFAULT_THRESHOLD = 0.8
+
+_PLACEHOLDER_NAMES = {"walk-in", "in-house guest", ""}
+
+
+@dataclass
+class GuestRecord:
+    """A single guest-bearing record from one source system."""
+    record_id: str
+    source: str
+    name: str
+    email: str | None = None
+    phone: str | None = None
+    room: int | None = None
+    date: str | None = None
+    data: dict = field(default_factory=dict)
+
+
+@dataclass
+class Comparison:
+    """Outcome of comparing two records: a score in [0, 1] and its evidence."""
+    score: float
+    evidence: list[str] = field(default_factory=list)
+
+
+# ── Normalization ────────────────────────────
+
+def _fold(text: str) -> str:
+    """Lower-case and strip accents ("Müller" -> "muller")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+@lru_cache(maxsize=65536)
+def name_tokens(name: str) -> tuple[str, ...]:
+    """Normalized name tokens; initials keep a trailing "." (e.g. ("p.", "kapoor"))."""
+    tokens = []
+    for raw in _fold(_normalize_name(name)).split():
+        word = re.sub(r"[^a-z0-9]", "", raw)
+        if not word:
+            continue
+        tokens.append(f"{word}." if len(word) == 1 or (raw.endswith(".") and len(word) <= 2) else word)
+    return tuple(tokens)
+
+
+_token_soundex = lru_cache(maxsize=65536)(_soundex)
+
+
+def _is_initial(token: str) -> bool:
+    return token.endswith(".")
+
+
+def _phone_suffix(phone: str | None, digits: int = 7) -> str:
+    """Last `digits` digits of a phone number, ignoring formatting."""
+    if not phone:
+        return ""
+    only_digits = re.sub(r"\D", "", phone)
+    return only_digits[-digits:] if len(only_digits) >= digits else ""
+
+
+def _email(email: str | None) -> str:
+    return email.strip().lower() if email else ""
+
+
+# ── Blocking ─────────────────────────────────
+
+def blocking_keys(record: GuestRecord) -> set[str]:
+    """Cheap keys under which `record` is filed; pairs sharing none are never compared."""
+    keys = set()
+    words = [t for t in name_tokens(record.name) if not _is_initial(t)]
+    if words:
+        keys.add(f"ln:{_token_soundex(words[-1])}")
+        if len(words) > 1:
+            # Reorder-insensitive: "Kapoor Priya" blocks with "Priya Kapoor"
+            keys.add("tk:" + "|".join(sorted(_token_soundex(w) for w in words)))
+
+    email = _email(record.email)
+    if "@" in email:
+        keys.add(f"em:{email}")
+        keys.add(f"ed:{email.rsplit('@', 1)[1]}")
+
+    suffix = _phone_suffix(record.phone)
+    if suffix:
+        keys.add(f"ph:{suffix}")
+
+    if record.room and record.date:
+        keys.add(f"rd:{record.room}:{record.date}")
+    return keys
+
+
+# ── Comparison ───────────────────────────────
+
+@lru_cache(maxsize=262144)
+def _token_similarity(a: str, b: str) -> float:
+    """Similarity of two name tokens in [0, 1]."""
+    if a == b:
+        return 1.0
+    if _is_initial(a) or _is_initial(b):
+        return 0.8 if a[0] == b[0] else 0.0
+    if min(len(a), len(b)) >= 4 and _bounded_levenshtein(a, b, 1) <= 1:
+        return 0.9
+    if _token_soundex(a) == _token_soundex(b):
+        return 0.85
+    if min(len(a), len(b)) >= 6 and _bounded_levenshtein(a, b, 2) <= 2:
+        return 0.75
+    return 0.0
+
+
+def name_similarity(tokens1: tuple[str, ...], tokens2: tuple[str, ...]) -> float:
+    """
+    Order-insensitive similarity of two tokenized names in [0, 1].
+
+    Every token of the shorter name is paired with its best counterpart;
+    at least one full (non-initial) token must match closely, so a shared
+    first name or initial alone scores 0.
+    """
+    if not tokens1 or not tokens2:
+        return 0.0
+    short, long = sorted((tokens1, tokens2), key=len)
+    total = 0.0
+    anchored = False
+    for token in short:
+        best = max(_token_similarity(token, other) for other in long)
+        total += best
+        if best >= 0.85 and not _is_initial(token):
+            anchored = True
+    return total / len(short) if anchored else 0.0
+
+
+def compare(a: GuestRecord, b: GuestRecord) -> Comparison:
+    """Score how likely two records describe the same guest."""
+    evidence = []
+    weights = []
+
+    email_a, email_b = _email(a.email), _email(b.email)
+    if email_a and email_b:
+        if email_a == email_b:
+            evidence.append("email")
+            weights.append(VERY_HIGH)
+        else:
+            evidence.append("email_conflict")
+
+    phone_a, phone_b = _phone_suffix(a.phone), _phone_suffix(b.phone)
+    if phone_a and phone_b and phone_a == phone_b:
+        evidence.append("phone")
+        weights.append(VERY_HIGH)
+
+    tokens_a, tokens_b = name_tokens(a.name), name_tokens(b.name)
+    similarity = name_similarity(tokens_a, tokens_b)
+    names_conflict = bool(tokens_a and tokens_b) and similarity == 0.0
+    if similarity == 1.0 and len(tokens_a) > 1 and sorted(tokens_a) == sorted(tokens_b):
+        evidence.append("exact_name")
+        weights.append(HIGH)
+    elif similarity >= 0.85:
+        evidence.append("fuzzy_name")
+        weights.append(MEDIUM)
+    elif tokens_a and tokens_b and tokens_a[-1] == tokens_b[-1]:
+        evidence.append("last_name")
+        weights.append(LOW)
+
+    # Sharing a room is strong evidence unless the names say otherwise
+    # (couples and families share rooms).
+    if a.room and a.room == b.room and a.date and a.date == b.date and not names_conflict:
+        evidence.append("room_date")
+        weights.append(HIGH)
+
+    miss = 1.0
+    for weight in weights:
+        miss *= 1.0 - weight
+    score = 1.0 - miss
+    if "email_conflict" in evidence:
+        score *= 0.5
+    return Comparison(score=round(score, 4), evidence=evidence)
+
+
+# ── Resolver ─────────────────────────────────
+
+class _DisjointSet:
+    """Union-find with path halving and union by size."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+
+class IdentityResolver:
+    """
+    Blocking + candidate generation + scored comparison over guest records.
+
+    Args:
+        threshold: Minimum comparison score to link two records.
+        max_block_size: Blocks larger than this are scanned with a sliding
+            window instead of all-pairs, bounding work per block.
+        window: Neighbours compared per record inside oversized blocks.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_block_size: int = 50,
+        window: int = 8,
+    ):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.window = window
+
+    def blocks(self, records: list[GuestRecord]) -> dict[str, list[int]]:
+        """Record positions grouped by blocking key."""
+        blocks: dict[str, list[int]] = {}
+        for position, record in enumerate(records):
+            for key in blocking_keys(record):
+                blocks.setdefault(key, []).append(position)
+        return blocks
+
+    def candidate_pairs(self, records: list[GuestRecord]) -> Iterator[tuple[int, int]]:
+        """Distinct `(i, j)` position pairs (i < j) worth comparing."""
+        seen = set()
+        for members in self.blocks(records).values():
+            if len(members) < 2:
+                continue
+            if len(members) <= self.max_block_size:
+                pairs = (
+                    (members[x], members[y])
+                    for x in range(len(members))
+                    for y in range(x + 1, len(members))
+                )
+            else:
+                ordered = sorted(members, key=lambda p: (name_tokens(records[p].name)[::-1], p))
+                pairs = (
+                    (ordered[x], ordered[y])
+                    for x in range(len(ordered))
+                    for y in range(x + 1, min(x + 1 + self.window, len(ordered)))
+                )
+            for i, j in pairs:
+                pair = (i, j) if i < j else (j, i)
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+    def links(self, records: list[GuestRecord]) -> Iterator[tuple[int, int, Comparison]]:
+        """Candidate pairs whose comparison clears the threshold."""
+        for i, j in self.candidate_pairs(records):
+            result = compare(records[i], records[j])
+            if result.score >= self.threshold:
+                yield i, j, result
+
+    def resolve(self, records: list[GuestRecord]) -> list[list[GuestRecord]]:
+        """Cluster records into guest identities (connected components of links)."""
+        components = _DisjointSet(len(records))
+        for i, j, _ in self.links(records):
+            components.union(i, j)
+
+        clusters: dict[int, list[GuestRecord]] = {}
+        for position, record in enumerate(records):
+            clusters.setdefault(components.find(position), []).append(record)
+        return list(clusters.values())
+
+
+# ── Source extraction ────────────────────────
+
+def opera_record_id(kind: str, guest: dict, date: str, position: int) -> str:
+    """
+    Record ID of an OPERA arrival or departure (`kind`: "arrivals" / "departures").
+
+    A stay's arrival and departure share a confirmation number, so the
+    record type is part of the ID (e.g. "arrival:ER260209-001").
+    """
+    confirmation = guest.get("confirmationNo")
+    if confirmation:
+        return f"{kind[:-1]}:{confirmation}"
+    return f"OPERA-{date}-{kind}-{position}"
+
+
+def records_from_sources(get_raw: Callable[[str], Any]) -> list[GuestRecord]:
+    """
+    Extract guest records from the raw OPERA, spa and concierge payloads.
+
+    Args:
+        get_raw: Returns the raw payload for a source file, or None
+            (e.g. `GuestMatcher._get_raw_data` or `raw_cache.get`).
+    """
+    records = []
+
+    opera = get_raw("opera-pms.json") or {}
+    for day in opera.get("dailyStats", []):
+        for kind in ("arrivals", "departures"):
+            for i, guest in enumerate(day.get(kind, [])):
+                records.append(GuestRecord(
+                    record_id=opera_record_id(kind, guest, day["date"], i),
+                    source="opera",
+                    name=guest.get("guestName", ""),
+                    email=guest.get("email"),
+                    phone=guest.get("phone"),
+                    room=guest.get("roomNo"),
+                    date=day["date"],
+                    data=guest,
+                ))
+
+    spa = get_raw("spa-tac.json") or {}
+    for day in spa.get("dailyData", []):
+        for booking in day.get("bookings", []):
+            records.append(GuestRecord(
+                record_id=booking.get("id", ""),
+                source="spa",
+                name=booking.get("guest", ""),
+                room=booking.get("room"),
+                date=day["date"],
+                data=booking,
+            ))
+
+    concierge = get_raw("concierge.json") or {}
+    for req in concierge.get("conciergeRequests", []):
+        records.append(GuestRecord(
+            record_id=req.get("id", ""),
+            source="concierge",
+            name=req.get("guest", ""),
+            room=req.get("room"),
+            date=req.get("date"),
+            data=req,
+        ))
+
+    return [r for r in records if r.name.strip().lower() not in _PLACEHOLDER_NAMES]
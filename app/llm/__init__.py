@@ -2,24 +2,40 @@
 
 from __future__ import annotations
 
+import threading
+
 from .base import BaseLLM
 from .openai_llm import OpenAILLM
 from .anthropic_llm import AnthropicLLM
 from .mistral_llm import MistralLLM
 from .local_llm import LocalLLM
+from .router import LLMRouter, LatencyTracker, get_latency_tracker
+from .http import close_sessions, get_session
+from .cache import ResponseCache, get_response_cache
+from .telemetry import TelemetrySink, get_telemetry
+from .ratelimit import TokenBucket, call_llm, call_with_retry, get_rate_limiter
 
 PROVIDERS: dict[str, type[BaseLLM]] = {
     "openai": OpenAILLM,
     "anthropic": AnthropicLLM,
     "mistral": MistralLLM,
     "local": LocalLLM,
+    "router": LLMRouter,
 }
 
 
+_instances: dict[str, BaseLLM] = {}
+_instances_lock = threading.Lock()
+
+
 def get_provider(name: str) -> BaseLLM:
-    """Instantiate and return the named LLM provider."""
-    cls = PROVIDERS.get(name.lower())
+    """Return the named LLM provider (one shared instance per provider)."""
+    key = name.lower()
+    cls = PROVIDERS.get(key)
     if not cls:
         available = ", ".join(PROVIDERS.keys())
         raise ValueError(f"Unknown LLM provider '{name}'. Available: {available}")
-    return cls()
+    with _instances_lock:
+        if not isinstance(_instances.get(key), cls):
+            _instances[key] = cls()
+        return _instances[key]
@@ -1,26 +1,58 @@
-"""Anthropic LLM provider (Claude)."""
+"""
+Anthropic LLM provider (Claude).
+
+With LLM_PROMPT_CACHE on, the system prompt and the stable prompt prefix
+are sent as separate blocks marked `cache_control: ephemeral`, so calls
+sharing them (every arrival brief, every recap section) read the prefix
+from Anthropic's prompt cache at a fraction of the prefill time and cost.
+Prefixes shorter than the model's minimum cacheable length are simply
+not cached.
+"""
+
+import json
+from typing import Iterator
 
-import requests
 from .base import BaseLLM
+from .http import get_session, iter_sse, request_timeout
 from config import settings
 
 
 class AnthropicLLM(BaseLLM):
     API_URL = "https://api.anthropic.com/v1/messages"
+    name = "anthropic"
+    temperature = None  # provider default
+
+    @property
+    def model(self) -> str:
+        return settings.ANTHROPIC_MODEL
+
+    @property
+    def cache_hints(self) -> bool:
+        return settings.LLM_PROMPT_CACHE
 
-    def generate(self, prompt: str, system_prompt: str = "") -> str:
+    def _post(self, prompt: str, system_prompt: str, stream: bool, prefix: str = ""):
         if not settings.ANTHROPIC_API_KEY:
             raise RuntimeError("ANTHROPIC_API_KEY not set. Add it to .env or environment.")
 
+        content: str | list[dict] = prompt
+        if prefix:
+            content = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": prompt},
+            ]
         body = {
-            "model": settings.ANTHROPIC_MODEL,
+            "model": self.model,
             "max_tokens": 4096,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": [{"role": "user", "content": content}],
         }
-        if system_prompt:
+        if system_prompt and self.cache_hints:
+            body["system"] = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        elif system_prompt:
             body["system"] = system_prompt
+        if stream:
+            body["stream"] = True
 
-        resp = requests.post(
+        resp = get_session(self.API_URL).post(
             self.API_URL,
             headers={
                 "x-api-key": settings.ANTHROPIC_API_KEY,
@@ -28,8 +60,45 @@ class AnthropicLLM(BaseLLM):
                 "Content-Type": "application/json",
             },
             json=body,
-            timeout=120,
+            timeout=request_timeout(settings.LLM_READ_TIMEOUT),
+            stream=stream,
         )
         resp.raise_for_status()
-        data = resp.json()
+        return resp
+
+    def _report_input_usage(self, usage: dict) -> None:
+        # input_tokens excludes the tokens written to / read from the prompt cache
+        if usage.get("input_tokens") is None:
+            return
+        self._report_usage(
+            prompt_tokens=usage["input_tokens"]
+            + (usage.get("cache_creation_input_tokens") or 0)
+            + (usage.get("cache_read_input_tokens") or 0),
+            cached_tokens=usage.get("cache_read_input_tokens") or 0,
+        )
+
+    def _generate(self, prompt: str, system_prompt: str = "", prefix: str = "") -> str:
+        data = self._post(prompt, system_prompt, stream=False, prefix=prefix).json()
+        usage = data.get("usage") or {}
+        self._report_input_usage(usage)
+        self._report_usage(completion_tokens=usage.get("output_tokens"))
         return data["content"][0]["text"]
+
+    def _stream(self, prompt: str, system_prompt: str = "", prefix: str = "") -> Iterator[str]:
+        with self._post(prompt, system_prompt, stream=True, prefix=prefix) as resp:
+            for event, data in iter_sse(resp):
+                if event == "message_stop":
+                    break
+                if event == "error":
+                    raise RuntimeError(f"Anthropic stream error: {data}")
+                if event == "message_start":
+                    usage = json.loads(data).get("message", {}).get("usage") or {}
+                    self._report_input_usage(usage)
+                elif event == "message_delta":
+                    usage = json.loads(data).get("usage") or {}
+                    self._report_usage(completion_tokens=usage.get("output_tokens"))
+                if event != "content_block_delta":
+                    continue
+                delta = json.loads(data).get("delta", {})
+                if delta.get("type") == "text_delta" and delta.get("text"):
+                    yield delta["text"]
@@ -1,21 +1,161 @@
 """Base LLM class — interface that all providers implement."""
 
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 
 class BaseLLM(ABC):
-    """Abstract LLM provider."""
+    """
+    Abstract LLM provider.
 
+    Providers implement `_generate()` (and `_stream()` for token
+    streaming); callers use `generate()` / `generate_stream()`, which
+    answer repeated identical requests from the response cache and record
+    telemetry for every call. Providers report token usage from the API
+    response with `_report_usage()`.
+
+    Callers may split the user prompt into a stable `prefix` (instructions
+    that are the same on every call) and the variable `prompt`. Providers
+    with explicit prompt caching (`cache_hints = True`) receive both and
+    mark the system prompt and prefix cacheable; the others receive
+    `prefix + prompt`, where a stable leading prefix still benefits from
+    automatic prefix caching (OpenAI, Ollama).
+
+    Providers that rate-limit and recover from failures on their own
+    (`self_limiting = True`, the router) are called once by `call_llm()`,
+    without the shared limiter and retries.
+    """
+
+    name: str = ""
+    temperature: float | None = 0.4
+    cache_hints: bool = False
+    self_limiting: bool = False
+
+    _usage = threading.local()
+
+    @property
     @abstractmethod
-    def generate(self, prompt: str, system_prompt: str = "") -> str:
+    def model(self) -> str:
+        """Model identifier sent to the provider."""
+        ...
+
+    def generate(self, prompt: str, system_prompt: str = "", prefix: str = "") -> str:
         """
         Send a prompt to the LLM and return the generated text.
 
         Args:
             prompt: The user/main prompt.
             system_prompt: System-level instructions.
+            prefix: Stable start of the user prompt, sent before `prompt`
+                and marked cacheable where the provider supports it.
 
         Returns:
             Generated text string.
         """
+        from .cache import cache_key, get_response_cache
+        from .telemetry import record_call
+
+        full_prompt = prefix + prompt
+        started = time.perf_counter()
+        cache = get_response_cache()
+        key = None
+        if cache is not None:
+            key = cache_key(self.name, self.model, system_prompt, full_prompt, self.temperature)
+            cached = cache.get(key)
+            if cached is not None:
+                record_call(self, full_prompt, system_prompt, cached, started, cached=True)
+                return cached
+
+        self._usage.__dict__.clear()
+        try:
+            if self.cache_hints and prefix:
+                text = self._generate(prompt, system_prompt, prefix=prefix)
+            else:
+                text = self._generate(full_prompt, system_prompt)
+        except Exception as e:
+            record_call(self, full_prompt, system_prompt, "", started, error=str(e))
+            raise
+        record_call(self, full_prompt, system_prompt, text, started, usage=dict(self._usage.__dict__))
+
+        if cache is not None and text:
+            cache.put(key, text)
+        return text
+
+    def generate_stream(self, prompt: str, system_prompt: str = "", prefix: str = "") -> Iterator[str]:
+        """
+        Like `generate()`, but yield text chunks as the provider produces them.
+
+        A cached response is yielded as a single chunk; a streamed response
+        is cached once it has completed.
+        """
+        from .cache import cache_key, get_response_cache
+        from .telemetry import record_call
+
+        full_prompt = prefix + prompt
+        started = time.perf_counter()
+        cache = get_response_cache()
+        key = None
+        if cache is not None:
+            key = cache_key(self.name, self.model, system_prompt, full_prompt, self.temperature)
+            cached = cache.get(key)
+            if cached is not None:
+                record_call(self, full_prompt, system_prompt, cached, started, cached=True, streamed=True)
+                yield cached
+                return
+
+        self._usage.__dict__.clear()
+        parts = []
+        first_token_at = None
+        if self.cache_hints and prefix:
+            chunks = self._stream(prompt, system_prompt, prefix=prefix)
+        else:
+            chunks = self._stream(full_prompt, system_prompt)
+        try:
+            for chunk in chunks:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            record_call(self, full_prompt, system_prompt, "".join(parts), started, first_token_at,
+                        streamed=True, error=str(e))
+            raise
+        text = "".join(parts)
+        record_call(self, full_prompt, system_prompt, text, started, first_token_at,
+                    usage=dict(self._usage.__dict__), streamed=True)
+        if cache is not None and parts:
+            cache.put(key, text)
+
+    def _report_usage(
+        self,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        cached_tokens: int | None = None,
+    ) -> None:
+        """
+        Record token counts reported by the provider for the current call.
+
+        `prompt_tokens` is the full prompt size; `cached_tokens` the part of
+        it served from the provider's prompt cache.
+        """
+        if prompt_tokens is not None:
+            self._usage.prompt_tokens = prompt_tokens
+        if completion_tokens is not None:
+            self._usage.completion_tokens = completion_tokens
+        if cached_tokens is not None:
+            self._usage.cached_tokens = cached_tokens
+
+    @abstractmethod
+    def _generate(self, prompt: str, system_prompt: str = "") -> str:
+        """
+        Call the provider API (uncached).
+
+        Providers with `cache_hints` also accept a `prefix` keyword.
+        """
         ...
+
+    def _stream(self, prompt: str, system_prompt: str = "", **kwargs) -> Iterator[str]:
+        """Call the provider API in streaming mode (default: one chunk)."""
+        yield self._generate(prompt, system_prompt, **kwargs)
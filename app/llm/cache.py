@@ -0,0 +1,137 @@
+"""
+LLM response cache — content-addressed, persistent, size-bounded.
+
+Completions are keyed by a SHA-256 of (provider, model, system prompt,
+prompt, temperature), so a byte-identical request — a rerun after a
+delivery failure, an unchanged guest profile — is answered from disk
+instead of paying the provider's latency again.
+
+Entries expire after LLM_CACHE_TTL seconds; beyond LLM_CACHE_MAX_ENTRIES
+the least recently used entries are evicted. The cache is a small SQLite
+database (WAL) shared by every provider and safe to use from worker threads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import settings
+
+
+def cache_key(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    temperature: float | None,
+) -> str:
+    """Content address of one completion request."""
+    payload = json.dumps(
+        [provider, model, system_prompt, prompt, temperature],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent LRU + TTL cache of LLM completions."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+    ):
+        self.path = Path(path or settings.LLM_CACHE_PATH)
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        """Cached response for `key`, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl > 0 and now - row[1] > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response, evicting least recently used entries over the bound."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            if self.max_entries > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "  SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        """Drop every cached response and reset the counters."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the current entry count."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def __len__(self) -> int:
+        return self.stats()["entries"]
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """The process-wide response cache, or None when LLM_CACHE is off."""
+    global _cache
+    if not settings.LLM_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,81 @@
+"""
+LLM HTTP sessions — keep-alive connection pools shared per base URL.
+
+Every provider call used to go through `requests.post`, paying a fresh
+TCP + TLS handshake per completion. `get_session()` hands out one
+`requests.Session` per provider base URL, mounted with a connection pool
+sized for concurrent brief generation (LLM_POOL_SIZE). `requests.Session`
+is safe for concurrent requests through its urllib3 pool, and sessions are
+created under a lock so parallel workers share a single pool.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import settings
+
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def base_url(url: str) -> str:
+    """Scheme + host (+ port) of `url`, the pool key."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    """The shared keep-alive session for `url`'s base URL."""
+    key = base_url(url)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.LLM_POOL_SIZE,
+                pool_block=True,
+            )
+            session.mount(key, adapter)
+            _sessions[key] = session
+        return session
+
+
+def request_timeout(read_timeout: float) -> tuple[float, float]:
+    """(connect, read) timeout tuple for a provider call."""
+    return (settings.LLM_CONNECT_TIMEOUT, read_timeout)
+
+
+def iter_sse(resp: requests.Response) -> Iterator[tuple[str, str]]:
+    """Parse a server-sent event stream into `(event, data)` pairs."""
+    event, data = "message", []
+    for raw in resp.iter_lines():
+        # Decode ourselves: streams often omit the charset (UTF-8 per spec)
+        line = raw.decode("utf-8")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, "\n".join(data)
+
+
+def close_sessions() -> None:
+    """Close every pooled session (e.g. at shutdown)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -1,30 +1,143 @@
-"""Local LLM provider via Ollama."""
+"""
+Local LLM provider via Ollama.
+
+Uses the chat endpoint with the system prompt as its own message, so
+consecutive calls sharing a system prompt (every arrival brief) reuse
+the server's cached prompt prefix instead of re-evaluating it. The model
+is pinned in memory with keep_alive for the whole run, can be pre-warmed
+while data is still being collected, and requests are capped at the
+server's parallelism (OLLAMA_NUM_PARALLEL) so extra workers queue here
+rather than thrash the server.
+
+Ollama reports token counts and timings with every completion; they are
+kept in `stats` and summarised by `throughput()` for hardware sizing.
+"""
+
+import json
+import threading
+from typing import Iterator
 
-import requests
 from .base import BaseLLM
+from .http import get_session, request_timeout
 from config import settings
 
 
 class LocalLLM(BaseLLM):
+    name = "local"
+
+    def __init__(self):
+        self._slots = threading.BoundedSemaphore(max(settings.OLLAMA_NUM_PARALLEL, 1))
+        self._stats_lock = threading.Lock()
+        self.stats: list[dict] = []
+        self._warm_thread: threading.Thread | None = None
 
-    def generate(self, prompt: str, system_prompt: str = "") -> str:
-        url = f"{settings.OLLAMA_BASE_URL}/api/generate"
+    @property
+    def model(self) -> str:
+        return settings.OLLAMA_MODEL
 
-        full_prompt = ""
+    @property
+    def url(self) -> str:
+        return f"{settings.OLLAMA_BASE_URL}/api/chat"
+
+    def _post(self, prompt: str, system_prompt: str, stream: bool):
+        messages = []
         if system_prompt:
-            full_prompt = f"{system_prompt}\n\n---\n\n{prompt}"
-        else:
-            full_prompt = prompt
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
 
-        resp = requests.post(
-            url,
+        resp = get_session(self.url).post(
+            self.url,
             json={
-                "model": settings.OLLAMA_MODEL,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {"temperature": 0.4},
+                "model": self.model,
+                "messages": messages,
+                "stream": stream,
+                "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+                "options": {"temperature": self.temperature},
             },
-            timeout=300,
+            timeout=request_timeout(settings.OLLAMA_TIMEOUT),
+            stream=stream,
         )
         resp.raise_for_status()
-        return resp.json().get("response", "")
+        return resp
+
+    def _generate(self, prompt: str, system_prompt: str = "") -> str:
+        with self._slots:
+            data = self._post(prompt, system_prompt, stream=False).json()
+        self._record(data)
+        return data.get("message", {}).get("content", "")
+
+    def _stream(self, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        # Ollama streams newline-delimited JSON objects; the last carries the stats
+        with self._slots, self._post(prompt, system_prompt, stream=True) as resp:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line.decode("utf-8"))
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                text = chunk.get("message", {}).get("content")
+                if text:
+                    yield text
+                if chunk.get("done"):
+                    self._record(chunk)
+                    break
+
+    # ── Warm-up ──────────────────────────────
+
+    def warm_up(self, wait: bool = False) -> None:
+        """
+        Load the model and pin it for OLLAMA_KEEP_ALIVE.
+
+        An empty chat request makes Ollama load the model without
+        generating. With wait=False this runs in the background (e.g.
+        during data collection); requests sent meanwhile wait on the
+        server for the load to finish rather than triggering another.
+        """
+        if self._warm_thread is None:
+            self._warm_thread = threading.Thread(target=self._load_model, name="ollama-warm-up", daemon=True)
+            self._warm_thread.start()
+        if wait:
+            self._warm_thread.join()
+
+    def _load_model(self) -> None:
+        with self._slots:
+            try:
+                resp = get_session(self.url).post(
+                    self.url,
+                    json={"model": self.model, "messages": [], "keep_alive": settings.OLLAMA_KEEP_ALIVE},
+                    timeout=request_timeout(settings.OLLAMA_TIMEOUT),
+                )
+                resp.raise_for_status()
+                self._record(resp.json())
+            except Exception:
+                # Warm-up is best effort; the first real call reports errors
+                pass
+
+    # ── Throughput ───────────────────────────
+
+    def _record(self, data: dict) -> None:
+        stats = {
+            key: data.get(key, 0)
+            for key in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "load_duration")
+        }
+        with self._stats_lock:
+            self.stats.append(stats)
+        if data.get("eval_count"):
+            self._report_usage(data.get("prompt_eval_count"), data.get("eval_count"))
+
+    def throughput(self) -> dict:
+        """Generation / prompt tokens per second and model load time over this run's calls."""
+        with self._stats_lock:
+            stats = list(self.stats)
+        eval_tokens = sum(s["eval_count"] for s in stats)
+        eval_seconds = sum(s["eval_duration"] for s in stats) / 1e9
+        prompt_tokens = sum(s["prompt_eval_count"] for s in stats)
+        prompt_seconds = sum(s["prompt_eval_duration"] for s in stats) / 1e9
+        return {
+            "calls": sum(1 for s in stats if s["eval_count"]),
+            "completion_tokens": eval_tokens,
+            "completion_tokens_per_s": eval_tokens / eval_seconds if eval_seconds else 0.0,
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_per_s": prompt_tokens / prompt_seconds if prompt_seconds else 0.0,
+            "load_seconds": sum(s["load_duration"] for s in stats) / 1e9,
+        }
@@ -1,14 +1,22 @@
 """OpenAI LLM provider (GPT-4, etc.)."""
 
-import requests
+import json
+from typing import Iterator
+
 from .base import BaseLLM
+from .http import get_session, iter_sse, request_timeout
 from config import settings
 
 
 class OpenAILLM(BaseLLM):
     API_URL = "https://api.openai.com/v1/chat/completions"
+    name = "openai"
+
+    @property
+    def model(self) -> str:
+        return settings.OPENAI_MODEL
 
-    def generate(self, prompt: str, system_prompt: str = "") -> str:
+    def _post(self, prompt: str, system_prompt: str, stream: bool):
         if not settings.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY not set. Add it to .env or environment.")
 
@@ -17,19 +25,48 @@ class OpenAILLM(BaseLLM):
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
-        resp = requests.post(
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": 4096,
+        }
+        if stream:
+            body["stream"] = True
+            # Final chunk carries token usage
+            body["stream_options"] = {"include_usage": True}
+
+        resp = get_session(self.API_URL).post(
             self.API_URL,
             headers={
                 "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
                 "Content-Type": "application/json",
             },
-            json={
-                "model": settings.OPENAI_MODEL,
-                "messages": messages,
-                "temperature": 0.4,
-                "max_tokens": 4096,
-            },
-            timeout=120,
+            json=body,
+            timeout=request_timeout(settings.LLM_READ_TIMEOUT),
+            stream=stream,
         )
         resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"]
+        return resp
+
+    def _generate(self, prompt: str, system_prompt: str = "") -> str:
+        data = self._post(prompt, system_prompt, stream=False).json()
+        self._report_openai_usage(data.get("usage") or {})
+        return data["choices"][0]["message"]["content"]
+
+    def _stream(self, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        with self._post(prompt, system_prompt, stream=True) as resp:
+            for _, data in iter_sse(resp):
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                self._report_openai_usage(chunk.get("usage") or {})
+                choices = chunk.get("choices") or [{}]
+                text = choices[0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+    def _report_openai_usage(self, usage: dict) -> None:
+        # Prompts of 1024+ tokens are prefix-cached automatically
+        details = usage.get("prompt_tokens_details") or {}
+        self._report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"), details.get("cached_tokens"))
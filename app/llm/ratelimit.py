@@ -0,0 +1,136 @@
+"""
+LLM rate limiting & retries — keeps concurrent callers within provider quotas.
+
+Each provider gets one shared token bucket (LLM_REQUESTS_PER_MINUTE with a
+burst of LLM_BURST, at least RECAP_SECTION_WORKERS), so any number of
+worker threads together stay under the provider's request rate.
+`call_with_retry()` retries rate-limited (429) and server-side (5xx)
+failures with jittered exponential backoff, honouring a Retry-After header
+when the provider sends one. `call_llm()` picks both for a provider.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+import requests
+
+from config import settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """The process-wide token bucket for `provider` (created on first use)."""
+    key = provider.lower()
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = TokenBucket(
+                rate=settings.LLM_REQUESTS_PER_MINUTE / 60.0,
+                # A sectioned recap's concurrent first wave must not queue
+                capacity=max(settings.LLM_BURST, settings.RECAP_SECTION_WORKERS),
+            )
+        return _limiters[key]
+
+
+def _retry_after(error: requests.HTTPError) -> float | None:
+    """Seconds from a Retry-After header, if present and numeric."""
+    value = error.response.headers.get("Retry-After") if error.response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for 429 / 5xx HTTP errors and transient connection failures."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    limiter: TokenBucket | None = None,
+    max_retries: int | None = None,
+    base_delay: float | None = None,
+) -> T:
+    """
+    Call `fn`, retrying retryable failures with full-jitter exponential backoff.
+
+    Args:
+        fn: Zero-argument callable making one LLM request.
+        limiter: Token bucket to draw from before every attempt.
+        max_retries: Retries after the first attempt (default: LLM_MAX_RETRIES).
+        base_delay: Backoff base in seconds (default: LLM_RETRY_BASE_DELAY).
+    """
+    if max_retries is None:
+        max_retries = settings.LLM_MAX_RETRIES
+    if base_delay is None:
+        base_delay = settings.LLM_RETRY_BASE_DELAY
+
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, base_delay * (2 ** attempt))
+            if isinstance(e, requests.HTTPError):
+                delay = max(delay, _retry_after(e) or 0.0)
+            time.sleep(delay)
+            attempt += 1
+
+
+def call_llm(llm, fn: Callable[[], T]) -> T:
+    """
+    Call `fn` (one request to `llm`) through llm's rate limiter, with retries.
+
+    A self-limiting provider such as the router is called once as is: it
+    draws from each provider's own limiter and falls back across providers,
+    so wrapping it would pay the rate limit twice and multiply every retry
+    by the length of the chain.
+    """
+    if llm.self_limiting:
+        return fn()
+    return call_with_retry(fn, limiter=get_rate_limiter(llm.name))
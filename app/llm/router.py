@@ -0,0 +1,234 @@
+"""
+LLM router — provider fallback chain with hedged requests.
+
+The router tries an ordered list of providers (e.g. local → mistral →
+anthropic). A provider that fails hands over to the next immediately. A
+provider that is merely slow is hedged: once it has run longer than its
+usual latency, the next provider is started too, and whichever answers
+first wins. The slower request is cancelled if it has not started yet;
+one already in flight finishes in the background and its answer is
+discarded.
+
+The hedge threshold is a latency percentile per provider
+(LLM_HEDGE_PERCENTILE). Latencies are kept in a rolling window persisted
+across runs, so even a once-a-day recap tunes itself. Until a provider
+has enough samples, LLM_HEDGE_AFTER seconds is used instead.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import Iterator
+
+from config import settings
+from threads import ContextThreadPoolExecutor
+
+from .base import BaseLLM
+
+
+class LatencyTracker:
+    """Rolling per-provider latency samples with percentile queries."""
+
+    def __init__(self, path: Path | None = None, window: int = 100, min_samples: int = 5):
+        self.path = Path(path or settings.LLM_LATENCY_PATH)
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return
+        for provider, samples in data.items():
+            self._samples[provider] = deque(samples[-self.window:], maxlen=self.window)
+
+    def save(self) -> None:
+        """Persist the samples (atomically, via a temp file)."""
+        with self._lock:
+            data = {p: list(s) for p, s in self._samples.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(round(seconds, 3))
+
+    def percentile(self, provider: str, pct: float) -> float | None:
+        """`pct`-th percentile latency in seconds, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = (len(samples) - 1) * pct / 100.0
+        low = int(rank)
+        high = min(low + 1, len(samples) - 1)
+        return samples[low] + (samples[high] - samples[low]) * (rank - low)
+
+    def summary(self) -> dict[str, dict[str, float | int]]:
+        """p50 / p95 and sample count per provider."""
+        with self._lock:
+            providers = list(self._samples)
+        return {
+            p: {
+                "n": len(self._samples[p]),
+                "p50": self.percentile(p, 50),
+                "p95": self.percentile(p, 95),
+            }
+            for p in providers
+        }
+
+
+_tracker: LatencyTracker | None = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """The process-wide latency tracker."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LatencyTracker()
+        return _tracker
+
+
+class LLMRouter(BaseLLM):
+    """
+    Ordered provider chain with fallback and hedging.
+
+    Args:
+        providers: Provider names in preference order (default: LLM_FALLBACK_CHAIN).
+        hedge_after: Fixed hedge delay in seconds; default is each provider's
+            latency percentile, falling back to LLM_HEDGE_AFTER.
+        deadline: Give up after this many seconds (default: LLM_DEADLINE).
+    """
+
+    name = "router"
+    self_limiting = True    # per-provider limiters in _call, fallback instead of retries
+
+    def __init__(
+        self,
+        providers: list[str] | None = None,
+        hedge_after: float | None = None,
+        deadline: float | None = None,
+        tracker: LatencyTracker | None = None,
+    ):
+        if providers is None:
+            providers = [p.strip() for p in settings.LLM_FALLBACK_CHAIN.split(",") if p.strip()]
+        if not providers:
+            raise ValueError("LLM router needs at least one provider (set LLM_FALLBACK_CHAIN)")
+        if "router" in (p.lower() for p in providers):
+            raise ValueError("LLM_FALLBACK_CHAIN cannot contain 'router'")
+        self.providers = providers
+        self.hedge_after = hedge_after
+        self.deadline = deadline if deadline is not None else settings.LLM_DEADLINE
+        self.tracker = tracker or get_latency_tracker()
+        self._pool = ContextThreadPoolExecutor(max_workers=max(len(providers), 1) * 4, thread_name_prefix="llm-router")
+
+    @property
+    def model(self) -> str:
+        return "+".join(self.providers)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on `provider` before also starting the next one."""
+        if self.hedge_after is not None:
+            return self.hedge_after
+        observed = self.tracker.percentile(provider, settings.LLM_HEDGE_PERCENTILE)
+        return observed if observed is not None else settings.LLM_HEDGE_AFTER
+
+    def _call(self, provider: str, prompt: str, system_prompt: str, prefix: str = "") -> tuple[str, str]:
+        from . import get_provider
+        from .ratelimit import get_rate_limiter
+
+        llm = get_provider(provider)
+        get_rate_limiter(provider).acquire()
+        started = time.perf_counter()
+        text = llm.generate(prompt=prompt, system_prompt=system_prompt, prefix=prefix)
+        self.tracker.record(provider, time.perf_counter() - started)
+        return provider, text
+
+    def generate(self, prompt: str, system_prompt: str = "", prefix: str = "") -> str:
+        """First successful answer from the chain (each provider caches its own responses)."""
+        started = time.monotonic()
+        queue = list(self.providers)
+        running: dict[Future, str] = {}
+        errors: list[str] = []
+        next_hedge = started
+
+        try:
+            while True:
+                now = time.monotonic()
+                # Start the next provider on failure (nothing running) or hedge timeout
+                if queue and (not running or now >= next_hedge):
+                    provider = queue.pop(0)
+                    running[self._pool.submit(self._call, provider, prompt, system_prompt, prefix)] = provider
+                    next_hedge = now + self.hedge_delay(provider)
+                if not running:
+                    raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+                remaining = self.deadline - (now - started)
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No LLM answer within {self.deadline:g}s "
+                        f"(tried {', '.join(self.providers[:len(self.providers) - len(queue)])})"
+                    )
+                timeout = min(remaining, max(next_hedge - now, 0)) if queue else remaining
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    provider = running.pop(future)
+                    try:
+                        _, text = future.result()
+                        return text
+                    except Exception as e:
+                        errors.append(f"{provider}: {e}")
+        finally:
+            for future in running:
+                future.cancel()
+            try:
+                self.tracker.save()
+            except OSError:
+                pass
+
+    def generate_stream(self, prompt: str, system_prompt: str = "", prefix: str = "") -> Iterator[str]:
+        """
+        Stream from the first provider that starts answering.
+
+        Falls back to the next provider if one fails before its first
+        token; once tokens have been yielded the stream is not switched.
+        """
+        from . import get_provider
+
+        errors = []
+        for provider in self.providers:
+            started = time.perf_counter()
+            stream = get_provider(provider).generate_stream(prompt=prompt, system_prompt=system_prompt, prefix=prefix)
+            try:
+                first = next(stream)
+            except StopIteration:
+                return
+            except Exception as e:
+                errors.append(f"{provider}: {e}")
+                continue
+            yield first
+            yield from stream
+            self.tracker.record(provider, time.perf_counter() - started)
+            return
+        raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+    def _generate(self, prompt: str, system_prompt: str = "", prefix: str = "") -> str:
+        return self.generate(prompt, system_prompt, prefix)
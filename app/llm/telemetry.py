@@ -0,0 +1,242 @@
+"""
+LLM telemetry — per-call latency, tokens and cost.
+
+Every `BaseLLM.generate()` / `generate_stream()` call is recorded with its
+provider, model, prompt and completion tokens (from the API's usage
+fields, or estimated at ~4 characters per token when a provider reports
+none), prompt tokens read from the provider's prompt cache, wall time,
+time to first token, estimated cost and whether it was served from the
+response cache.
+
+Records go to a local SQLite database (LLM_TELEMETRY_PATH); `run_summary()`
+covers the calls made by this process (the CLI summary line) and
+`aggregate()` groups history by day and provider for the dashboard.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import settings
+
+
+# USD per million (prompt, completion) tokens; local models are free.
+# Override or extend with LLM_PRICES='{"model": [prompt, completion]}'.
+PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+    "claude-3-5-haiku-latest": (0.80, 4.00),
+    "mistral-large-latest": (2.00, 6.00),
+    "mistral-small-latest": (0.20, 0.60),
+}
+
+# Price of a prompt token read from the provider's prompt cache, relative
+# to an uncached one.
+CACHED_PROMPT_DISCOUNT: dict[str, float] = {
+    "anthropic": 0.10,
+    "openai": 0.50,
+}
+
+
+def _prices() -> dict[str, tuple[float, float]]:
+    prices = dict(PRICES)
+    overrides = os.getenv("LLM_PRICES")
+    if overrides:
+        try:
+            prices.update({model: tuple(p) for model, p in json.loads(overrides).items()})
+        except (ValueError, TypeError):
+            pass
+    return prices
+
+
+def estimate_cost(
+    provider: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+) -> float:
+    """Estimated USD cost of one call (0 for local and unknown models)."""
+    if provider == "local":
+        return 0.0
+    price = _prices().get(model)
+    if not price:
+        return 0.0
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    prompt_cost = (prompt_tokens - cached_tokens + cached_tokens * CACHED_PROMPT_DISCOUNT.get(provider, 1.0)) * price[0]
+    return (prompt_cost + completion_tokens * price[1]) / 1_000_000
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count when the provider reports none."""
+    return (len(text) + 3) // 4
+
+
+class TelemetrySink:
+    """SQLite sink for LLM call records."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            cached_tokens INTEGER NOT NULL DEFAULT 0,
+            tokens_estimated INTEGER NOT NULL DEFAULT 0,
+            latency_ms REAL NOT NULL,
+            ttft_ms REAL,
+            cost_usd REAL NOT NULL DEFAULT 0,
+            cached INTEGER NOT NULL DEFAULT 0,
+            streamed INTEGER NOT NULL DEFAULT 0,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts);
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path or settings.LLM_TELEMETRY_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(llm_calls)")}
+            if "cached_tokens" not in columns:
+                # Databases created before prompt-cache reporting
+                self._conn.execute("ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0")
+        self.session: list[dict] = []
+
+    def record(self, call: dict) -> None:
+        with self._lock:
+            self.session.append(call)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO llm_calls (ts, provider, model, prompt_tokens, completion_tokens, "
+                    "cached_tokens, tokens_estimated, latency_ms, ttft_ms, cost_usd, cached, streamed, error) "
+                    "VALUES (:ts, :provider, :model, :prompt_tokens, :completion_tokens, "
+                    ":cached_tokens, :tokens_estimated, :latency_ms, :ttft_ms, :cost_usd, :cached, :streamed, :error)",
+                    call,
+                )
+
+    def run_summary(self) -> dict:
+        """Totals over the calls recorded by this process."""
+        with self._lock:
+            calls = list(self.session)
+        live = [c for c in calls if not c["cached"] and not c["error"]]
+        latencies = sorted(c["latency_ms"] for c in live)
+        ttfts = sorted(c["ttft_ms"] for c in live if c["ttft_ms"] is not None)
+        return {
+            "calls": len(calls),
+            "cached": sum(1 for c in calls if c["cached"]),
+            "errors": sum(1 for c in calls if c["error"]),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in live),
+            "completion_tokens": sum(c["completion_tokens"] for c in live),
+            "cached_tokens": sum(c["cached_tokens"] for c in live),
+            "cost_usd": sum(c["cost_usd"] for c in live),
+            "latency_p50_ms": _percentile(latencies, 50),
+            "latency_p95_ms": _percentile(latencies, 95),
+            "ttft_p50_ms": _percentile(ttfts, 50),
+        }
+
+    def aggregate(self, days: int = 30) -> list[dict]:
+        """Per-day, per-provider/model totals for the last `days` days."""
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT substr(ts, 1, 10) AS day, provider, model, "
+                "       COUNT(*) AS calls, SUM(cached) AS cached, "
+                "       SUM(error IS NOT NULL) AS errors, "
+                "       SUM(prompt_tokens) AS prompt_tokens, "
+                "       SUM(completion_tokens) AS completion_tokens, "
+                "       SUM(cached_tokens) AS cached_tokens, "
+                "       ROUND(AVG(CASE WHEN cached = 0 AND error IS NULL THEN latency_ms END), 1) AS avg_latency_ms, "
+                "       ROUND(AVG(CASE WHEN cached = 0 AND error IS NULL THEN ttft_ms END), 1) AS avg_ttft_ms, "
+                "       ROUND(SUM(cost_usd), 4) AS cost_usd "
+                "FROM llm_calls WHERE ts >= ? "
+                "GROUP BY day, provider, model ORDER BY day, provider, model",
+                (since,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round((len(values) - 1) * pct / 100)))]
+
+
+_sink: TelemetrySink | None = None
+_sink_lock = threading.Lock()
+
+
+def get_telemetry() -> TelemetrySink | None:
+    """The process-wide telemetry sink, or None when LLM_TELEMETRY is off."""
+    global _sink
+    if not settings.LLM_TELEMETRY:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = TelemetrySink()
+        return _sink
+
+
+def record_call(
+    llm,
+    prompt: str,
+    system_prompt: str,
+    text: str,
+    started: float,
+    first_token_at: float | None = None,
+    usage: dict | None = None,
+    cached: bool = False,
+    streamed: bool = False,
+    error: str | None = None,
+) -> None:
+    """Record one LLM call (no-op when telemetry is off; never raises)."""
+    sink = get_telemetry()
+    if sink is None:
+        return
+    try:
+        usage = usage or {}
+        estimated = cached or usage.get("prompt_tokens") is None or usage.get("completion_tokens") is None
+        if cached:
+            prompt_tokens = completion_tokens = 0
+        else:
+            prompt_tokens = usage.get("prompt_tokens")
+            if prompt_tokens is None:
+                prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+            completion_tokens = usage.get("completion_tokens")
+            if completion_tokens is None:
+                completion_tokens = estimate_tokens(text)
+        cached_tokens = 0 if cached else usage.get("cached_tokens") or 0
+        now = time.perf_counter()
+        sink.record({
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "provider": llm.name,
+            "model": llm.model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "tokens_estimated": int(bool(estimated) and not cached),
+            "latency_ms": round((now - started) * 1000, 1),
+            "ttft_ms": round(((first_token_at or now) - started) * 1000, 1),
+            "cost_usd": 0.0 if cached else estimate_cost(
+                llm.name, llm.model, prompt_tokens, completion_tokens, cached_tokens,
+            ),
+            "cached": int(cached),
+            "streamed": int(streamed),
+            "error": error,
+        })
+    except Exception:
+        pass
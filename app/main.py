@@ -5,7 +5,7 @@ Hotel Intel — Daily Recap & Guest Intelligence.
 CLI entry point. Supports two modes:
   - recap:       Collect data, process KPIs, generate daily recap via LLM
   - guest-intel: Match today's arrivals across systems, build profiles, generate briefs
-  - both:        Run both modules
+  - both:        Run both modules concurrently, output grouped per module
 
 Usage:
     python main.py                              # Default: recap mode
@@ -14,14 +14,25 @@ Usage:
     python main.py --mode guest-intel --dry-run # Show profiles without LLM
     python main.py --date 2026-02-12            # Specific date
     python main.py --provider anthropic         # Override LLM provider
+    python main.py --generator sectioned        # Generate recap sections in parallel
+    python main.py --generator hybrid           # LLM narrative only, tables rendered locally
+    python main.py --generator mapreduce        # Digest long lists first (large properties)
+    python main.py --generator template         # Render the recap locally, no LLM
     python main.py --output console             # Output mode
+    python main.py --collector-workers 1        # Collect sources sequentially
+    python main.py --mode both --module-workers 1  # Run the two modules one after the other
+    python main.py --mode guest-intel --rebuild-profiles  # Rebuild profiles from all history
 """
 
 from __future__ import annotations
 
 import argparse
+import contextvars
+import copy
 import json
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
@@ -29,10 +40,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import settings
-from collectors import ALL_COLLECTORS
+from collectors import ALL_COLLECTORS, raw_cache
 from processor import process
-from generator import generate_recap
+from generator import (
+    GENERATORS, describe_changes, describe_prompt, describe_reduction, generate_recap, generate_recap_stream,
+)
 from delivery import get_delivery
+from threads import ContextThreadPoolExecutor
 
 
 DEFAULT_DATE = "2026-02-13"
@@ -57,15 +71,60 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--provider", "-p",
         default=None,
-        choices=["openai", "anthropic", "mistral", "local"],
+        choices=["openai", "anthropic", "mistral", "local", "router"],
         help="LLM provider override (default: from .env)",
     )
+    parser.add_argument(
+        "--generator", "-g",
+        default=settings.RECAP_GENERATOR,
+        choices=GENERATORS,
+        help=f"Recap generator mode (default: {settings.RECAP_GENERATOR})",
+    )
     parser.add_argument(
         "--output", "-o",
         default=settings.DEFAULT_OUTPUT,
         choices=["console", "email", "telegram"],
         help=f"Delivery channel (default: {settings.DEFAULT_OUTPUT})",
     )
+    parser.add_argument(
+        "--collector-workers",
+        type=int,
+        default=settings.COLLECTOR_WORKERS,
+        help=f"Collectors to run concurrently, 1 = sequential (default: {settings.COLLECTOR_WORKERS})",
+    )
+    parser.add_argument(
+        "--module-workers",
+        type=int,
+        default=settings.MODULE_WORKERS,
+        help=f"Modules to run concurrently in --mode both, 1 = sequential (default: {settings.MODULE_WORKERS})",
+    )
+    parser.add_argument(
+        "--brief-workers",
+        type=int,
+        default=settings.BRIEF_WORKERS,
+        help=f"Arrival briefs to generate concurrently, 1 = sequential (default: {settings.BRIEF_WORKERS})",
+    )
+    parser.add_argument(
+        "--brief-batch-size",
+        type=int,
+        default=settings.BRIEF_BATCH_SIZE,
+        help=f"Guests per brief request, 1 = one request per guest (default: {settings.BRIEF_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--rebuild-profiles",
+        action="store_true",
+        help="Rebuild guest profiles from all history instead of merging only new records",
+    )
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Sectioned recap: regenerate every section instead of reusing unchanged ones",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call the LLM provider instead of reusing cached responses",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -74,32 +133,91 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def collect_all(target_date: str) -> dict:
-    """Run all collectors and return their outputs keyed by short name."""
-    collector_map = {
-        "opera": 0,    # OperaCollector
-        "spa": 1,      # SpaCollector
-        "fb": 2,       # FBCollector
-        "incidents": 3, # IncidentsCollector
-        "concierge": 4, # ConciergeCollector
-        "villas": 5,    # VillasCollector
-        "m365": 6,      # M365Collector
-    }
+COLLECTOR_KEYS = ["opera", "spa", "fb", "incidents", "concierge", "villas", "m365"]
 
-    results = {}
-    names = list(collector_map.keys())
 
-    for i, CollectorClass in enumerate(ALL_COLLECTORS):
-        name = names[i]
-        try:
-            collector = CollectorClass()
-            data = collector.collect(target_date)
-            results[name] = data
+def _run_collector(CollectorClass, target_date: str) -> tuple[dict, float]:
+    """Run one collector, returning its output and wall-clock seconds."""
+    started = time.perf_counter()
+    try:
+        data = CollectorClass().collect(target_date)
+    except Exception as e:
+        data = {"source": CollectorClass.SOURCE_NAME, "available": False, "error": str(e)}
+    return data, time.perf_counter() - started
+
+
+def collect_all(
+    target_date: str,
+    max_workers: int | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """
+    Run all collectors concurrently and return their outputs keyed by short name.
+
+    Each collector runs in a worker thread so the run takes roughly as long
+    as the slowest source. A collector that raises or exceeds ``timeout``
+    seconds is reported as ``available: False`` without affecting the others.
+
+    Args:
+        target_date: ISO date string.
+        max_workers: Max collectors in flight (default: COLLECTOR_WORKERS; 1 = sequential).
+        timeout: Per-collector timeout in seconds, counted from when that collector
+            starts (default: COLLECTOR_TIMEOUT).
+    """
+    max_workers = max(1, max_workers or settings.COLLECTOR_WORKERS)
+    timeout = timeout if timeout is not None else settings.COLLECTOR_TIMEOUT
+
+    raw_cache.clear()
+    results = {}
+    timings = {}
+    run_started = time.perf_counter()
+
+    # Collectors are fed to the pool as slots free up, so each one's
+    # timeout counts from when it actually starts, not from the run start.
+    # A collector that times out gives up its slot: its thread can't be
+    # stopped, so the pool keeps one thread per collector in reserve.
+    pool = ThreadPoolExecutor(max_workers=len(ALL_COLLECTORS), thread_name_prefix="collector")
+    queued = list(zip(COLLECTOR_KEYS, ALL_COLLECTORS))
+    running = {}    # future -> (name, started)
+    outcomes = {}   # name -> (data, elapsed); data is None when timed out
+    while queued or running:
+        while queued and len(running) < max_workers:
+            name, CollectorClass = queued.pop(0)
+            running[pool.submit(_run_collector, CollectorClass, target_date)] = (name, time.perf_counter())
+        next_deadline = min(started for _, started in running.values()) + timeout
+        wait(running, timeout=max(0.0, next_deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future, (name, started) in list(running.items()):
+            if future.done():
+                outcomes[name] = future.result()
+            elif now - started >= timeout:
+                outcomes[name] = None, now - started
+            else:
+                continue
+            del running[future]
+    pool.shutdown(wait=False)
+
+    for name, CollectorClass in zip(COLLECTOR_KEYS, ALL_COLLECTORS):
+        data, elapsed = outcomes[name]
+        if data is None:
+            data = {
+                "source": CollectorClass.SOURCE_NAME,
+                "available": False,
+                "error": f"timed out after {timeout:g}s",
+            }
+        results[name] = data
+        timings[name] = elapsed
+
+        took = f"{elapsed * 1000:,.0f}ms"
+        if data.get("error"):
+            print(f"  [✗] {CollectorClass.SOURCE_NAME}: {data['error']} ({took})", file=sys.stderr)
+        else:
             status = "✓" if data.get("available", False) else "⚠ no data"
-            print(f"  [{status}] {CollectorClass.SOURCE_NAME}")
-        except Exception as e:
-            print(f"  [✗] {CollectorClass.SOURCE_NAME}: {e}", file=sys.stderr)
-            results[name] = {"source": CollectorClass.SOURCE_NAME, "available": False, "error": str(e)}
+            print(f"  [{status}] {CollectorClass.SOURCE_NAME} ({took})")
+
+    wall = time.perf_counter() - run_started
+    print(f"  ⏱  {wall * 1000:,.0f}ms wall · {sum(timings.values()) * 1000:,.0f}ms summed "
+          f"· {max_workers} worker(s)")
 
     return results
 
@@ -118,27 +236,104 @@ def run_recap(collector_data: dict, target_date: str, args: argparse.Namespace)
         return
 
     provider = args.provider or settings.LLM_PROVIDER
-    print(f"🤖 Generating recap via {provider}...")
-    try:
-        recap = generate_recap(summary, provider_override=args.provider)
-    except Exception as e:
-        print(f"\n❌ LLM generation failed: {e}", file=sys.stderr)
-        print("   Tip: run with --dry-run to see processed data without LLM", file=sys.stderr)
+    channel = get_delivery(args.output)
+    subject = f"Hotel Intel — {settings.HOTEL_NAME} — {target_date}"
+
+    if args.generator == "template":
+        print("📝 Rendering recap from template (no LLM)...")
+        recap = generate_recap(summary, generator="template")
+        print()
+        print(f"📤 Delivering via {args.output}...")
+        channel.deliver(recap, subject=subject)
+        return
+
+    prompt_info = describe_prompt(summary)
+    trimmed = f" · trimmed to fit: {', '.join(prompt_info['truncated'])}" if prompt_info["truncated"] else ""
+    print(f"📏 Prompt ≈ {prompt_info['tokens']:,} tokens (budget {settings.PROMPT_TOKEN_BUDGET:,} for data){trimmed}")
+    if args.generator == "sectioned" and settings.RECAP_INCREMENTAL:
+        changes = describe_changes(summary)
+        if any(fields is not None for fields in changes.values()):
+            changed = [
+                f"{key} ({', '.join(fields)})" if fields else key
+                for key, fields in changes.items() if fields != []
+            ]
+            print(f"♻️  {len(changes) - len(changed)} of {len(changes)} section(s) unchanged since last run"
+                  + (f" · regenerating: {'; '.join(changed)}" if changed else ""))
+    if args.generator == "mapreduce":
+        plan = describe_reduction(summary, args.provider)
+        lists = ", ".join(f"{key} ({count})" for key, count in plan["lists"].items()) or "none"
+        print(f"🗜️  Context {plan['context_window']:,} tokens · data budget {plan['budget']:,} "
+              f"· lists to reduce ({plan['strategy']}): {lists}")
+
+    deadline = settings.RECAP_DEADLINE if settings.RECAP_TEMPLATE_FALLBACK else None
+    if args.generator == "single" and settings.LLM_STREAM and hasattr(channel, "deliver_stream"):
+        # Print tokens as they arrive instead of waiting for the full recap
+        print(f"🤖 Streaming recap via {provider} to {args.output}...")
+        print()
+        streamed: list[int] = []
+        try:
+            channel.deliver_stream(
+                _count_chunks(generate_recap_stream(summary, provider_override=args.provider, deadline=deadline), streamed),
+                subject=subject,
+            )
+            return
+        except Exception as e:
+            if streamed:
+                # Part of the recap is already out; a second, full recap below it would confuse readers
+                print(f"\n\n❌ Recap stream interrupted after {sum(streamed):,} characters: {e}", file=sys.stderr)
+                print("   The recap above is incomplete; re-run to regenerate it", file=sys.stderr)
+                return
+            recap = _fallback_recap(summary, e)
+    else:
+        print(f"🤖 Generating recap via {provider} ({args.generator})...")
+        try:
+            recap = generate_recap(
+                summary, provider_override=args.provider, generator=args.generator, deadline=deadline,
+            )
+        except Exception as e:
+            recap = _fallback_recap(summary, e)
+    if recap is None:
         return
     print()
 
     print(f"📤 Delivering via {args.output}...")
-    channel = get_delivery(args.output)
-    channel.deliver(recap, subject=f"Hotel Intel — {settings.HOTEL_NAME} — {target_date}")
+    channel.deliver(recap, subject=subject)
+
+
+def _count_chunks(chunks, streamed: list[int]):
+    """Pass stream chunks through, recording each chunk's length in `streamed`."""
+    for chunk in chunks:
+        streamed.append(len(chunk))
+        yield chunk
+
+
+def _fallback_recap(summary: dict, error: Exception) -> str | None:
+    """Report an LLM failure; return the template recap if fallback is enabled."""
+    print(f"\n❌ LLM generation failed: {error}", file=sys.stderr)
+    if not settings.RECAP_TEMPLATE_FALLBACK:
+        print("   Tip: run with --dry-run to see processed data without LLM", file=sys.stderr)
+        return None
+    print("📝 Falling back to the template recap (no LLM)...")
+    return generate_recap(summary, generator="template")
 
 
 def run_guest_intel(collector_data: dict, target_date: str, args: argparse.Namespace) -> None:
     """Run Module 2: Guest Intelligence."""
-    from guest_intel import GuestMatcher, ProfileBuilder, ProfileStore, ArrivalBriefGenerator
+    from guest_intel import (
+        GuestMatcher, ProfileBuilder, get_profile_store, ArrivalBriefGenerator, IdentityGraph,
+    )
 
-    # Step 1: Match arrivals across all systems
+    # Step 1: Link new source records into the persistent identity graph
+    print("🕸️  Linking guest identities...")
+    graph = IdentityGraph.load()
+    matcher = GuestMatcher(collector_data, graph=graph)
+    added = graph.add_records(matcher.guest_records())
+    graph.save()
+    print(f"   {added} new record(s) linked · {len(graph)} records in graph")
+    print()
+
+    # Step 2: Match arrivals across all systems (known guests from their graph cluster)
     print("🔍 Matching today's arrivals across all systems...")
-    matcher = GuestMatcher(collector_data)
     matches = matcher.match_arrivals(target_date)
 
     if not matches:
@@ -164,15 +359,12 @@ def run_guest_intel(collector_data: dict, target_date: str, args: argparse.Names
         print(f"   ✓ {match.guest_name} (Room {match.room}) — {cross_refs}")
     print()
 
-    # Step 2: Build/update profiles
+    # Step 3: Build/update profiles
     print("👤 Building guest profiles...")
-    store = ProfileStore()
-    builder = ProfileBuilder(store)
+    store = get_profile_store()
+    builder = ProfileBuilder(store, graph=graph, incremental=not args.rebuild_profiles)
     profiles = builder.build_profiles(matches, target_date)
-
-    for profile in profiles:
-        builder.finalize_spend(profile)
-        store.save(profile)  # Save with finalized spend
+    graph.save()    # merged guests' profiles are folded now
 
     for profile in profiles:
         visits = profile.get("total_visits", 0)
@@ -181,7 +373,7 @@ def run_guest_intel(collector_data: dict, target_date: str, args: argparse.Names
         print(f"   ✓ {profile['names'][0]} — {status} guest, {visits} visit(s), {settings.CURRENCY}{spend:,.0f} total spend")
     print()
 
-    # Step 3: Generate arrival briefs
+    # Step 4: Generate arrival briefs
     if args.dry_run:
         print("🔍 Dry run — guest profiles & briefs (no LLM):")
         alert_gen = ArrivalBriefGenerator()
@@ -198,7 +390,10 @@ def run_guest_intel(collector_data: dict, target_date: str, args: argparse.Names
     print(f"🤖 Generating arrival briefs via {provider}...")
     alert_gen = ArrivalBriefGenerator()
     try:
-        briefs = alert_gen.generate_briefs(profiles, provider_override=args.provider)
+        briefs = alert_gen.generate_briefs(
+            profiles, provider_override=args.provider,
+            max_workers=args.brief_workers, batch_size=args.brief_batch_size,
+        )
     except Exception as e:
         print(f"\n❌ Brief generation failed: {e}", file=sys.stderr)
         print("   Tip: run with --dry-run to see profiles without LLM", file=sys.stderr)
@@ -223,6 +418,108 @@ def run_guest_intel(collector_data: dict, target_date: str, args: argparse.Names
     channel.deliver(full_output, subject=f"Guest Intel — {settings.HOTEL_NAME} — {target_date}")
 
 
+# ── Module output ────────────────────────────
+
+class _GroupedOutput:
+    """
+    Stand-in for sys.stdout / sys.stderr while modules run concurrently.
+
+    Writes made while `captured` holds a list are recorded there, with the
+    stream they were meant for, and replayed later as one block; all other
+    writes go straight through. `captured` is a context variable, so it
+    follows a module's work into the worker threads it starts through
+    `threads` (brief workers, recap sections, map calls, the LLM router).
+    """
+
+    captured: contextvars.ContextVar[list | None] = contextvars.ContextVar("captured_output", default=None)
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        captured = self.captured.get()
+        if captured is None:
+            return self._stream.write(text)
+        captured.append((self._stream, text))
+        return len(text)
+
+    def flush(self) -> None:
+        if self.captured.get() is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_modules(modules: list, collector_data: dict, target_date: str, args: argparse.Namespace) -> list[float]:
+    """
+    Run module functions over the collected data, concurrently when allowed.
+
+    Each module gets its own deep copy of the collector snapshot, so one
+    cannot change the data the other sees. The first module prints live
+    (keeping recap streaming); the others' output is held back and printed
+    as one block each, in module order, once the modules before them are
+    done. Wall time is roughly that of the slowest module.
+
+    Returns each module's run time in seconds.
+    """
+    timings = [0.0] * len(modules)
+    outputs: list[list] = [[] for _ in modules]
+
+    def task(i: int) -> None:
+        # The first module writes live; the others record their output
+        token = _GroupedOutput.captured.set(outputs[i] if i else None)
+        started = time.perf_counter()
+        try:
+            modules[i](copy.deepcopy(collector_data), target_date, args)
+        finally:
+            timings[i] = time.perf_counter() - started
+            _GroupedOutput.captured.reset(token)
+
+    if len(modules) == 1 or args.module_workers <= 1:
+        for i, module in enumerate(modules):
+            started = time.perf_counter()
+            module(collector_data, target_date, args)
+            timings[i] = time.perf_counter() - started
+        return timings
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _GroupedOutput(stdout), _GroupedOutput(stderr)
+    try:
+        with ContextThreadPoolExecutor(max_workers=args.module_workers, thread_name_prefix="module") as pool:
+            futures = [pool.submit(task, i) for i in range(len(modules))]
+            errors = []
+            for future, output in zip(futures, outputs):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+                for stream, text in output:
+                    stream.write(text)
+                stdout.flush()
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    if errors:
+        raise errors[0]
+    return timings
+
+
+def _recap_module(collector_data: dict, target_date: str, args: argparse.Namespace) -> None:
+    print("═" * 50)
+    print("📊 MODULE 1: DAILY RECAP")
+    print("═" * 50)
+    run_recap(collector_data, target_date, args)
+    print()
+
+
+def _guest_intel_module(collector_data: dict, target_date: str, args: argparse.Namespace) -> None:
+    print("═" * 50)
+    print("👤 MODULE 2: GUEST INTELLIGENCE")
+    print("═" * 50)
+    run_guest_intel(collector_data, target_date, args)
+    print()
+
+
 def main():
     args = parse_args()
     target_date = args.date
@@ -231,26 +528,82 @@ def main():
     print(f"📅 Date: {target_date} | Mode: {args.mode}")
     print()
 
+    if args.no_llm_cache:
+        settings.LLM_CACHE = False
+    if args.regenerate:
+        settings.RECAP_INCREMENTAL = False
+
+    # Load the local model while data is being collected
+    provider = (args.provider or settings.LLM_PROVIDER).lower()
+    uses_local = provider == "local" or (
+        provider == "router" and "local" in [p.strip() for p in settings.LLM_FALLBACK_CHAIN.split(",")]
+    )
+    if uses_local and not args.dry_run:
+        from llm import get_provider
+        get_provider("local").warm_up()
+
     # ── Collect data (shared across modules) ──
     print("📡 Collecting data...")
-    collector_data = collect_all(target_date)
+    collector_data = collect_all(target_date, max_workers=args.collector_workers)
     print()
 
     # ── Run requested module(s) ──────────────
+    modules = []
     if args.mode in ("recap", "both"):
-        print("═" * 50)
-        print("📊 MODULE 1: DAILY RECAP")
-        print("═" * 50)
-        run_recap(collector_data, target_date, args)
+        modules.append(_recap_module)
+    if args.mode in ("guest-intel", "both"):
+        modules.append(_guest_intel_module)
+    started = time.perf_counter()
+    timings = run_modules(modules, collector_data, target_date, args)
+    if len(modules) > 1:
+        wall = time.perf_counter() - started
+        mode = "concurrently" if args.module_workers > 1 else "sequentially"
+        print(f"⏱  Modules ({mode}): {wall * 1000:,.0f}ms wall · {sum(timings) * 1000:,.0f}ms summed")
         print()
 
-    if args.mode in ("guest-intel", "both"):
-        print("═" * 50)
-        print("👤 MODULE 2: GUEST INTELLIGENCE")
-        print("═" * 50)
-        run_guest_intel(collector_data, target_date, args)
+    from llm.cache import get_response_cache
+    cache = get_response_cache() if not args.dry_run else None
+    if cache is not None:
+        stats = cache.stats()
+        print(f"💾 LLM cache: {stats['hits']} hit(s) · {stats['misses']} miss(es) · {stats['entries']} cached")
+        print()
+
+    from llm import get_telemetry
+    telemetry = get_telemetry() if not args.dry_run else None
+    if telemetry is not None and telemetry.session:
+        run = telemetry.run_summary()
+        latency = f" · p50 {run['latency_p50_ms'] / 1000:.1f}s" if run["latency_p50_ms"] is not None else ""
+        ttft = f" · TTFT p50 {run['ttft_p50_ms'] / 1000:.1f}s" if run["ttft_p50_ms"] is not None else ""
+        prefix_cached = f" ({run['cached_tokens']:,} from prompt cache)" if run["cached_tokens"] else ""
+        print(
+            f"📈 LLM: {run['calls']} call(s) ({run['cached']} cached, {run['errors']} failed) · "
+            f"{run['prompt_tokens']:,} prompt{prefix_cached} + {run['completion_tokens']:,} completion tokens"
+            f"{latency}{ttft} · ${run['cost_usd']:.4f}"
+        )
         print()
 
+    if uses_local and not args.dry_run:
+        speed = get_provider("local").throughput()
+        if speed["calls"]:
+            print(
+                f"🦙 Ollama {settings.OLLAMA_MODEL}: {speed['calls']} call(s) · "
+                f"{speed['completion_tokens_per_s']:.1f} tok/s generation · "
+                f"{speed['prompt_tokens_per_s']:.1f} tok/s prompt · "
+                f"{speed['load_seconds']:.1f}s model load"
+            )
+            print()
+
+    if not args.dry_run and provider == "router":
+        from llm import get_latency_tracker
+        latency = [
+            f"{name} p50 {s['p50']:.1f}s p95 {s['p95']:.1f}s (n={s['n']})"
+            for name, s in get_latency_tracker().summary().items()
+            if s["p50"] is not None
+        ]
+        if latency:
+            print(f"⏱ LLM latency: {' · '.join(latency)}")
+            print()
+
     print("✅ Done!")
 
 
@@ -0,0 +1,224 @@
+"""
+Hotel Intel — Map-Reduce Recap Data.
+
+For large properties the processed summary outgrows a single prompt: 150
+arrivals, dozens of incidents and concierge requests either overflow the
+model's context or make the one big completion very slow. Here, before
+the final recap prompt is built, every list that does not fit its share
+of the data budget is reduced:
+
+- llm:  the list is split into chunks sized to the model's context window
+        and each chunk is summarized in parallel (map); the digests replace
+        the list, and are summarized again if they are still too long
+        (hierarchical reduce)
+- rank: no extra LLM calls; rows are ranked (VIPs first, unresolved first,
+        highest spend first) so the serializer keeps the most important
+        ones, and the rest are counted
+
+The data budget itself is the smaller of PROMPT_TOKEN_BUDGET and half the
+model's context window.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from config import settings
+from prompt_format import (
+    CHARS_PER_TOKEN, SECTIONS, compact, encode_table, estimate_tokens, rank_rows, serialize_summary,
+)
+from threads import ContextThreadPoolExecutor
+
+
+STRATEGIES = ("llm", "rank")
+
+# Context window (tokens) per model; unknown models get DEFAULT_CONTEXT_WINDOW.
+# Override with LLM_CONTEXT_WINDOW.
+CONTEXT_WINDOWS: dict[str, int] = {
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "claude-sonnet-4-20250514": 200_000,
+    "claude-3-5-haiku-latest": 200_000,
+    "mistral-large-latest": 128_000,
+    "mistral-small-latest": 32_000,
+    "llama3": 8_192,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Share of the context window one map chunk may fill (the rest is
+# instructions and the digest being written)
+CHUNK_SHARE = 0.5
+MAX_REDUCE_DEPTH = 3
+
+MAP_SYSTEM_PROMPT = """\
+You are Hotel Intel, an AI assistant for luxury hotel general managers.
+You condense operational records into short, factual digests for the daily recap.
+"""
+
+MAP_INSTRUCTIONS = """\
+Condense the records at the end of this message into a digest for a hotel GM's daily recap.
+
+- At most {bullets} bullet points, one line each
+- Always keep VIPs, unresolved or high-priority items, special occasions and pending requests,
+  with guest names and room numbers
+- Summarize routine records as counts (e.g. "12 standard arrivals, mostly DLX")
+- Use only facts present in the records; reply with the bullet points only
+
+"""
+
+
+# ── Context window ───────────────────────────
+
+def context_window(llm) -> int:
+    """Context window of `llm` in tokens (the smallest one for a router chain)."""
+    if settings.LLM_CONTEXT_WINDOW:
+        return settings.LLM_CONTEXT_WINDOW
+    providers = getattr(llm, "providers", None)
+    if providers:
+        from llm import get_provider
+        return min(context_window(get_provider(p)) for p in providers)
+    return CONTEXT_WINDOWS.get(llm.model, DEFAULT_CONTEXT_WINDOW)
+
+
+def data_budget(llm) -> int:
+    """Token budget for the recap data: PROMPT_TOKEN_BUDGET, capped at half the context window."""
+    return min(settings.PROMPT_TOKEN_BUDGET, context_window(llm) // 2)
+
+
+def chunk_tokens(llm) -> int:
+    """Token budget of one map chunk."""
+    return max(500, int(context_window(llm) * CHUNK_SHARE) - estimate_tokens(MAP_INSTRUCTIONS) - 200)
+
+
+# ── Planning ─────────────────────────────────
+
+def _section_share(key: str) -> float:
+    for _, prefixes, share in SECTIONS:
+        if any(key == p or key.startswith(p) for p in prefixes):
+            return share
+    return 0.05
+
+
+def oversized_lists(data: dict[str, Any], budget: int) -> dict[str, int]:
+    """List fields that do not fit the data budget, with their row counts."""
+    _, report = serialize_summary(data, budget)
+    return {
+        key: len(data[key])
+        for key in report["truncated"]
+        if isinstance(data.get(key), list)
+    }
+
+
+def _record_lines(rows: list[Any]) -> tuple[str, list[str]]:
+    """(table header, one line per record); plain values get no header."""
+    if all(isinstance(row, dict) for row in rows):
+        table = encode_table(rows)
+        return table[0], table[1:]
+    return "", [json.dumps(row, ensure_ascii=False, default=str) if isinstance(row, (dict, list)) else str(row)
+                for row in rows]
+
+
+def _chunks(rows: list[Any], max_tokens: int) -> list[tuple[str, int]]:
+    """Split rows into consecutive (text, record count) chunks of at most `max_tokens` each."""
+    header, lines = _record_lines(rows)
+    budget = max_tokens - estimate_tokens(header)
+    chunks, current, used = [], [], 0
+    for line in lines:
+        size = estimate_tokens(line) + 1
+        if current and used + size > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += size
+    if current:
+        chunks.append(current)
+    return [("\n".join(([header] if header else []) + chunk), len(chunk)) for chunk in chunks]
+
+
+# ── Reduction ────────────────────────────────
+
+def reduce_data(
+    data: dict[str, Any],
+    llm=None,
+    strategy: str | None = None,
+    max_workers: int | None = None,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """
+    Reduce the oversized lists of the summary so the recap prompt fits.
+
+    Args:
+        data: Processed summary dict from processor.
+        llm: Provider whose context window sizes budget and chunks (and
+            which writes the digests with the llm strategy).
+        strategy: "llm" or "rank" (default: RECAP_MAP_STRATEGY).
+        max_workers: Concurrent map calls (default: RECAP_SECTION_WORKERS).
+
+    Returns:
+        (reduced copy of data, {field: how it was reduced}).
+    """
+    strategy = (strategy or settings.RECAP_MAP_STRATEGY).lower()
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown map strategy '{strategy}'. Available: {', '.join(STRATEGIES)}")
+
+    budget = data_budget(llm)
+    oversized = oversized_lists(data, budget)
+    reduced = dict(data)
+    notes: dict[str, str] = {}
+    if strategy == "rank":
+        for key, count in oversized.items():
+            reduced[key] = rank_rows(key, compact(data[key]))
+            notes[key] = f"{count} rows ranked"
+        return reduced, notes
+
+    # Lists are digested concurrently, each fanning its chunks out in turn
+    def digest(key: str) -> tuple[str, int]:
+        allowance = max(int(budget * _section_share(key)), 200)
+        return _digest(key, rank_rows(key, compact(data[key])), llm, allowance, max_workers)
+
+    if oversized:
+        with ContextThreadPoolExecutor(max_workers=len(oversized), thread_name_prefix="recap-reduce") as pool:
+            results = dict(zip(oversized, pool.map(digest, oversized)))
+        for key, count in oversized.items():
+            text, calls = results[key]
+            reduced[key] = f"digest of {count} records: {text}"
+            notes[key] = f"{count} rows → {calls} digest call(s)"
+    return reduced, notes
+
+
+def _digest(key: str, rows: list[Any], llm, allowance: int, max_workers: int | None) -> tuple[str, int]:
+    """Summarize `rows` chunk by chunk in parallel, then re-reduce the digests until they fit."""
+    from llm import call_llm
+
+    max_chunk = chunk_tokens(llm)
+
+    def summarize(text: str, n: int) -> str:
+        bullets = max(3, min(12, allowance * CHARS_PER_TOKEN // 120))
+        return call_llm(llm, lambda: llm.generate(
+            prompt=f"## RECORDS: {key} ({n})\n\n{text}",
+            system_prompt=MAP_SYSTEM_PROMPT,
+            prefix=MAP_INSTRUCTIONS.format(bullets=bullets),
+        )).strip()
+
+    jobs = _chunks(rows, max_chunk)
+    calls = 0
+    workers = max(1, min(max_workers or settings.RECAP_SECTION_WORKERS, len(jobs)))
+    for _ in range(MAX_REDUCE_DEPTH):
+        with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="recap-map") as pool:
+            digests = list(pool.map(lambda job: summarize(*job), jobs))
+        calls += len(jobs)
+        combined = "\n".join(digests)
+        if len(digests) == 1 or estimate_tokens(combined) <= allowance:
+            break
+        # Hierarchical reduce: summarize the digests themselves, in groups that fit
+        # a chunk; each group covers the records of the digests in it
+        groups, current, covered = [], [], 0
+        for digest, (_, n) in zip(digests, jobs):
+            if current and estimate_tokens("\n".join(current + [digest])) > max_chunk:
+                groups.append(("\n".join(current), covered))
+                current, covered = [], 0
+            current.append(digest)
+            covered += n
+        groups.append(("\n".join(current), covered))
+        jobs = groups
+    return combined, calls
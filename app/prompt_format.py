@@ -0,0 +1,209 @@
+"""
+Hotel Intel — Prompt Serializer.
+
+Compact, token-budgeted encoding of the processed summary for LLM prompts.
+Pretty-printed JSON spends most of its tokens on indentation, repeated
+keys and empty fields, so prompt size grew with every arrival and email.
+Here instead:
+
+- null / empty fields are dropped (zeros are kept: they are data)
+- lists of records become tables: one header row, one `|`-separated row
+  per record, so each key is paid for once
+- each section has a share of the token budget; a list that does not fit
+  keeps its most important records (RANKINGS: VIPs, unresolved incidents,
+  high-importance emails first) and the omission is stated, so the LLM
+  never invents it
+
+Token counts are estimated (≈4 characters per token), which is close
+enough to budget by without a tokenizer dependency.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+from config import settings
+
+
+# (section title, summary key prefixes/names, share of the token budget)
+SECTIONS: list[tuple[str, tuple[str, ...], float]] = [
+    ("Overview", ("hotel_name", "currency", "date", "data_sources"), 0.03),
+    ("Rooms", ("occupancy", "adr", "revpar", "room_revenue", "total_", "rooms_sold", "revenue_breakdown", "in_house_by_type"), 0.07),
+    ("Arrivals & Departures", ("arrivals", "departures", "vip_arrivals"), 0.25),
+    ("F&B", ("fb_",), 0.15),
+    ("Spa", ("spa_",), 0.07),
+    ("Incidents", ("incidents_",), 0.13),
+    ("Concierge", ("concierge_",), 0.10),
+    ("Villas", ("villa",), 0.08),
+    ("Email & Files", ("emails_", "onedrive_"), 0.12),
+]
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact(value: Any) -> Any:
+    """Recursively drop None, empty strings and empty containers."""
+    if isinstance(value, dict):
+        out = {k: compact(v) for k, v in value.items()}
+        return {k: v for k, v in out.items() if not _is_empty(v)}
+    if isinstance(value, list):
+        out = [compact(v) for v in value]
+        return [v for v in out if not _is_empty(v)]
+    return value
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _cell(value: Any) -> str:
+    """One scalar or nested value as compact text, safe inside a `|`-separated row."""
+    if isinstance(value, (dict, list)):
+        # JSON stays valid with the separator escaped
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).replace("|", "\\u007c")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def encode_table(rows: list[dict]) -> list[str]:
+    """Header line plus one `|`-separated line per record (union of keys, first-seen order)."""
+    columns: list[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    lines = ["|".join(columns)]
+    for row in rows:
+        lines.append("|".join(_cell(row[c]) if c in row else "" for c in columns))
+    return lines
+
+
+def _encode_field(key: str, value: Any, budget_chars: int) -> tuple[list[str], bool]:
+    """Encode one summary field within `budget_chars`; returns (lines, truncated)."""
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        table = encode_table(value)
+        header, rows = table[0], table[1:]
+        lines = [f"{key} ({len(rows)}):", header]
+        used = len(key) + len(header) + 8
+        if used + sum(len(row) + 1 for row in rows) <= budget_chars:
+            return lines + rows, False
+        # Over budget: keep the most important rows that fit, in source order
+        ranked = sorted(range(len(rows)), key=lambda i: _ranking_key(key, value[i]))
+        kept = []
+        for i in ranked:
+            if kept and used + len(rows[i]) + 1 > budget_chars:
+                break
+            kept.append(i)
+            used += len(rows[i]) + 1
+        lines.extend(rows[i] for i in sorted(kept))
+        lines.append(f"… {len(rows) - len(kept)} more not shown (showing {len(kept)} of {len(rows)})")
+        return lines, True
+
+    if isinstance(value, list):
+        text = ", ".join(_cell(v) for v in value)
+        if len(text) > budget_chars:
+            kept, used = [], 0
+            for v in value:
+                item = _cell(v)
+                if kept and used + len(item) + 2 > budget_chars:
+                    break
+                kept.append(item)
+                used += len(item) + 2
+            return [f"{key}: {', '.join(kept)} … (+{len(value) - len(kept)} more)"], True
+        return [f"{key}: {text}"], False
+
+    return [f"{key}: {_cell(value)}"], False
+
+
+def _unresolved_first(row: dict) -> tuple:
+    status = str(row.get("status", "")).lower()
+    priority = {"critical": 0, "urgent": 0, "high": 1, "medium": 2, "low": 3}.get(str(row.get("priority", "")).lower(), 2)
+    return (status in ("resolved", "closed", "confirmed"), priority, str(row.get("time", "")))
+
+
+RANKINGS: dict[str, Callable[[dict], tuple]] = {
+    "arrivals": lambda r: (not r.get("vip"), str(r.get("vip") or ""), not r.get("notes"), -(r.get("rate") or 0)),
+    "vip_arrivals": lambda r: (str(r.get("vip") or ""), -(r.get("rate") or 0)),
+    "departures": lambda r: (-(r.get("totalSpend") or 0),),
+    "incidents_detail": _unresolved_first,
+    "concierge_notable": _unresolved_first,
+    "emails_summary": lambda r: (str(r.get("importance", "")).lower() != "high",),
+    "fb_outlets": lambda r: (-(r.get("revenue") or 0),),
+}
+
+
+def rank_rows(key: str, rows: list[Any]) -> list[Any]:
+    """`rows` with the most important first (stable; unknown fields keep their order)."""
+    ranking = RANKINGS.get(key)
+    if ranking and all(isinstance(row, dict) for row in rows):
+        return sorted(rows, key=ranking)
+    return list(rows)
+
+
+def _ranking_key(key: str, row: dict) -> tuple:
+    ranking = RANKINGS.get(key)
+    return ranking(row) if ranking else ()
+
+
+def _section_for(key: str) -> str:
+    for title, prefixes, _ in SECTIONS:
+        if any(key == p or key.startswith(p) for p in prefixes):
+            return title
+    return "Other"
+
+
+def serialize_summary(data: dict[str, Any], token_budget: int | None = None) -> tuple[str, dict]:
+    """
+    Encode the processed summary compactly within a token budget.
+
+    Args:
+        data: Processed summary dict from processor.
+        token_budget: Total data budget in tokens (default: PROMPT_TOKEN_BUDGET).
+
+    Returns:
+        (text, report) where report has the estimated "tokens" and the
+        "truncated" fields that were cut to fit.
+    """
+    if token_budget is None:
+        token_budget = settings.PROMPT_TOKEN_BUDGET
+
+    grouped: dict[str, dict[str, Any]] = {}
+    for key, value in compact(data).items():
+        grouped.setdefault(_section_for(key), {})[key] = value
+
+    shares = {title: share for title, _, share in SECTIONS}
+    order = [title for title, _, _ in SECTIONS] + ["Other"]
+
+    lines: list[str] = []
+    truncated: list[str] = []
+    for title in order:
+        fields = grouped.get(title)
+        if not fields:
+            continue
+        section_chars = int(token_budget * shares.get(title, 0.05) * CHARS_PER_TOKEN)
+        # Scalars are cheap and always kept; lists share what remains
+        scalars = {k: v for k, v in fields.items() if not isinstance(v, list)}
+        lists = {k: v for k, v in fields.items() if isinstance(v, list)}
+
+        lines.append(f"### {title}")
+        for key, value in scalars.items():
+            lines.append(f"{key}: {_cell(value)}")
+            section_chars -= len(lines[-1]) + 1
+        for i, (key, value) in enumerate(lists.items()):
+            per_field = max(section_chars // (len(lists) - i), 0)
+            field_lines, cut = _encode_field(key, value, per_field)
+            lines.extend(field_lines)
+            section_chars -= sum(len(line) + 1 for line in field_lines)
+            if cut:
+                truncated.append(key)
+        lines.append("")
+
+    text = "\n".join(lines).rstrip() + "\n"
+    return text, {"tokens": estimate_tokens(text), "truncated": truncated}
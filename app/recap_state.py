@@ -0,0 +1,102 @@
+"""
+Hotel Intel — Recap Section State.
+
+Per-date record of the last sectioned recap: for each section, the slice
+of the processed summary it was written from, a fingerprint of the exact
+request (provider, model, prompts) and the text that came back.
+
+A re-run for the same date (e.g. after a late incident update) diffs the
+new summary against it: sections whose request is unchanged reuse their
+stored text, and only the rest go to the LLM. The executive summary and
+action items are written from the section texts (plus the email and file
+fields no section covers), so they are regenerated only when one of those
+actually changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from config import settings
+from prompt_format import compact
+
+
+def fingerprint(provider: str, model: str, system_prompt: str, prompt: str) -> str:
+    """Stable hash of one section request."""
+    payload = json.dumps([provider, model, system_prompt, prompt], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize(fields: dict[str, Any]) -> dict[str, Any]:
+    """Summary slice as stored: empty fields dropped, values JSON-round-tripped."""
+    return json.loads(json.dumps(compact(fields), ensure_ascii=False, default=str))
+
+
+class RecapState:
+    """Stored section inputs and outputs of the last recap for one date."""
+
+    def __init__(self, date: str, directory: Path | None = None):
+        self.date = date
+        self.path = Path(directory or settings.RECAP_STATE_DIR) / f"{date}.json"
+        self.sections: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, date: str, directory: Path | None = None) -> "RecapState":
+        state = cls(date, directory)
+        if state.path.exists():
+            try:
+                with open(state.path, "r", encoding="utf-8") as fh:
+                    state.sections = json.load(fh).get("sections", {})
+            except (OSError, json.JSONDecodeError):
+                state.sections = {}
+        return state
+
+    def save(self) -> None:
+        """Persist the state (atomically, via a temp file)."""
+        with self._lock:
+            data = {"date": self.date, "sections": self.sections}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def text(self, section: str, key: str) -> str | None:
+        """Stored text for `section` if it was generated from the same request."""
+        with self._lock:
+            entry = self.sections.get(section)
+        if entry and entry.get("fingerprint") == key:
+            return entry.get("text")
+        return None
+
+    def put(self, section: str, key: str, text: str, fields: dict[str, Any] | None = None) -> None:
+        entry = {
+            "fingerprint": key,
+            "text": text,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if fields is not None:
+            entry["input"] = normalize(fields)
+        with self._lock:
+            self.sections[section] = entry
+
+    def changed_fields(self, section: str, fields: dict[str, Any]) -> list[str] | None:
+        """
+        Summary fields of `section` that differ from the stored input.
+
+        Returns None when the section has no stored input (never generated
+        for this date), an empty list when its data is unchanged.
+        """
+        with self._lock:
+            entry = self.sections.get(section)
+        if not entry or "input" not in entry:
+            return None
+        old, new = entry["input"], normalize(fields)
+        return [key for key in sorted(old.keys() | new.keys()) if old.get(key) != new.get(key)]
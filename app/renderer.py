@@ -0,0 +1,435 @@
+"""
+Hotel Intel — Template Renderer.
+
+Deterministic, zero-LLM rendering of the processed summary into the full
+Markdown recap, following templates/daily-recap-template.md: metrics
+table, arrivals with VIP spotlight, F&B outlets, spa, villas, incidents
+with status icons, concierge, and rule-based action items.
+
+It runs in milliseconds, so it serves both as a generator mode of its own
+(--generator template) and as the fallback when the LLM is down or misses
+its deadline; the hybrid generator uses it for everything except the
+LLM-written narrative. Sections without data are omitted rather than invented;
+the template's vs-LW / vs-LY / budget columns are not rendered because
+the collectors provide day-over-day deltas only.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+
+# Relative day-over-day move (in %) that is called out as an anomaly
+ANOMALY_PCT = 10.0
+# Spa utilization (in %) from which the spa is flagged as near capacity
+SPA_CAPACITY_PCT = 90.0
+
+INCIDENT_ICONS = {
+    "open": "🔴",
+    "new": "🔴",
+    "in_progress": "🟡",
+    "pending": "🟡",
+    "assigned": "🟡",
+    "resolved": "🟢",
+    "closed": "🟢",
+}
+PRIORITY_ICONS = {"urgent": "🔴", "important": "🟡", "standard": "🔵"}
+_PRIORITY_ORDER = list(PRIORITY_ICONS)
+
+
+# ── Formatting ───────────────────────────────
+
+def _money(value: Any, currency: str) -> str:
+    try:
+        return f"{currency}{float(value):,.0f}"
+    except (TypeError, ValueError):
+        return "—"
+
+
+def _num(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{value:,}" if isinstance(value, (int, float)) else str(value)
+
+
+def _delta(value: float | None, unit: str = "%") -> str:
+    if value is None:
+        return "—"
+    arrow = "↑" if value > 0 else "↓" if value < 0 else "→"
+    return f"{arrow}{abs(value):.1f}{unit}"
+
+
+def _label(value: str) -> str:
+    return str(value).replace("_", " ").strip().capitalize()
+
+
+def format_date(date_str: str) -> str:
+    """ISO date as e.g. "Friday, 13 February 2026" (unchanged if not ISO)."""
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%A, %d %B %Y")
+    except ValueError:
+        return date_str
+
+
+def _is_resolved(incident: dict) -> bool:
+    return str(incident.get("status", "")).lower() in ("resolved", "closed")
+
+
+# ── Sections ─────────────────────────────────
+
+def render_header(data: dict[str, Any]) -> str:
+    return (
+        f"# ☀️ {data.get('hotel_name', '')} — {format_date(data.get('date', ''))}\n\n"
+        f"*Delivered {datetime.now().strftime('%H:%M')} · Covering yesterday's actuals + today's lookahead*"
+    )
+
+
+def kpi_anomalies(data: dict[str, Any]) -> list[str]:
+    """Day-over-day KPI moves of ANOMALY_PCT or more."""
+    anomalies = []
+    for key, label in (("adr_delta_pct", "ADR"), ("revpar_delta_pct", "RevPAR"),
+                       ("total_revenue_delta_pct", "Total revenue")):
+        value = data.get(key)
+        if value is not None and abs(value) >= ANOMALY_PCT:
+            anomalies.append(f"{label} {_delta(value)} vs previous day")
+    occ = data.get("occupancy_delta")
+    if occ is not None and abs(occ) >= ANOMALY_PCT:
+        anomalies.append(f"Occupancy {_delta(occ, ' pts')} vs previous day")
+    return anomalies
+
+
+def render_executive_summary(data: dict[str, Any], text: str | None = None,
+                             highlights: list[str] | None = None) -> str:
+    """The executive summary: `text` if given (e.g. LLM-written), else rule-based."""
+    if text:
+        lines = ["## 🔑 Executive Summary", "", text.strip()]
+        if highlights:
+            lines += [""] + [f"- ✨ {h.strip()}" for h in highlights if h and h.strip()]
+        return "\n".join(lines)
+
+    cur = data.get("currency", "€")
+    sentences = [
+        f"Occupancy ran at {data.get('occupancy_pct', 0)}% ({_delta(data.get('occupancy_delta'), ' pts')}) "
+        f"with ADR at {_money(data.get('adr'), cur)} ({_delta(data.get('adr_delta_pct'))}) and total revenue "
+        f"of {_money(data.get('total_revenue'), cur)} ({_delta(data.get('total_revenue_delta_pct'))})."
+    ]
+    vips = data.get("vip_arrivals") or []
+    arrivals = f"{data.get('arrivals_count', 0)} arrival(s)"
+    if vips:
+        arrivals += f" including {len(vips)} VIP ({', '.join(v.get('guestName', '?') for v in vips)})"
+    sentences.append(f"Today brings {arrivals} and {data.get('departures_count', 0)} departure(s).")
+    open_incidents = data.get("incidents_open", 0)
+    pending = data.get("concierge_pending", 0)
+    if open_incidents or pending:
+        sentences.append(
+            f"{open_incidents} incident(s) remain open and {pending} concierge request(s) are pending."
+        )
+    return "## 🔑 Executive Summary\n\n" + " ".join(sentences)
+
+
+def render_metrics(data: dict[str, Any]) -> str:
+    cur = data.get("currency", "€")
+    lines = [
+        "## 📊 Key Metrics",
+        "",
+        "| Metric | Yesterday | vs Prev Day |",
+        "|--------|----------:|------------:|",
+        f"| Occupancy | {data.get('occupancy_pct', 0)}% ({data.get('rooms_sold', 0)}/{data.get('total_rooms', 0)}) "
+        f"| {_delta(data.get('occupancy_delta'), ' pts')} |",
+        f"| ADR | {_money(data.get('adr'), cur)} | {_delta(data.get('adr_delta_pct'))} |",
+        f"| RevPAR | {_money(data.get('revpar'), cur)} | {_delta(data.get('revpar_delta_pct'))} |",
+        f"| Room Rev | {_money(data.get('room_revenue'), cur)} | — |",
+        f"| Total Rev | {_money(data.get('total_revenue'), cur)} | {_delta(data.get('total_revenue_delta_pct'))} |",
+    ]
+    anomalies = kpi_anomalies(data)
+    if anomalies:
+        lines += ["", f"⚠️ **Anomalies:** {'; '.join(anomalies)}"]
+    return "\n".join(lines)
+
+
+def render_arrivals(data: dict[str, Any]) -> str:
+    lines = [
+        "## 🛎️ Arrivals & Departures",
+        "",
+        f"**Today's Arrivals:** {data.get('arrivals_count', 0)} room(s)",
+        f"**Today's Departures:** {data.get('departures_count', 0)} room(s)",
+        f"**In-House:** {data.get('rooms_sold', 0)} rooms ({data.get('occupancy_pct', 0)}%)",
+    ]
+    vips = data.get("vip_arrivals") or []
+    if vips:
+        lines += ["", "### ⭐ VIP Arrivals", ""]
+        for guest in vips:
+            lines.append(
+                f"- **{guest.get('guestName', 'Unknown')}** — {guest.get('vip')} · "
+                f"{guest.get('nights', '?')} night(s) · Room {guest.get('roomNo', 'TBD')}"
+            )
+            if guest.get("notes"):
+                lines.append(f"  💡 {guest['notes']}")
+
+    others = [a for a in data.get("arrivals") or [] if not a.get("vip")]
+    if others:
+        lines += ["", "### Other Arrivals" if vips else "### Arrivals", ""]
+        for guest in others:
+            note = f" · 💡 {guest['notes']}" if guest.get("notes") else ""
+            lines.append(
+                f"- {guest.get('guestName', 'Unknown')} — Room {guest.get('roomNo', 'TBD')} "
+                f"({guest.get('roomType', '')}) · {guest.get('nights', '?')} night(s){note}"
+            )
+
+    departures = data.get("departures") or []
+    if departures:
+        cur = data.get("currency", "€")
+        lines += ["", "### 👋 Departures", ""]
+        for guest in departures:
+            spend = f" · {_money(guest['totalSpend'], cur)} total spend" if guest.get("totalSpend") else ""
+            lines.append(f"- **{guest.get('guestName', 'Unknown')}** — Room {guest.get('roomNo', '?')}{spend}")
+    return "\n".join(lines)
+
+
+def render_fb(data: dict[str, Any]) -> str:
+    cur = data.get("currency", "€")
+    lines = [
+        "## 🍽️ Food & Beverage",
+        "",
+        "### Yesterday's Performance",
+        "",
+        "| Outlet | Covers | Revenue | Avg Check |",
+        "|--------|-------:|--------:|----------:|",
+    ]
+    notable = []
+    names = {}
+    for outlet in data.get("fb_outlets") or []:
+        names[outlet.get("code")] = outlet.get("name", outlet.get("code"))
+        lines.append(
+            f"| {outlet.get('name', outlet.get('code', '?'))} | {_num(outlet.get('covers', 0))} "
+            f"| {_money(outlet.get('revenue'), cur)} | {_money(outlet.get('avg_check'), cur)} |"
+        )
+        for meal, detail in (outlet.get("meals") or {}).items():
+            if isinstance(detail, dict) and detail.get("notes"):
+                notable.append(f"{outlet.get('name')} ({meal}): {detail['notes']}")
+        if outlet.get("notes"):
+            notable.append(f"{outlet.get('name')}: {outlet['notes']}")
+    lines.append(
+        f"| **Total** | **{_num(data.get('fb_total_covers', 0))}** | **{_money(data.get('fb_total_revenue'), cur)}** "
+        f"| **{_money(data.get('fb_avg_check'), cur)}** |"
+    )
+    if notable:
+        lines += [""] + [f"📌 {note}" for note in notable]
+
+    tomorrow = data.get("fb_tomorrow_reservations") or {}
+    if tomorrow:
+        lines += ["", "### Today's Lookahead", ""]
+        for code, reservations in tomorrow.items():
+            lines.append(f"- **{names.get(code, code)}:** {_num(reservations)} reservations")
+    return "\n".join(lines)
+
+
+def render_spa(data: dict[str, Any]) -> str:
+    cur = data.get("currency", "€")
+    today_bookings = data.get("spa_tomorrow_bookings")
+    today_util = data.get("spa_tomorrow_utilization")
+    lines = [
+        "## 💆 Spa & Wellness",
+        "",
+        "| Metric | Yesterday | Today's Outlook |",
+        "|--------|----------:|----------------:|",
+        f"| Bookings | {data.get('spa_bookings', 0)} | {today_bookings if today_bookings is not None else '—'} |",
+        f"| Revenue | {_money(data.get('spa_revenue'), cur)} | — |",
+        f"| Utilization | {data.get('spa_utilization_pct', 0)}% | {f'{today_util}%' if today_util is not None else '—'} |",
+        f"| Retail Sales | {_money(data.get('spa_retail'), cur)} | — |",
+    ]
+    if data.get("spa_no_shows"):
+        lines += ["", f"⚠️ {data['spa_no_shows']} no-show(s) yesterday"]
+    if (data.get("spa_utilization_pct") or 0) >= SPA_CAPACITY_PCT:
+        lines += ["", f"💡 Running at {data['spa_utilization_pct']}% utilization — little room for walk-ins"]
+    return "\n".join(lines)
+
+
+def render_villas(data: dict[str, Any]) -> str:
+    cur = data.get("currency", "€")
+    lines = [
+        "## 🏠 Villas",
+        "",
+        "| Status | Count |",
+        "|--------|------:|",
+        f"| Occupied | {data.get('villas_occupied', 0)} / {data.get('villas_total', 0)} |",
+        f"| Check-ins Today | {data.get('villa_checkins', 0)} |",
+        f"| Check-outs Today | {data.get('villa_checkouts', 0)} |",
+        f"| Next 7 Days | {data.get('villa_upcoming_7d', 0)} bookings |",
+    ]
+    if data.get("villa_revenue"):
+        lines += ["", f"💰 Villa revenue yesterday: {_money(data['villa_revenue'], cur)}"]
+    details = data.get("villa_details") or []
+    if details:
+        lines.append("")
+        for villa in details:
+            guest = f" ({villa['guest_name']})" if villa.get("guest_name") else ""
+            notes = f" · {villa['notes']}" if villa.get("notes") else ""
+            lines.append(f"- **{villa.get('villa_name', villa.get('villa_code', '?'))}:** "
+                         f"{villa.get('status', 'unknown')}{guest}{notes}")
+    return "\n".join(lines)
+
+
+def render_incidents(data: dict[str, Any]) -> str:
+    lines = [
+        "## 🚨 Incidents & Follow-ups",
+        "",
+        f"**Open:** {data.get('incidents_open', 0)} · **New yesterday:** {data.get('incidents_new', 0)} · "
+        f"**Resolved:** {data.get('incidents_resolved', 0)} (avg {data.get('incidents_avg_resolution_min', 0)} min)",
+    ]
+    incidents = data.get("incidents_detail") or []
+    if incidents:
+        lines.append("")
+        # Unresolved first, then by time
+        for inc in sorted(incidents, key=lambda i: (_is_resolved(i), i.get("time") or "")):
+            status = str(inc.get("status", "open")).lower()
+            icon = INCIDENT_ICONS.get(status, "🔴")
+            room = f" · Room {inc['room']}" if inc.get("room") else ""
+            lines.append(
+                f"- {icon} **{inc.get('description', 'Incident')}** — {_label(status)} · "
+                f"{_label(inc.get('category', 'general'))}{room} · {inc.get('time', '')}"
+            )
+            if inc.get("assignedTo"):
+                lines.append(f"  👤 {inc['assignedTo']}")
+            if _is_resolved(inc) and inc.get("resolution"):
+                lines.append(f"  ✔️ {inc['resolution']}")
+            elif inc.get("notes"):
+                lines.append(f"  ➡️ {inc['notes']}")
+    patterns = [
+        f"{count} {_label(category).lower()} incidents"
+        for category, count in (data.get("incidents_categories") or {}).items() if count >= 2
+    ]
+    if patterns:
+        lines += ["", f"🔁 **Pattern alert:** {', '.join(patterns)}"]
+    return "\n".join(lines)
+
+
+def render_concierge(data: dict[str, Any]) -> str:
+    categories = data.get("concierge_categories") or {}
+    top = ", ".join(
+        f"{_label(cat).lower()} {count}"
+        for cat, count in sorted(categories.items(), key=lambda kv: -kv[1])
+    )
+    lines = [
+        "## 🎩 Concierge Highlights",
+        "",
+        f"**Requests yesterday:** {data.get('concierge_total', 0)}" + (f" ({top})" if top else ""),
+        f"**Pending:** {data.get('concierge_pending', 0)}",
+    ]
+    notable = data.get("concierge_notable") or []
+    if notable:
+        lines += ["", "### Notable Arrangements", ""]
+        for item in notable:
+            guest = f" ({item['guest']}, Room {item.get('room', '?')})" if item.get("guest") else ""
+            status = f" · {item['status']}" if item.get("status") else ""
+            lines.append(f"- {item.get('details', '')}{guest}{status}")
+            if item.get("notes"):
+                lines.append(f"  💡 {item['notes']}")
+    return "\n".join(lines)
+
+
+# ── Action items ─────────────────────────────
+
+def action_items(data: dict[str, Any]) -> list[dict[str, str]]:
+    """
+    Rule-based action items, most urgent first.
+
+    Each item has priority (urgent / important / standard), title, owner
+    and detail.
+    """
+    items = []
+    for inc in data.get("incidents_detail") or []:
+        if _is_resolved(inc):
+            continue
+        room = f" (Room {inc['room']})" if inc.get("room") else ""
+        items.append({
+            "priority": "urgent" if str(inc.get("priority", "")).lower() in ("high", "urgent", "critical") else "important",
+            "title": f"Follow up: {inc.get('description', 'open incident')}{room}",
+            "owner": inc.get("assignedTo") or _label(inc.get("category", "Operations")),
+            "detail": inc.get("notes") or f"Status: {_label(inc.get('status', 'open'))}",
+        })
+    for guest in data.get("vip_arrivals") or []:
+        items.append({
+            "priority": "important",
+            "title": f"Prepare VIP arrival: {guest.get('guestName', 'Unknown')} ({guest.get('vip')})",
+            "owner": "Front Office",
+            "detail": f"Room {guest.get('roomNo', 'TBD')}" + (f" · {guest['notes']}" if guest.get("notes") else ""),
+        })
+    for item in data.get("concierge_notable") or []:
+        if str(item.get("status", "")).lower() != "pending":
+            continue
+        items.append({
+            "priority": "important",
+            "title": f"Confirm concierge request for {item.get('guest', 'guest')}",
+            "owner": "Concierge",
+            "detail": item.get("notes") or item.get("details", ""),
+        })
+    for anomaly in kpi_anomalies(data):
+        items.append({"priority": "important", "title": f"Review KPI move: {anomaly}",
+                      "owner": "Revenue", "detail": "Check pickup, rate mix and cancellations."})
+    if (data.get("spa_utilization_pct") or 0) >= SPA_CAPACITY_PCT:
+        items.append({"priority": "standard", "title": "Spa near capacity",
+                      "owner": "Spa", "detail": f"{data['spa_utilization_pct']}% utilization — manage walk-in requests."})
+    for guest in data.get("arrivals") or []:
+        if guest.get("notes") and not guest.get("vip"):
+            items.append({
+                "priority": "standard",
+                "title": f"Arrival note: {guest.get('guestName', 'Unknown')} (Room {guest.get('roomNo', 'TBD')})",
+                "owner": "Front Office",
+                "detail": guest["notes"],
+            })
+    if data.get("emails_high_priority"):
+        subjects = [e.get("subject", "") for e in data.get("emails_summary") or [] if e.get("importance") == "high"]
+        items.append({
+            "priority": "standard",
+            "title": f"Review {data['emails_high_priority']} high-priority email(s)",
+            "owner": "GM",
+            "detail": "; ".join(s for s in subjects[:3] if s),
+        })
+    return sorted(items, key=lambda item: _PRIORITY_ORDER.index(item["priority"]))
+
+
+def render_action_items(data: dict[str, Any], items: list[dict[str, str]] | None = None) -> str:
+    """Action items: `items` if given (same shape as `action_items()`), else rule-based."""
+    lines = ["## ✅ Action Items", ""]
+    if items is None:
+        items = action_items(data)
+    if not items:
+        lines.append("No open actions.")
+    for item in items:
+        lines.append(f"{PRIORITY_ICONS[item['priority']]} **{item['title']}** — {item['owner']}")
+        if item["detail"]:
+            lines.append(f"  {item['detail']}")
+    return "\n".join(lines)
+
+
+# ── Full recap ───────────────────────────────
+
+SECTION_RENDERERS = {
+    "metrics": render_metrics,
+    "arrivals": render_arrivals,
+    "fb": render_fb,
+    "spa": render_spa,
+    "villas": render_villas,
+    "incidents": render_incidents,
+    "concierge": render_concierge,
+}
+
+
+def render_recap(data: dict[str, Any], narrative: dict[str, Any] | None = None) -> str:
+    """
+    The complete Markdown recap, without the generation footer.
+
+    `narrative` optionally supplies the written parts (executive_summary,
+    highlights, action_items — see generator's hybrid mode); tables and
+    lists are always rendered from `data`.
+    """
+    narrative = narrative or {}
+    parts = [
+        render_header(data),
+        render_executive_summary(data, narrative.get("executive_summary"), narrative.get("highlights")),
+    ]
+    parts += [render(data) for render in SECTION_RENDERERS.values()]
+    parts.append(render_action_items(data, narrative.get("action_items")))
+    return "\n\n---\n\n".join(parts)
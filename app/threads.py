@@ -0,0 +1,30 @@
+"""
+Hotel Intel — Context-Propagating Threads.
+
+Worker threads start with an empty `contextvars` context, so per-task
+state set by the caller (e.g. the module output capture in main) would
+not follow work handed to a pool. The executor and thread helper here run
+every task in a copy of the submitting thread's context.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in the submitter's context (map included)."""
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def start_thread(target: Callable[[], Any], name: str | None = None, daemon: bool = True) -> threading.Thread:
+    """Start a thread running `target` in a copy of the caller's context."""
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(target,), name=name, daemon=daemon)
+    thread.start()
+    return thread
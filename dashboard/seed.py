@@ -9,7 +9,8 @@ import json
 import sys
 from pathlib import Path
 
-# Ensure we can import database
+# Ensure we can import database (and the app's profile store)
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
 sys.path.insert(0, str(Path(__file__).parent))
 
 import bcrypt
@@ -324,13 +325,14 @@ def seed():
     conn.execute("INSERT INTO settings (property_id, data) VALUES (?, ?)", (2, json.dumps(settings_bristol)))
 
     # ── Guest Profiles (Eden Rock) ───────────
+    # Read through the app's configured store (PROFILE_STORE=json|sqlite)
     if PROFILES_DIR.exists():
-        for f in sorted(PROFILES_DIR.glob("GID-*.json")):
-            profile = load_json(f)
-            conn.execute(
-                "INSERT INTO profiles (property_id, guest_id, data) VALUES (?, ?, ?)",
-                (1, profile["guest_id"], json.dumps(profile))
-            )
+        from guest_intel.profile_store import get_profile_store
+
+        conn.executemany(
+            "INSERT INTO profiles (property_id, guest_id, data) VALUES (?, ?, ?)",
+            ((1, profile["guest_id"], json.dumps(profile)) for profile in get_profile_store().iter_profiles())
+        )
 
     # ── Recaps (Eden Rock — from mock data) ──
     mock_data = {
@@ -446,6 +446,59 @@ async def get_recap_endpoint(property_id: int, date: str, request: Request):
     return recap
 
 
+# ── LLM ──────────────────────────────────────
+
+@app.get("/api/llm/telemetry")
+async def llm_telemetry(request: Request, days: int = 30):
+    """Per-day, per-provider LLM calls, tokens, latency and cost for charts."""
+    user = get_current_user(request)
+    if user["role"] not in ("admin", "manager"):
+        raise HTTPException(403, "Insufficient permissions")
+
+    from llm.telemetry import TelemetrySink
+
+    rows = TelemetrySink().aggregate(days=max(1, min(days, 365)))
+    totals = {
+        key: sum(row[key] or 0 for row in rows)
+        for key in ("calls", "cached", "errors", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd")
+    }
+    totals["cost_usd"] = round(totals["cost_usd"], 4)
+    return {"days": days, "rows": rows, "totals": totals}
+
+
+@app.post("/api/properties/{property_id}/recap/{date}/stream")
+async def stream_recap(property_id: int, date: str, request: Request):
+    """Regenerate a stored recap with the configured LLM, relaying tokens as server-sent events."""
+    user = get_current_user(request)
+    if user["role"] not in ("admin", "manager"):
+        raise HTTPException(403, "Insufficient permissions")
+    require_property_access(user, property_id)
+    conn = get_db()
+    recap = get_recap(conn, property_id, date)
+    prop = get_property(conn, property_id)
+    conn.close()
+    if not recap:
+        return JSONResponse({"error": "Date not found"}, status_code=404)
+
+    from starlette.responses import StreamingResponse
+    from generator import generate_recap_stream
+
+    # The prompt is built here from the property's own data, never taken from the client
+    data = {**recap, "hotel_name": recap.get("hotel", {}).get("name") or (prop or {}).get("name", ""), "date": date}
+
+    def events():
+        # Sync generator: Starlette iterates it in a worker thread
+        try:
+            for token in generate_recap_stream(data):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 # ── Guests ───────────────────────────────────
 
 @app.get("/api/properties/{property_id}/guests")